@@ -0,0 +1,269 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from Shared import codec
+from Shared.filestore import atomic_write_json, locked, read_json_records
+from Shared.partitions import iter_appended, open_partitions
+from Shared.punch_ingest import append_jsonl
+from Shared.schedule_index import ScheduleIndex
+from Shared.timeutil import epoch_to_iso, parse_epoch
+
+FLAGS_NAME = "time_log_flags.jsonl"
+STATE_NAME = "anomaly_state.json"
+
+DOUBLE_PUNCH = "double-punch"
+UNSCHEDULED_SITE = "unscheduled-site"
+LONG_SHIFT = "long-shift"
+MISSED_CLOCK_OUT = "missed-clock-out"
+ORPHAN_CLOCK_OUT = "orphan-clock-out"
+# Cada cuantos segundos el servicio busca clock-ins abiertos de mas, lleguen punches o no
+SWEEP_INTERVAL_S = 60.0
+
+log = logging.getLogger(__name__)
+
+
+class AnomalyDetector:
+    """Flags suspicious punches as they arrive, from the last punch and open clock-in of each officer."""
+
+    def __init__(self, schedule_index: Optional[ScheduleIndex] = None, double_punch_minutes: int = 5,
+                 max_shift_hours: int = 14, schedule_slack_minutes: int = 60):
+        self.schedule_index = schedule_index
+        self.double_punch = double_punch_minutes * 60
+        self.max_shift = max_shift_hours * 3600
+        self.schedule_slack = schedule_slack_minutes * 60
+        # officer_id -> [ts, event] del ultimo punch
+        self.last: Dict[str, List] = {}
+        # officer_id -> [ts, site_prefix, punch_id, ya_marcado]
+        self.open: Dict[str, List] = {}
+        self.journal_offset = 0
+        self.partition_offsets: Dict[str, int] = {}
+
+    @staticmethod
+    def _flag(kind: str, punch: Dict, ts: int, detail: str, site: str = "") -> Dict:
+        punch_id = punch.get("id", "")
+        return {
+            "id": f"{kind}:{punch_id}",
+            "type": kind,
+            "officer_id": punch.get("officer_id", ""),
+            "site_prefix": site or punch.get("site_prefix", ""),
+            "ts": epoch_to_iso(ts),
+            "punch_id": punch_id,
+            "detail": detail,
+            "detected_at": datetime.now().isoformat(timespec="seconds"),
+        }
+
+    def feed(self, punch: Dict) -> List[Dict]:
+        officer_id = punch.get("officer_id")
+        ts = parse_epoch(punch.get("ts"))
+        event = punch.get("event")
+        if not officer_id or ts is None or event not in ("in", "out"):
+            return []
+        site = punch.get("site_prefix", "")
+        flags = []
+
+        last = self.last.get(officer_id)
+        double = bool(last and last[1] == event and abs(ts - last[0]) <= self.double_punch)
+        if double:
+            flags.append(self._flag(DOUBLE_PUNCH, punch, ts,
+                                    f"Second '{event}' within {abs(ts - last[0]) // 60} min"))
+        self.last[officer_id] = [ts, event]
+
+        opened = self.open.get(officer_id)
+        if event == "in":
+            # Un doble punch ya se marco arriba; no es ademas un clock-out olvidado
+            if opened and not opened[3] and not double:
+                flags.append(self._flag(MISSED_CLOCK_OUT, {"id": opened[2], "officer_id": officer_id},
+                                        opened[0], "Clocked in again without clocking out", opened[1]))
+            if self.schedule_index is not None and not self._scheduled_at(officer_id, site, ts):
+                flags.append(self._flag(UNSCHEDULED_SITE, punch, ts, f"No shift at {site} around this time"))
+            self.open[officer_id] = [ts, site, punch.get("id", ""), False]
+        else:
+            if opened is None:
+                if not double:
+                    flags.append(self._flag(ORPHAN_CLOCK_OUT, punch, ts, "Clock-out without clock-in"))
+            else:
+                worked = ts - opened[0]
+                if worked > self.max_shift and not opened[3]:
+                    flags.append(self._flag(LONG_SHIFT, punch, ts, f"Shift of {worked / 3600:.1f} h"))
+                del self.open[officer_id]
+        return flags
+
+    def _scheduled_at(self, officer_id: str, site: str, ts: int) -> bool:
+        shifts = self.schedule_index.officer_range(officer_id, ts - self.schedule_slack,
+                                                   ts + self.schedule_slack, overlapping=True)
+        return any(s.get("site_prefix") == site for s in shifts)
+
+    def sweep(self, now: int) -> List[Dict]:
+        """Flag open clock-ins older than max_shift_hours (each one only once)."""
+        flags = []
+        for officer_id, opened in self.open.items():
+            if not opened[3] and now - opened[0] > self.max_shift:
+                opened[3] = True
+                flags.append(self._flag(MISSED_CLOCK_OUT, {"id": opened[2], "officer_id": officer_id},
+                                        opened[0], f"Still clocked in after {(now - opened[0]) / 3600:.1f} h",
+                                        opened[1]))
+        return flags
+
+    def catch_up(self, journal_path: Path) -> List[Dict]:
+        """Feed punches appended to the journal since the last call."""
+        flags = []
+        journal_path = Path(journal_path)
+        if journal_path.is_dir():
+            # Mes reescrito: se sigue desde su final; repetir la historia daria flags falsos
+            for punch in iter_appended(journal_path, self.partition_offsets, skip_rewritten=True):
+                flags.extend(self.feed(punch))
+            return flags
+        if not journal_path.exists():
+            return flags
+        size = journal_path.stat().st_size
+        if size < self.journal_offset:
+            # Journal truncado o rotado: igual que un mes reescrito
+            self.journal_offset = size
+        if size <= self.journal_offset:
+            return flags
+        with open(journal_path, "rb") as f:
+            f.seek(self.journal_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                self.journal_offset += len(line)
+                try:
+                    flags.extend(self.feed(json.loads(line)))
+                except ValueError:
+                    continue
+        return flags
+
+    # ===== Persistence =====
+    def to_dict(self) -> Dict:
+        return {"journal_offset": self.journal_offset, "partition_offsets": self.partition_offsets,
+                "last": self.last, "open": self.open}
+
+    def restore(self, path: Path):
+        path = Path(path)
+        if not path.exists():
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except ValueError:
+            return
+        self.journal_offset = int(data.get("journal_offset", 0))
+        self.partition_offsets = {k: int(v) for k, v in data.get("partition_offsets", {}).items()}
+        self.last = dict(data.get("last", {}))
+        self.open = dict(data.get("open", {}))
+
+    def save(self, path: Path):
+        path = Path(path)
+        with locked(path):
+            atomic_write_json(path, self.to_dict(), indent=None)
+
+
+def tail_jsonl(path: Path, limit: int = 200, block: int = 64 * 1024) -> List[Dict]:
+    """Last `limit` records of a JSONL file, reading backwards from the end."""
+    path = Path(path)
+    if not path.exists():
+        return []
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b""
+        while pos > 0 and data.count(b"\n") <= limit:
+            step = min(block, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    records = []
+    for line in data.splitlines()[-limit:]:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+    return records
+
+
+def read_flags(data_dir: Path, limit: int = 200, site_prefix: str = "") -> List[Dict]:
+    """Most recent flags first, deduplicated by flag id."""
+    seen = set()
+    out = []
+    for flag in reversed(tail_jsonl(Path(data_dir) / FLAGS_NAME, limit)):
+        if flag.get("id") in seen or (site_prefix and flag.get("site_prefix") != site_prefix):
+            continue
+        seen.add(flag.get("id"))
+        out.append(flag)
+    return out
+
+
+def attach_to_ingestor(ingestor, data_dir: Path, min_interval: float = 5.0, sweep_s: float = SWEEP_INTERVAL_S,
+                       **kwargs) -> Tuple[AnomalyDetector, Callable[[], None]]:
+    """Run the detector on every batch committed by the ingestion service, and sweep every `sweep_s` seconds.
+
+    Returns the detector and a function that stops the sweep thread (and waits for it).
+    """
+    data_dir = Path(data_dir)
+    schedules_path = data_dir / "work_schedules.json"
+    flags_path = data_dir / FLAGS_NAME
+    state_path = data_dir / STATE_NAME
+    schedules_mtime = [None]
+    last_save = [0.0]
+    # Los commits y el timer de sweep no tocan el detector a la vez
+    lock = threading.Lock()
+
+    detector = AnomalyDetector(**kwargs)
+    detector.restore(state_path)
+
+    def _refresh_schedules():
+        # Solo se recarga el indice si work_schedules.json (o sus particiones) cambio
+        store = open_partitions(data_dir, "schedules")
+        # Un snapshot frio puede estar comprimido (.json.gz / .json.xz)
+        path = codec.resolve(schedules_path)
+        try:
+            paths = store.sources() if store is not None else [path]
+            mtime = tuple((p.name, p.stat().st_mtime_ns) for p in paths)
+        except OSError:
+            return
+        if mtime != schedules_mtime[0]:
+            schedules = store.read_all() if store is not None else read_json_records(path)
+            detector.schedule_index = ScheduleIndex(schedules)
+            schedules_mtime[0] = mtime
+
+    def _flush(flags: List[Dict]):
+        append_jsonl(flags_path, flags)
+        # Los flags tienen id determinista: si se pierde el estado, repetirlos es inofensivo
+        if time.monotonic() - last_save[0] >= min_interval:
+            detector.save(state_path)
+            last_save[0] = time.monotonic()
+
+    def _on_commit(batch):
+        with lock:
+            _refresh_schedules()
+            flags = detector.catch_up(ingestor.journal_path)
+            flags.extend(detector.sweep(parse_epoch(datetime.now())))
+            _flush(flags)
+
+    stopped = threading.Event()
+
+    def _sweep_loop():
+        while not stopped.wait(sweep_s):
+            try:
+                with lock:
+                    _flush(detector.sweep(parse_epoch(datetime.now())))
+            except Exception:
+                log.exception("anomaly sweep failed")
+
+    _refresh_schedules()
+    _on_commit([])
+    ingestor.on_commit.append(_on_commit)
+    thread = threading.Thread(target=_sweep_loop, name="anomaly-sweep", daemon=True)
+    thread.start()
+
+    def stop():
+        stopped.set()
+        thread.join()
+
+    return detector, stop
@@ -0,0 +1,331 @@
+import argparse
+import json
+import os
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from Shared.filestore import atomic_write_json, read_json_records
+from Shared.partitions import PARTITION_DIRS, MonthlyPartitions, months_between, open_partitions
+from Shared.punch_ingest import DEFAULT_DATA_DIR, JOURNAL_NAME, iter_jsonl
+from Shared.timeutil import parse_epoch, shift_bounds, to_epoch
+from Shared.warmup import files_signature
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+try:
+    import pandas as pd
+except Exception:
+    pd = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as pads
+    import pyarrow.parquet as pq
+except Exception:
+    pa = pads = pq = None
+
+ARCHIVE_DIR = "archive"
+MANIFEST_NAME = "manifest.json"
+# -1 = sin valor en columnas de epoch
+NO_TS = -1
+
+# Columnas por dataset: "cat" = diccionario (codigos + categorias), "ts" = epoch int64, "str" = texto
+SCHEMAS = {
+    "time_logs": {"id": "str", "officer_id": "cat", "site_prefix": "cat", "event": "cat", "ts": "ts",
+                  "device": "cat"},
+    "schedules": {"id": "str", "officer_id": "cat", "site_prefix": "cat", "start": "ts", "end": "ts",
+                  "shift_type": "cat", "priority": "cat", "status": "cat"},
+}
+
+
+def archive_format() -> str:
+    """"parquet" with pyarrow, else "npz" (numpy); Feather also needs pyarrow, so it is not a fallback."""
+    if pq is not None:
+        return "parquet"
+    if np is not None:
+        return "npz"
+    raise RuntimeError("numpy or pyarrow is required for the archive")
+
+
+def _values(dataset: str, records: List[Dict]) -> Dict[str, list]:
+    cols: Dict[str, list] = {name: [] for name in SCHEMAS[dataset]}
+    for r in records:
+        if dataset == "schedules":
+            bounds = shift_bounds(r) or (NO_TS, NO_TS)
+            cols["start"].append(bounds[0])
+            cols["end"].append(bounds[1])
+        else:
+            ts = parse_epoch(r.get("ts"))
+            cols["ts"].append(NO_TS if ts is None else ts)
+        for name, kind in SCHEMAS[dataset].items():
+            if kind != "ts":
+                cols[name].append(str(r.get(name) or ""))
+    return cols
+
+
+def _encode(values: List[str]) -> Tuple["np.ndarray", List[str]]:
+    categories: Dict[str, int] = {}
+    codes = np.fromiter((categories.setdefault(v, len(categories)) for v in values), dtype=np.int32,
+                        count=len(values))
+    return codes, list(categories)
+
+
+def _arrow_table(dataset: str, records: List[Dict], columns: Optional[List[str]] = None):
+    cols = _values(dataset, records)
+    arrays = {}
+    for name in columns or SCHEMAS[dataset]:
+        kind = SCHEMAS[dataset][name]
+        if kind == "cat":
+            arrays[name] = pa.array(cols[name], type=pa.string()).dictionary_encode()
+        else:
+            arrays[name] = pa.array(cols[name], type=pa.int64() if kind == "ts" else pa.string())
+    return pa.table(arrays)
+
+
+def write_columns(path: Path, dataset: str, records: List[Dict], fmt: Optional[str] = None) -> Path:
+    """Write records as a columnar file (`.parquet` or `.npz`); returns the path written."""
+    fmt = fmt or archive_format()
+    path = Path(path).with_suffix("." + fmt)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp{path.suffix}")
+    try:
+        if fmt == "parquet":
+            pq.write_table(_arrow_table(dataset, records), tmp)
+        else:
+            cols = _values(dataset, records)
+            arrays = {}
+            for name, kind in SCHEMAS[dataset].items():
+                if kind == "cat":
+                    arrays[f"{name}__codes"], categories = _encode(cols[name])
+                    arrays[f"{name}__cats"] = np.array(categories, dtype=str)
+                elif kind == "ts":
+                    arrays[name] = np.array(cols[name], dtype=np.int64)
+                else:
+                    arrays[name] = np.array(cols[name], dtype=str)
+            with open(tmp, "wb") as f:
+                np.savez_compressed(f, **arrays)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return path
+
+
+def read_columns(path: Path, dataset: str, columns: Optional[List[str]] = None):
+    """DataFrame with only `columns` of an archive file; dictionary columns come back as categoricals."""
+    if pd is None:
+        raise RuntimeError("pandas is required to read the archive")
+    path = Path(path)
+    columns = list(columns or SCHEMAS[dataset])
+    if path.suffix == ".parquet":
+        return pq.read_table(path, columns=columns).to_pandas()
+    # NpzFile es perezoso: solo se descomprimen los arreglos pedidos
+    with np.load(path) as data:
+        out = {}
+        for name in columns:
+            if SCHEMAS[dataset][name] == "cat":
+                out[name] = pd.Categorical.from_codes(data[f"{name}__codes"], data[f"{name}__cats"])
+            else:
+                out[name] = data[name]
+    return pd.DataFrame(out)
+
+
+def to_frame(dataset: str, records: List[Dict], columns: Optional[List[str]] = None):
+    """Same frame as read_columns, built from records (months not archived yet)."""
+    if pd is None:
+        raise RuntimeError("pandas is required to read the archive")
+    cols = _values(dataset, records)
+    out = {}
+    for name in columns or SCHEMAS[dataset]:
+        kind = SCHEMAS[dataset][name]
+        if kind == "cat":
+            out[name] = pd.Categorical(cols[name])
+        else:
+            out[name] = np.array(cols[name], dtype=np.int64 if kind == "ts" else object)
+    return pd.DataFrame(out)
+
+
+class Archive:
+    """Columnar copies of closed partitions under `archive/<dataset>/[<shard>/]YYYY-MM.<fmt>`."""
+
+    def __init__(self, data_dir: Path, dataset: str):
+        self.data_dir = Path(data_dir)
+        self.dataset = dataset
+        self.root = self.data_dir / ARCHIVE_DIR / PARTITION_DIRS[dataset]
+        # Firma del mes de origen de cada archivo: un mes reescrito con force=True se vuelve a archivar
+        self.manifest_path = self.root / MANIFEST_NAME
+        self.store = open_partitions(self.data_dir, dataset)
+        self.manifest: Dict[str, Dict] = self._load_manifest()
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _legacy_records(self) -> List[Dict]:
+        if self.dataset == "schedules":
+            return read_json_records(self.data_dir / "work_schedules.json")
+        return read_json_records(self.data_dir / "time_logs.json") + list(iter_jsonl(self.data_dir / JOURNAL_NAME))
+
+    def _name(self, shard: MonthlyPartitions, month: str) -> str:
+        rel = shard.root.relative_to(self.store.root).as_posix()
+        return month if rel == "." else f"{rel}/{month}"
+
+    def _fresh(self, shard: MonthlyPartitions, month: str) -> Optional[Path]:
+        entry = self.manifest.get(self._name(shard, month))
+        if entry is None or entry.get("source") != list(files_signature([shard.path(month)])[0] or []):
+            return None
+        path = self.root / entry["file"]
+        return path if path.exists() else None
+
+    def build(self, today: Optional[date] = None, compress: bool = True) -> List[str]:
+        """Archive every closed month that is missing or out of date (gzipping it first with `compress`)."""
+        if self.store is None:
+            return []
+        fmt = archive_format()
+
+        def _shard(shard: MonthlyPartitions) -> List[Tuple[str, Dict]]:
+            if compress:
+                shard.compress(today)
+            out = []
+            for month in shard.months():
+                if not shard.is_closed(month, today) or self._fresh(shard, month) is not None:
+                    continue
+                name = self._name(shard, month)
+                source = files_signature([shard.path(month)])[0]
+                records = shard.read(month)
+                path = write_columns(self.root / name, self.dataset, records, fmt)
+                out.append((name, {"file": path.relative_to(self.root).as_posix(), "source": list(source),
+                                   "format": fmt, "rows": len(records)}))
+            return out
+
+        # Un shard por hilo (pyarrow y zlib liberan el GIL al comprimir)
+        written = [item for items in self.store.fan_out(_shard) for item in items]
+        if written:
+            self.manifest.update(written)
+            self.root.mkdir(parents=True, exist_ok=True)
+            atomic_write_json(self.manifest_path, dict(sorted(self.manifest.items())))
+        return [name for name, _ in written]
+
+    def scan(self, lo: int, hi: int, columns: Optional[List[str]] = None, site_prefix: str = ""):
+        """Rows with ts (punches) or start (shifts) in [lo, hi), only `columns`, for one site or all."""
+        if pd is None:
+            raise RuntimeError("pandas is required to read the archive")
+        time_col = "ts" if self.dataset == "time_logs" else "start"
+        columns = list(columns or SCHEMAS[self.dataset])
+        read_cols = list(dict.fromkeys(columns + [time_col] + (["site_prefix"] if site_prefix else [])))
+        if self.store is None:
+            # Sin particiones: se arma desde los JSON
+            return self._filter(to_frame(self.dataset, self._legacy_records(), read_cols),
+                                lo, hi, columns, site_prefix)
+        source = self.store.for_site(site_prefix) if site_prefix else self.store
+        wanted = set(months_between(lo, hi))
+
+        def _shard(shard: MonthlyPartitions) -> Tuple[List[Path], list]:
+            archived, parts = [], []
+            for month in shard.months():
+                if month not in wanted:
+                    continue
+                path = self._fresh(shard, month)
+                if pa is not None and path is not None and path.suffix == ".parquet":
+                    archived.append(path)
+                elif pa is not None:
+                    parts.append(_arrow_table(self.dataset, shard.read(month), read_cols))
+                else:
+                    parts.append(read_columns(path, self.dataset, read_cols) if path is not None
+                                 else to_frame(self.dataset, shard.read(month), read_cols))
+            return archived, parts
+
+        results = source.fan_out(_shard)
+        archived = [p for paths, _ in results for p in paths]
+        parts = [p for _, shard_parts in results for p in shard_parts if len(p)]
+        if archived:
+            # Un solo scan de Arrow sobre todos los archivos: solo las columnas pedidas y
+            # el filtro de rango se evalua al leer, en hilos de C++
+            time_range = (pads.field(time_col) >= lo) & (pads.field(time_col) < hi)
+            parts.insert(0, pads.dataset(archived, format="parquet").to_table(columns=read_cols,
+                                                                               filter=time_range))
+        if not parts:
+            return to_frame(self.dataset, [], columns)
+        df = pa.concat_tables(parts).to_pandas() if pa is not None else pd.concat(parts, ignore_index=True)
+        return self._filter(df, lo, hi, columns, site_prefix)
+
+    def _filter(self, df, lo: int, hi: int, columns: List[str], site_prefix: str):
+        time_col = "ts" if self.dataset == "time_logs" else "start"
+        # Filtro vectorizado sobre el epoch entero
+        mask = (df[time_col] >= lo) & (df[time_col] < hi)
+        if site_prefix:
+            mask &= df["site_prefix"] == site_prefix
+        return df.loc[mask, columns].reset_index(drop=True)
+
+
+def worked_hours(data_dir: Path, lo: int, hi: int, site_prefix: str = ""):
+    """Hours per officer and site for clock-ins in [lo, hi), pairing each "in" with the next "out"."""
+    df = Archive(data_dir, "time_logs").scan(lo, hi, ["officer_id", "site_prefix", "event", "ts"], site_prefix)
+    if len(df) < 2:
+        return pd.DataFrame({"officer_id": [], "site_prefix": [], "hours": []})
+    # Se trabaja sobre los codigos del diccionario, sin materializar los strings
+    officer = pd.Categorical(df["officer_id"])
+    site = pd.Categorical(df["site_prefix"])
+    ts = df["ts"].to_numpy()
+    order = np.lexsort((ts, officer.codes))
+    codes, ts, site_codes = officer.codes[order], ts[order], site.codes[order]
+    is_in = (df["event"] == "in").to_numpy()[order]
+    is_out = (df["event"] == "out").to_numpy()[order]
+    # Un "in" seguido de un "out" del mismo oficial cierra un intervalo
+    pair = is_in[:-1] & is_out[1:] & (codes[:-1] == codes[1:]) & (ts[1:] > ts[:-1])
+    idx = np.nonzero(pair)[0]
+    intervals = pd.DataFrame({
+        "officer_id": officer.categories.to_numpy()[codes[idx]],
+        "site_prefix": site.categories.to_numpy()[site_codes[idx]],
+        "hours": (ts[idx + 1] - ts[idx]) / 3600.0,
+    })
+    return intervals.groupby(["officer_id", "site_prefix"], as_index=False)["hours"].sum()
+
+
+def site_kpis(data_dir: Path, lo: int, hi: int, site_prefix: str = ""):
+    """Per site: scheduled shifts and hours, hours worked and coverage (worked / scheduled)."""
+    shifts = Archive(data_dir, "schedules").scan(lo, hi, ["site_prefix", "start", "end"], site_prefix)
+    shifts["hours"] = (shifts["end"] - shifts["start"]) / 3600.0
+    scheduled = shifts.groupby("site_prefix", observed=True).agg(shifts=("hours", "size"),
+                                                                 scheduled_hours=("hours", "sum"))
+    worked = worked_hours(data_dir, lo, hi, site_prefix).groupby("site_prefix")["hours"].sum()
+    out = scheduled.join(worked.rename("worked_hours"), how="outer").fillna(0)
+    out.index = out.index.astype(str)
+    out["coverage"] = (out["worked_hours"] / out["scheduled_hours"].where(out["scheduled_hours"] > 0)).fillna(0)
+    return out.reset_index().rename(columns={"index": "site_prefix"}).round(2)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Columnar archive of closed time log and schedule partitions")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_build = sub.add_parser("build", help="archive closed months that are missing or out of date")
+    p_build.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR)
+    p_build.add_argument("--keep-plain", action="store_true", help="do not gzip the closed JSONL months")
+    p_kpis = sub.add_parser("kpis", help="per-site scheduled vs worked hours for a date range")
+    p_kpis.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR)
+    p_kpis.add_argument("--start", required=True, help="first day YYYY-MM-DD")
+    p_kpis.add_argument("--end", required=True, help="last day YYYY-MM-DD")
+    p_kpis.add_argument("--site", default="")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        print(f"format: {archive_format()}")
+        for dataset in PARTITION_DIRS:
+            written = Archive(args.data_dir, dataset).build(compress=not args.keep_plain)
+            print(f"{dataset}: {len(written)} month(s) archived")
+    else:
+        lo = to_epoch(datetime.fromisoformat(args.start))
+        hi = to_epoch(datetime.fromisoformat(args.end) + timedelta(days=1))
+        print(site_kpis(args.data_dir, lo, hi, args.site).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
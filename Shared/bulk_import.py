@@ -0,0 +1,493 @@
+import argparse
+import csv
+import io
+import re
+import uuid
+from datetime import date, datetime, time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from Shared import codec
+from Shared.filestore import read_json_records, read_stamp, save_json_changes
+from Shared.partitions import open_partitions
+from Shared.punch_ingest import DEFAULT_DATA_DIR
+
+try:
+    import pandas as pd
+except Exception:
+    pd = None
+
+try:
+    import openpyxl
+except Exception:
+    openpyxl = None
+
+CHUNK_SIZE = 2000
+# Tipo de fila importada -> (dataset, archivo, llave del registro)
+KINDS = {
+    "officers": ("officers", "security_officers.json", "id"),
+    "sites": ("registry", "site_registry.json", "prefix"),
+    "shifts": ("schedules", "work_schedules.json", "id"),
+}
+UPDATE = "update"
+SKIP = "skip"
+ERROR = "error"
+ON_DUPLICATE = (UPDATE, SKIP, ERROR)
+# Campo con la fecha de la ultima edicion (solo si la fila cambio algo)
+UPDATED_FIELDS = {"officers": "updated_at", "sites": "last_updated"}
+
+# Mismas opciones que los formularios de la app
+SITE_TYPES = ["ShoppingCenter", "Warehouse", "Parking", "Office", "Residential", "Other"]
+SITE_STATUSES = ["Active", "Inactive", "Under Maintenance", "Planned"]
+OFFICER_STATUSES = ["Active", "Inactive"]
+SHIFT_TYPES = ["Day", "Evening", "Night"]
+SHIFT_PRIORITIES = ["Normal", "High"]
+SHIFT_STATUSES = ["Scheduled", "Completed", "Cancelled"]
+
+# Encabezados alternativos (ya normalizados: minusculas, "_" en vez de espacios)
+ALIASES = {
+    "officers": {"full_name": "name", "officer_name": "name", "e_mail": "email", "mail": "email",
+                 "phone_number": "phone", "mobile": "phone", "cell": "phone"},
+    "sites": {"site_prefix": "prefix", "code": "prefix", "site_type": "site", "type": "site", "site_name": "name",
+              "zip_code": "zip", "postal_code": "zip", "street": "address", "street_address": "address",
+              "contact": "contact_name", "contact_person": "contact_name", "phone": "contact_phone"},
+    "shifts": {"officer": "officer_id", "email": "officer_email", "phone": "officer_phone", "prefix": "site_prefix",
+               "site": "site_prefix", "shift_date": "date", "start": "start_time", "end": "end_time",
+               "type": "shift_type"},
+}
+
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_CLOCK = re.compile(r"^(\d{1,2}):(\d{2})(?::\d{2})?$")
+_TRUE = {"1", "true", "yes", "y", "x", "si", "s"}
+
+
+class RowError(ValueError):
+    """A row that cannot be imported (reported, not raised to the caller)."""
+
+
+class ImportResult(NamedTuple):
+    changes: List[Dict]   # diff_records format: {"key", "base", "new"}
+    rows: List[Dict]      # {"row", "status", "key", "message"} per data row
+    counts: Dict[str, int]
+
+    @property
+    def errors(self) -> List[Dict]:
+        return [r for r in self.rows if r["status"] == ERROR]
+
+
+# ===== Reading =====
+def _header(name: Any, kind: str) -> str:
+    name = re.sub(r"[\s\-]+", "_", str(name or "").strip().lower())
+    return ALIASES[kind].get(name, name)
+
+
+def _text(value: Any) -> str:
+    """Cell value as stripped text (dates as YYYY-MM-DD, times as HH:MM, 5.0 as 5)."""
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.date().isoformat() if value.time() == time() else value.isoformat(timespec="minutes")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, time):
+        return value.strftime("%H:%M")
+    if isinstance(value, float):
+        if value != value:  # NaN: celda vacia
+            return ""
+        if value.is_integer():
+            return str(int(value))
+    return str(value).strip()
+
+
+def _source_name(source) -> str:
+    return str(getattr(source, "name", source))
+
+
+def iter_batches(source, kind: str, chunk_size: int = CHUNK_SIZE) -> Iterator[List[Tuple[int, Dict[str, str]]]]:
+    """Rows of a CSV/XLSX path or upload as [(row number, {column: text})], `chunk_size` rows at a time."""
+    # Numero de fila de la planilla (encabezado = 1); las filas vacias se saltan
+    suffix = Path(_source_name(source)).suffix.lower()
+    if suffix in (".xlsx", ".xlsm"):
+        yield from _iter_xlsx(source, kind, chunk_size)
+    elif suffix in (".csv", ".txt"):
+        yield from _iter_csv(source, kind, chunk_size)
+    else:
+        raise ValueError(f"{_source_name(source)}: unsupported file type (use .csv or .xlsx)")
+
+
+def _iter_csv(source, kind: str, chunk_size: int):
+    if pd is None:
+        raise RuntimeError("pandas is required to import CSV files")
+    row_no = 1
+    # Todo como texto: "00123" o "+1 305..." no se convierten en numeros
+    reader = pd.read_csv(source, dtype=str, keep_default_na=False, chunksize=chunk_size,
+                         encoding="utf-8-sig", skip_blank_lines=False)
+    for chunk in reader:
+        chunk.columns = [_header(c, kind) for c in chunk.columns]
+        # Limpieza vectorizada por lote; la validacion sigue fila a fila
+        chunk = chunk.apply(lambda col: col.str.strip())
+        batch = []
+        for record in chunk.to_dict("records"):
+            row_no += 1
+            if any(record.values()):
+                batch.append((row_no, record))
+        yield batch
+
+
+def _iter_xlsx(source, kind: str, chunk_size: int):
+    if openpyxl is None:
+        raise RuntimeError("openpyxl is required to import XLSX files")
+    # read_only: las filas se leen del XML a medida que se piden
+    book = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = book.worksheets[0].iter_rows(values_only=True)
+        header = [_header(c, kind) for c in next(rows, ())]
+        batch = []
+        for row_no, values in enumerate(rows, start=2):
+            record = {name: _text(v) for name, v in zip(header, values) if name}
+            if any(record.values()):
+                batch.append((row_no, record))
+            if len(batch) >= chunk_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        book.close()
+
+
+# ===== Indexes for duplicate detection =====
+def email_key(value: str) -> str:
+    return value.strip().lower()
+
+
+def phone_key(value: str) -> str:
+    digits = re.sub(r"\D", "", value or "")
+    # +1 305... y 305... son el mismo numero
+    return digits[1:] if len(digits) == 11 and digits.startswith("1") else digits
+
+
+def prefix_key(value: str) -> str:
+    return " ".join(str(value or "").split()).upper()
+
+
+def shift_key(shift: Dict) -> Tuple:
+    return (shift.get("officer_id"), shift.get("site_prefix"), shift.get("date"), shift.get("start_time"))
+
+
+class Indexes:
+    """Lookups of existing records by site prefix, officer email/phone/id and shift slot."""
+
+    def __init__(self, officers: List[Dict] = (), registry: List[Dict] = (), schedules: List[Dict] = ()):
+        self.by_prefix: Dict[str, Dict] = {}
+        self.by_email: Dict[str, Dict] = {}
+        self.by_phone: Dict[str, Dict] = {}
+        self.by_officer_id: Dict[str, Dict] = {}
+        self.by_shift_id: Dict[str, Dict] = {}
+        self.by_slot: Dict[Tuple, Dict] = {}
+        for site in registry:
+            if isinstance(site, dict) and site.get("prefix"):
+                self.by_prefix.setdefault(prefix_key(site["prefix"]), site)
+        for officer in officers:
+            if isinstance(officer, dict):
+                self.add_officer(officer)
+        for shift in schedules:
+            if isinstance(shift, dict):
+                self.add_shift(shift)
+
+    def add_officer(self, officer: Dict):
+        if officer.get("id"):
+            self.by_officer_id[str(officer["id"])] = officer
+        if officer.get("email"):
+            self.by_email[email_key(officer["email"])] = officer
+        if phone_key(officer.get("phone", "")):
+            self.by_phone[phone_key(officer["phone"])] = officer
+
+    def add_shift(self, shift: Dict):
+        if shift.get("id"):
+            self.by_shift_id[str(shift["id"])] = shift
+        self.by_slot[shift_key(shift)] = shift
+
+    def officer(self, officer_id: str = "", email: str = "", phone: str = "") -> Optional[Dict]:
+        """The officer with this id, email or phone; RowError if they point to different officers."""
+        matches = [m for m in (self.by_officer_id.get(officer_id), self.by_email.get(email_key(email)),
+                               self.by_phone.get(phone_key(phone))) if m is not None]
+        if len({str(m.get("id")) for m in matches}) > 1:
+            raise RowError("id, email and phone match different officers")
+        return matches[0] if matches else None
+
+
+# ===== Row validation =====
+def _choice(row: Dict[str, str], field: str, options: List[str]) -> Optional[str]:
+    value = row.get(field, "")
+    if not value:
+        return None
+    for option in options:
+        if option.lower() == value.lower():
+            return option
+    raise RowError(f"{field} must be one of: {', '.join(options)}")
+
+
+def _clock(value: str, field: str) -> str:
+    match = _CLOCK.match(value)
+    if not match or int(match.group(1)) > 23 or int(match.group(2)) > 59:
+        raise RowError(f"{field} must be HH:MM")
+    return f"{int(match.group(1)):02d}:{match.group(2)}"
+
+
+def _fields(row: Dict[str, str], names: List[str]) -> Dict[str, str]:
+    # Solo las columnas con valor: en una actualizacion, una celda vacia no borra el dato
+    return {name: row[name] for name in names if row.get(name)}
+
+
+def _officer(row: Dict[str, str], existing: Optional[Dict], now: str) -> Dict:
+    fields = _fields(row, ["name", "email", "phone"])
+    if "email" in fields and not _EMAIL.match(fields["email"]):
+        raise RowError("invalid email")
+    if "phone" in fields and len(phone_key(fields["phone"])) < 7:
+        raise RowError("invalid phone")
+    status = _choice(row, "status", OFFICER_STATUSES)
+    if status:
+        fields["status"] = status
+    if existing is not None:
+        return dict(existing, **fields)
+    if not fields.get("name") or not (fields.get("email") or fields.get("phone")):
+        raise RowError("name is required and at least one contact (email or phone)")
+    return {"id": row.get("id") or str(uuid.uuid4()), "name": fields["name"], "email": fields.get("email", ""),
+            "phone": fields.get("phone", ""), "status": fields.get("status", "Active"), "photo_path": "",
+            "created_at": now}
+
+
+_SITE_TEXT = ["name", "address", "city", "state", "zip", "country", "contact_name", "contact_phone", "notes",
+              "special_instructions", "patrol_frequency"]
+_SITE_REQUIRED = ["prefix", "name", "address", "city", "state", "zip"]
+
+
+def _site(row: Dict[str, str], existing: Optional[Dict], now: str) -> Dict:
+    fields = _fields(row, _SITE_TEXT)
+    for field, options in (("site", SITE_TYPES), ("status", SITE_STATUSES)):
+        value = _choice(row, field, options)
+        if value:
+            fields[field] = value
+    if row.get("required_officers"):
+        try:
+            fields["required_officers"] = int(float(row["required_officers"]))
+        except ValueError:
+            raise RowError("required_officers must be a number") from None
+        if not 1 <= fields["required_officers"] <= 10:
+            raise RowError("required_officers must be between 1 and 10")
+    for field in ("has_cctv", "requires_vehicle"):
+        if row.get(field):
+            fields[field] = row[field].lower() in _TRUE
+    if existing is not None:
+        site = dict(existing, **fields)
+    else:
+        missing = [f for f in _SITE_REQUIRED if not row.get(f)]
+        if missing:
+            raise RowError(f"missing required field(s): {', '.join(missing)}")
+        site = {"prefix": row["prefix"], "site": "ShoppingCenter", "status": "Active", "country": "USA",
+                "contact_name": "", "contact_phone": "", "notes": "", "special_instructions": "",
+                "required_officers": 1, "patrol_frequency": "1 hour", "has_cctv": False, "requires_vehicle": False,
+                **fields, "created_date": now}
+    # Igual que el formulario de sitios
+    full_address = f"{site.get('address', '')}, {site.get('city', '')}, {site.get('state', '')}, " \
+                   f"{site.get('zip', '')}, {site.get('country', '')}"
+    site["maps_link"] = f"https://www.google.com/maps/search/?api=1&query={full_address.replace(' ', '+')}"
+    if existing is None:
+        site["last_updated"] = now
+    return site
+
+
+def _shift(row: Dict[str, str], existing: Optional[Dict], now: str) -> Dict:
+    fields = {"officer_id": row["officer_id"], "site_prefix": row["site_prefix"]}
+    if row.get("date"):
+        try:
+            fields["date"] = date.fromisoformat(row["date"][:10]).isoformat()
+        except ValueError:
+            raise RowError("date must be YYYY-MM-DD") from None
+    for field in ("start_time", "end_time"):
+        if row.get(field):
+            fields[field] = _clock(row[field], field)
+    for field, options in (("shift_type", SHIFT_TYPES), ("priority", SHIFT_PRIORITIES), ("status", SHIFT_STATUSES)):
+        value = _choice(row, field, options)
+        if value:
+            fields[field] = value
+    if row.get("notes"):
+        fields["notes"] = row["notes"]
+    if existing is not None:
+        return dict(existing, **fields)
+    missing = [f for f in ("date", "start_time", "end_time") if f not in fields]
+    if missing:
+        raise RowError(f"missing required field(s): {', '.join(missing)}")
+    return {"id": row.get("id") or str(uuid.uuid4()), "officer_id": row["officer_id"],
+            "site_prefix": row["site_prefix"], "date": fields["date"], "start_time": fields["start_time"],
+            "end_time": fields["end_time"], "shift_type": fields.get("shift_type", "Day"),
+            "priority": fields.get("priority", "Normal"), "notes": fields.get("notes", ""),
+            "status": fields.get("status", "Scheduled"), "created_at": now}
+
+
+# ===== Import =====
+class Importer:
+    """Validate rows of one kind against the existing records; the caller saves `result().changes` at once."""
+
+    def __init__(self, kind: str, indexes: Indexes, on_duplicate: str = UPDATE):
+        if kind not in KINDS:
+            raise ValueError(f"unknown kind {kind!r} (use {', '.join(KINDS)})")
+        if on_duplicate not in ON_DUPLICATE:
+            raise ValueError(f"on_duplicate must be one of {', '.join(ON_DUPLICATE)}")
+        self.kind = kind
+        self.key = KINDS[kind][2]
+        self.indexes = indexes
+        self.on_duplicate = on_duplicate
+        self.now = datetime.now().isoformat()
+        # llave -> (registro existente o None, registro nuevo)
+        self._pending: Dict[str, Tuple[Optional[Dict], Dict]] = {}
+        self.rows: List[Dict] = []
+
+    def _match(self, row: Dict[str, str]) -> Optional[Dict]:
+        ix = self.indexes
+        if self.kind == "officers":
+            return ix.officer(row.get("id", ""), row.get("email", ""), row.get("phone", ""))
+        if self.kind == "sites":
+            return ix.by_prefix.get(prefix_key(row.get("prefix", "")))
+        officer = ix.officer(row.get("officer_id", ""), row.get("officer_email", ""), row.get("officer_phone", ""))
+        if officer is None:
+            raise RowError("unknown officer (officer_id, officer_email or officer_phone)")
+        site = ix.by_prefix.get(prefix_key(row.get("site_prefix", "")))
+        if site is None:
+            raise RowError(f"unknown site prefix {row.get('site_prefix', '')!r}")
+        # Valores canonicos para el registro y para la llave del turno
+        row["officer_id"], row["site_prefix"] = str(officer["id"]), site["prefix"]
+        if row.get("id") and row["id"] in ix.by_shift_id:
+            return ix.by_shift_id[row["id"]]
+        slot = (row["officer_id"], row["site_prefix"], row.get("date", "")[:10],
+                _clock(row["start_time"], "start_time") if row.get("start_time") else "")
+        return ix.by_slot.get(slot)
+
+    def _build(self, row: Dict[str, str], existing: Optional[Dict]) -> Dict:
+        return {"officers": _officer, "sites": _site, "shifts": _shift}[self.kind](row, existing, self.now)
+
+    def _index(self, record: Dict):
+        if self.kind == "officers":
+            self.indexes.add_officer(record)
+        elif self.kind == "sites":
+            self.indexes.by_prefix[prefix_key(record["prefix"])] = record
+        else:
+            self.indexes.add_shift(record)
+
+    def add_row(self, row_no: int, row: Dict[str, str]):
+        # Fila que coincide con un registro (o con una fila anterior): update, skip o error segun on_duplicate
+        try:
+            existing = self._match(row)
+            if existing is not None and str(existing.get(self.key)) in self._pending:
+                # Ya tocado por una fila anterior: se parte de esa version
+                existing = self._pending[str(existing.get(self.key))][1]
+            if existing is not None and self.on_duplicate != UPDATE:
+                if self.on_duplicate == ERROR:
+                    raise RowError(f"duplicate of {existing.get(self.key)}")
+                self.rows.append({"row": row_no, "status": SKIP, "key": str(existing.get(self.key, "")),
+                                  "message": "already exists"})
+                return
+            record = self._build(row, existing)
+        except RowError as e:
+            self.rows.append({"row": row_no, "status": ERROR, "key": "", "message": str(e)})
+            return
+        status = "added" if existing is None else "updated" if record != existing else "unchanged"
+        if status == "updated" and self.kind in UPDATED_FIELDS:
+            record[UPDATED_FIELDS[self.kind]] = self.now
+        key = str(record[self.key])
+        # Repetido dentro del archivo: la base sigue siendo el registro original
+        base = self._pending[key][0] if key in self._pending else existing
+        self._pending[key] = (base, record)
+        self._index(record)
+        self.rows.append({"row": row_no, "status": status, "key": key, "message": ""})
+
+    def add_batch(self, batch: List[Tuple[int, Dict[str, str]]]):
+        for row_no, row in batch:
+            self.add_row(row_no, row)
+
+    def result(self) -> ImportResult:
+        changes = [{"key": key, "base": base, "new": new} for key, (base, new) in self._pending.items()
+                   if base != new]
+        counts = {status: 0 for status in ("added", "updated", "unchanged", SKIP, ERROR)}
+        for row in self.rows:
+            counts[row["status"]] += 1
+        return ImportResult(changes, self.rows, counts)
+
+
+def import_rows(source, kind: str, indexes: Indexes, on_duplicate: str = UPDATE, chunk_size: int = CHUNK_SIZE,
+                progress: Optional[Callable[[int], None]] = None) -> ImportResult:
+    """Stream a CSV/XLSX file through an Importer; `progress(rows read)` after each batch."""
+    importer = Importer(kind, indexes, on_duplicate)
+    read = 0
+    for batch in iter_batches(source, kind, chunk_size):
+        importer.add_batch(batch)
+        read += len(batch)
+        if progress is not None:
+            progress(read)
+    return importer.result()
+
+
+# ===== Command line (writes the data files directly) =====
+def load_records(data_dir: Path, kind: str) -> List[Dict]:
+    dataset, fname, _ = KINDS[kind]
+    store = open_partitions(data_dir, dataset) if dataset == "schedules" else None
+    if store is not None:
+        return list(store.read_all())
+    return read_json_records(codec.resolve(data_dir / fname))
+
+
+def commit(data_dir: Path, kind: str, result: ImportResult, stamp=None, current: Optional[List[Dict]] = None):
+    """Write an import's changes in one save (per touched month if the schedules are partitioned)."""
+    dataset, fname, key = KINDS[kind]
+    if not result.changes:
+        return
+    store = open_partitions(data_dir, dataset) if dataset == "schedules" else None
+    if store is not None:
+        store.save_changes(result.changes, key)
+        return
+    save_json_changes(codec.resolve(data_dir / fname), result.changes, stamp, key, current_records=current,
+                      indent=codec.indent_for(dataset))
+
+
+def report_csv(rows: List[Dict]) -> str:
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=["row", "status", "key", "message"])
+    writer.writeheader()
+    writer.writerows(rows)
+    return out.getvalue()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Bulk import of officers, sites and shifts from CSV/XLSX")
+    parser.add_argument("kind", choices=sorted(KINDS))
+    parser.add_argument("file", type=Path)
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR)
+    parser.add_argument("--on-duplicate", choices=ON_DUPLICATE, default=UPDATE,
+                        help="what to do with rows that match an existing record")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="validate only, write nothing")
+    parser.add_argument("--report", type=Path, help="write the per-row report as CSV")
+    args = parser.parse_args(argv)
+
+    data_dir = Path(args.data_dir)
+    # Stamp antes de leer: si otro proceso guarda en el medio, save_json_changes combina
+    stamp = read_stamp(codec.resolve(data_dir / KINDS[args.kind][1]))
+    data = {kind: load_records(data_dir, kind) for kind in ("officers", "sites")}
+    if args.kind == "shifts":
+        data["shifts"] = load_records(data_dir, "shifts")
+    indexes = Indexes(data["officers"], data["sites"], data.get("shifts", ()))
+    result = import_rows(args.file, args.kind, indexes, args.on_duplicate, args.chunk_size)
+    if not args.dry_run:
+        commit(data_dir, args.kind, result, stamp, data[args.kind])
+    print(", ".join(f"{status}: {n}" for status, n in result.counts.items()) + (" (dry run)" if args.dry_run else ""))
+    for row in result.errors[:20]:
+        print(f"  row {row['row']}: {row['message']}")
+    if len(result.errors) > 20:
+        print(f"  ... {len(result.errors) - 20} more")
+    if args.report:
+        args.report.write_text(report_csv(result.rows), encoding="utf-8", newline="")
+
+
+if __name__ == "__main__":
+    main()
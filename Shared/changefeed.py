@@ -0,0 +1,74 @@
+import threading
+import time
+from collections import deque
+from itertools import islice
+from typing import Deque, Dict, List, NamedTuple, Optional
+
+from Shared.filestore import diff_records
+
+DEFAULT_CAPACITY = 20000
+
+
+class FeedBatch(NamedTuple):
+    entries: List[Dict]
+    seq: int
+    # True: el seq pedido ya salio del buffer (o es de otro proceso): recargar todo
+    reset: bool
+
+
+class ChangeFeed:
+    """In-process log of data changes with consecutive sequence numbers (the last `capacity` are kept)."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        # {"seq", "ts", "dataset", "op", "key", "record"}; op = "upsert" / "delete" / "reset" (recargar todo)
+        self._entries: Deque[Dict] = deque(maxlen=capacity)
+        self._cond = threading.Condition()
+        self._seq = 0
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def append(self, dataset: str, op: str, key: Optional[str] = None, record: Optional[Dict] = None) -> int:
+        return self.extend(dataset, [(op, key, record)])
+
+    def extend(self, dataset: str, changes) -> int:
+        """Append (op, key, record) tuples under consecutive seqs; returns the last seq."""
+        now = time.time()
+        with self._cond:
+            for op, key, record in changes:
+                self._seq += 1
+                self._entries.append({
+                    "seq": self._seq, "ts": now, "dataset": dataset, "op": op, "key": key,
+                    # Copia: la UI edita los registros en el lugar
+                    "record": dict(record) if isinstance(record, dict) else record,
+                })
+            self._cond.notify_all()
+            return self._seq
+
+    def record_diff(self, dataset: str, before: Optional[List], after: List, key: str = "id") -> int:
+        """Append the record-level difference between two versions of a dataset."""
+        if before is None:
+            return self.append(dataset, "reset")
+        changes = [("upsert" if c["new"] is not None else "delete", c["key"], c["new"])
+                   for c in diff_records(before, after, key)]
+        return self.extend(dataset, changes) if changes else self._seq
+
+    def since(self, seq: int, datasets: Optional[List[str]] = None) -> FeedBatch:
+        with self._cond:
+            latest = self._seq
+            oldest = self._entries[0]["seq"] if self._entries else latest + 1
+            if seq > latest or seq < oldest - 1:
+                return FeedBatch([], latest, True)
+            # Los seq son consecutivos: se recorre desde el final solo lo nuevo
+            entries = list(islice(reversed(self._entries), latest - seq))
+            entries.reverse()
+        if datasets is not None:
+            entries = [e for e in entries if e["dataset"] in datasets]
+        return FeedBatch(entries, latest, False)
+
+    def wait(self, seq: int, timeout: float) -> int:
+        """Block until something newer than `seq` is appended (or timeout); returns the latest seq."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > seq, timeout)
+            return self._seq
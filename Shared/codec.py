@@ -0,0 +1,179 @@
+import argparse
+import gzip
+import json
+import lzma
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+PRETTY = "pretty"
+COMPACT = "compact"
+# Archivos chicos que se editan a mano: con sangria; archivos de maquina: compactos.
+# AMDAOPS_JSON_STYLES="schedules=pretty,time_logs=compact" cambia el de cada dataset.
+DATASET_STYLES = {
+    "phrases": PRETTY,
+    "registry": PRETTY,
+    "officers": PRETTY,
+    "schedules": COMPACT,
+    "time_logs": COMPACT,
+}
+# Archivos frios comprimidos: se eligen por extension y se leen en streaming
+COMPRESSORS = {".gz": gzip, ".xz": lzma}
+GZIP_LEVEL = 6
+
+
+def backend() -> str:
+    return "orjson" if orjson is not None else "json"
+
+
+def dataset_styles() -> Dict[str, str]:
+    styles = dict(DATASET_STYLES)
+    for item in os.environ.get("AMDAOPS_JSON_STYLES", "").split(","):
+        name, _, style = item.partition("=")
+        if style.strip() in (PRETTY, COMPACT):
+            styles[name.strip()] = style.strip()
+    return styles
+
+
+def indent_for(dataset: str) -> Optional[int]:
+    """json indent for a dataset's file: 2 (pretty) or None (compact); unknown datasets are pretty."""
+    return None if dataset_styles().get(dataset, PRETTY) == COMPACT else 2
+
+
+def dumps(obj: Any, indent: Optional[int] = None, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """UTF-8 JSON; compact unless `indent` is given, like json.dumps with ensure_ascii=False."""
+    if orjson is not None and indent in (None, 2):
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        try:
+            return orjson.dumps(obj, default=default, option=option)
+        except TypeError:
+            # Enteros de mas de 64 bits, anidado muy profundo...: json los resuelve (o da el error de siempre)
+            pass
+    separators = None if indent else (",", ":")
+    return json.dumps(obj, indent=indent, separators=separators, ensure_ascii=False, default=default).encode("utf-8")
+
+
+def loads(data) -> Any:
+    """Parse JSON text (str or bytes)."""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except ValueError:
+            # NaN, enteros enormes o un BOM: json los acepta (o da el error de siempre)
+            pass
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data).decode("utf-8-sig")
+    return json.loads(data)
+
+
+def is_compressed(path: Path) -> bool:
+    return Path(path).suffix in COMPRESSORS
+
+
+def resolve(path: Path) -> Path:
+    """`path`, or its compressed copy (`<path>.gz` / `<path>.xz`) when only that one exists."""
+    path = Path(path)
+    if path.exists():
+        return path
+    for suffix in COMPRESSORS:
+        packed = path.with_name(path.name + suffix)
+        if packed.exists():
+            return packed
+    return path
+
+
+def open_file(path: Path, mode: str = "rb"):
+    """open() for plain files, gzip/lzma.open() for .gz/.xz ones (decompressed while reading)."""
+    module = COMPRESSORS.get(Path(path).suffix)
+    encoding = "utf-8" if "t" in mode else None
+    if module is None:
+        return open(path, mode, encoding=encoding)
+    if module is gzip and "r" not in mode:
+        return gzip.open(path, mode, compresslevel=GZIP_LEVEL, encoding=encoding)
+    return module.open(path, mode, encoding=encoding)
+
+
+def data_size(path: Path) -> int:
+    """Uncompressed size of a file (a stat for plain files, the gzip trailer for .gz)."""
+    path = Path(path)
+    suffix = path.suffix
+    if suffix == ".gz":
+        # ISIZE: tamano original modulo 2**32, en los ultimos 4 bytes (un solo miembro, como los escribe pack)
+        with open(path, "rb") as f:
+            f.seek(-4, os.SEEK_END)
+            return int.from_bytes(f.read(4), "little")
+    if suffix in COMPRESSORS:
+        with open_file(path, "rb") as f:
+            return f.seek(0, os.SEEK_END)
+    return path.stat().st_size
+
+
+def pack(path: Path, data: bytes) -> bytes:
+    """The bytes to store in `path`: compressed when its extension asks for it."""
+    suffix = Path(path).suffix
+    if suffix == ".gz":
+        # mtime=0: el mismo contenido da el mismo archivo
+        return gzip.compress(data, GZIP_LEVEL, mtime=0)
+    if suffix == ".xz":
+        return lzma.compress(data)
+    return data
+
+
+def load(path: Path) -> Any:
+    with open_file(path, "rb") as f:
+        return loads(f.read())
+
+
+def dump(path: Path, obj: Any, indent: Optional[int] = 2):
+    with open(path, "wb") as f:
+        f.write(pack(path, dumps(obj, indent)))
+
+
+def compress_file(path: Path, suffix: str = ".gz") -> Path:
+    """Write `<path><suffix>` next to `path` and remove the plain file."""
+    from Shared.filestore import atomic_write_bytes
+
+    path = Path(path)
+    packed = path.with_name(path.name + suffix)
+    atomic_write_bytes(packed, pack(packed, path.read_bytes()))
+    path.unlink()
+    return packed
+
+
+def decompress_file(path: Path) -> Path:
+    from Shared.filestore import atomic_write_bytes
+
+    path = Path(path)
+    plain = path.with_suffix("")
+    with open_file(path, "rb") as f:
+        atomic_write_bytes(plain, f.read())
+    path.unlink()
+    return plain
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Compress cold JSON/JSONL files (read transparently by the app)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_compress = sub.add_parser("compress", help="FILE -> FILE.gz (or .xz)")
+    p_compress.add_argument("files", nargs="+", type=Path)
+    p_compress.add_argument("--xz", action="store_true", help="lzma: smaller, slower to read")
+    p_decompress = sub.add_parser("decompress", help="FILE.gz / FILE.xz -> FILE")
+    p_decompress.add_argument("files", nargs="+", type=Path)
+    args = parser.parse_args(argv)
+
+    for path in args.files:
+        if args.command == "compress":
+            before = path.stat().st_size
+            packed = compress_file(path, ".xz" if args.xz else ".gz")
+            print(f"{path.name}: {before:,} -> {packed.stat().st_size:,} bytes ({packed.name})")
+        else:
+            print(f"{path.name} -> {decompress_file(path).name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+from array import array
+from collections.abc import Sequence
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from Shared.timeutil import EPOCH, epoch_to_iso, parse_epoch
+
+# Columnas por dataset, en el orden de los archivos:
+# "cat" = codigo int32 en una tabla de valores unicos, "ts" = epoch int64, "obj" = el valor tal cual
+SCHEMAS = {
+    "time_logs": {"id": "obj", "officer_id": "cat", "site_prefix": "cat", "event": "cat", "ts": "ts",
+                  "device": "cat", "received_at": "ts"},
+    "schedules": {"id": "obj", "officer_id": "cat", "site_prefix": "cat", "date": "cat", "start_time": "cat",
+                  "end_time": "cat", "shift_type": "cat", "priority": "cat", "notes": "cat", "status": "cat",
+                  "created_at": "ts"},
+}
+# Columna de tiempo usada por RecordTable.select
+TIME_FIELDS = {"time_logs": "ts"}
+
+_ABSENT_CODE = -1
+_ABSENT_TS = -(2 ** 63)
+_MISSING = object()
+
+
+# "MM:SS" <-> segundos dentro de la hora, y caches por hora ("YYYY-MM-DDTHH:" <-> epoch de la hora):
+# un punch por segundo repite la misma hora miles de veces
+_CLOCK = {f"{m:02d}:{s:02d}": m * 60 + s for m in range(60) for s in range(60)}
+_CLOCK_NAME = list(_CLOCK)
+_HOUR_EPOCH: Dict[str, int] = {}
+_HOUR_NAME: Dict[int, str] = {}
+
+
+def _hour_epoch(head: str) -> Optional[int]:
+    epoch = _HOUR_EPOCH.get(head)
+    if epoch is not None:
+        return epoch
+    hour = head[11:13]
+    if head[10] != "T" or head[13] != ":" or not (hour.isascii() and hour.isdigit()) or int(hour) > 23:
+        return None
+    try:
+        day = date.fromisoformat(head[:10])
+    except ValueError:
+        return None
+    if day.isoformat() != head[:10]:
+        return None
+    epoch = _HOUR_EPOCH[head] = (day - EPOCH.date()).days * 86400 + int(hour) * 3600
+    return epoch
+
+
+def _canonical_epoch(value) -> Optional[int]:
+    # Solo "YYYY-MM-DDTHH:MM:SS" vuelve identico desde el epoch; lo demas se guarda tal cual
+    if type(value) is not str or len(value) != 19:
+        return None
+    seconds = _CLOCK.get(value[14:])
+    if seconds is None:
+        return None
+    hour = _hour_epoch(value[:14])
+    return None if hour is None else hour + seconds
+
+
+def _iso(ts: int) -> str:
+    """Same as timeutil.epoch_to_iso, with the hour part cached."""
+    hour, seconds = divmod(ts, 3600)
+    name = _HOUR_NAME.get(hour)
+    if name is None:
+        name = _HOUR_NAME[hour] = epoch_to_iso(hour * 3600)[:14]
+    return name + _CLOCK_NAME[seconds]
+
+
+class Interner:
+    """Distinct values of a categorical column; rows store their int code."""
+
+    __slots__ = ("values", "codes")
+
+    def __init__(self):
+        self.values: List = []
+        self.codes: Dict = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def code(self, value) -> int:
+        # Con el tipo en la llave: 1, 1.0 y True no comparten codigo
+        key = value if value.__class__ is str else (value.__class__, value)
+        code = self.codes.get(key)
+        if code is None:
+            code = self.codes[key] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def find(self, value) -> Optional[int]:
+        return self.codes.get(value if value.__class__ is str else (value.__class__, value))
+
+
+class RecordTable(Sequence):
+    """Append-only list of records stored column by column; rows come back as fresh, equal dicts."""
+
+    def __init__(self, schema: Dict[str, str], records: Iterable[Dict] = (), time_field: Optional[str] = None):
+        # "cat" = codigo int32 por fila, "ts" = epoch int64: un punch ocupa ~1/8 de su dict
+        self.schema = dict(schema)
+        self.time_field = time_field
+        self._columns: Dict[str, object] = {}
+        self._interners: Dict[str, Interner] = {}
+        for name, kind in self.schema.items():
+            if kind == "cat":
+                self._columns[name] = array("i")
+                self._interners[name] = Interner()
+            elif kind == "ts":
+                self._columns[name] = array("q")
+            else:
+                self._columns[name] = []
+        # (campo, tipo, columna, interner) en el orden del schema: evita buscar por nombre en cada fila
+        self._layout = [(name, kind, self._columns[name], self._interners.get(name))
+                        for name, kind in self.schema.items()]
+        # fila -> campos que no entran en las columnas (o que no vienen en el registro)
+        self._extra: Dict[int, Dict] = {}
+        self._size = 0
+        self.extend(records)
+
+    def __len__(self):
+        return self._size
+
+    def append(self, record: Dict):
+        extra = None
+        present = 0
+        for name, kind, column, interner in self._layout:
+            value = record.get(name, _MISSING)
+            if value is _MISSING:
+                column.append(_ABSENT_CODE if kind == "cat" else _ABSENT_TS if kind == "ts" else None)
+                extra = extra or {}
+                extra[name] = _MISSING
+                continue
+            present += 1
+            if kind == "cat":
+                try:
+                    column.append(interner.code(value))
+                    continue
+                except TypeError:
+                    # lista / dict: no se puede internar
+                    column.append(_ABSENT_CODE)
+            elif kind == "ts":
+                ts = _canonical_epoch(value)
+                if ts is not None:
+                    column.append(ts)
+                    continue
+                column.append(_ABSENT_TS)
+            else:
+                column.append(value)
+                continue
+            extra = extra or {}
+            extra[name] = value
+        if present != len(record):
+            extra = extra or {}
+            extra.update((k, v) for k, v in record.items() if k not in self.schema)
+        if extra:
+            self._extra[self._size] = extra
+        self._size += 1
+
+    def extend(self, records: Iterable[Dict]):
+        for record in records:
+            self.append(record)
+
+    def _row(self, i: int) -> Dict:
+        extra = self._extra.get(i) if self._extra else None
+        out = {}
+        for name, kind, column, interner in self._layout:
+            if extra is not None and name in extra:
+                value = extra[name]
+                if value is not _MISSING:
+                    out[name] = value
+                continue
+            value = column[i]
+            if kind == "cat":
+                out[name] = interner.values[value]
+            elif kind == "ts":
+                out[name] = _iso(value)
+            else:
+                out[name] = value
+        if extra is not None:
+            out.update((k, v) for k, v in extra.items() if k not in self.schema)
+        return out
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(self._size))]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("record index out of range")
+        return self._row(index)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(self._size):
+            yield self._row(i)
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"RecordTable({self._size} records, fields={list(self.schema)})"
+
+    def select(self, lo: int, hi: int, **equals) -> List[Dict]:
+        """Rows with time_field in [lo, hi) and the given categorical values, without decoding the rest."""
+        times = self._columns[self.time_field]
+        wanted = []
+        for name, value in equals.items():
+            code = self._interners[name].find(value)
+            if code is None:
+                return []
+            wanted.append((self._columns[name], code))
+        rows = [i for i, ts in enumerate(times) if lo <= ts < hi
+                and all(column[i] == code for column, code in wanted)]
+        # Los timestamps no canonicos quedan fuera de la columna: se comparan ya decodificados
+        odd = {}
+        for i, extra in self._extra.items():
+            if self.time_field in extra:
+                record = self._row(i)
+                ts = parse_epoch(record.get(self.time_field))
+                if ts is not None and lo <= ts < hi and all(record.get(k) == v for k, v in equals.items()):
+                    odd[i] = record
+        if not odd:
+            return [self._row(i) for i in rows]
+        return [odd[i] if i in odd else self._row(i) for i in sorted(rows + list(odd))]
+
+
+def compact(dataset: str, records: Iterable[Dict] = ()) -> RecordTable:
+    """RecordTable with the column layout of a dataset (see SCHEMAS)."""
+    return RecordTable(SCHEMAS[dataset], records, TIME_FIELDS.get(dataset))
@@ -0,0 +1,321 @@
+import argparse
+import hashlib
+import json
+import math
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from Shared.timeutil import epoch_to_iso, parse_epoch, shift_bounds
+
+# Datos de relleno: combinados por indice dan registros realistas sin guardar nada en memoria
+CHAINS = [("WD", "Winn Dixie", "ShoppingCenter"), ("PX", "Publix", "ShoppingCenter"),
+          ("CVS", "CVS Pharmacy", "Retail"), ("WG", "Walgreens", "Retail"),
+          ("UC", "University Center", "Office"), ("BP", "Bayside Plaza", "Office"),
+          ("MM", "Mall of the Americas", "ShoppingCenter"), ("TP", "Tech Park", "Warehouse")]
+STREETS = ["S Dixie Hwy", "NW 7th St", "Biscayne Blvd", "Coral Way", "SW 8th St", "Flagler St",
+           "Collins Ave", "Bird Rd", "Kendall Dr", "Sunset Dr", "Ponce de Leon Blvd", "NE 2nd Ave"]
+CITIES = [("Miami", "33130"), ("Cutler Bay", "33157"), ("Coral Gables", "33146"), ("Hialeah", "33010"),
+          ("Doral", "33172"), ("Homestead", "33030"), ("Kendall", "33156"), ("Miami Beach", "33139")]
+FIRST_NAMES = ["Alvaro", "Maria", "Jose", "Ana", "Luis", "Carmen", "Carlos", "Laura", "Miguel", "Sofia",
+               "David", "Elena", "Jorge", "Isabel", "Pedro", "Lucia", "James", "Linda", "Robert", "Karen"]
+LAST_NAMES = ["Castellanos", "Garcia", "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez", "Perez",
+              "Sanchez", "Ramirez", "Torres", "Flores", "Rivera", "Gomez", "Diaz", "Smith", "Johnson"]
+SHIFTS = [("Day", "07:00", "15:00"), ("Evening", "15:00", "23:00"), ("Night", "23:00", "07:00"),
+          ("Day", "09:00", "17:00"), ("Evening", "17:00", "23:45")]
+PHRASE_TEMPLATES = {
+    "Patrol": ("{area} patrol completed; no suspicious activity observed.",
+               "Patrullaje de {area_es} completado; no se observo actividad sospechosa."),
+    "Access": ("{area} access door found unlocked; secured and reported.",
+               "Puerta de acceso de {area_es} encontrada abierta; asegurada y reportada."),
+    "Parking": ("Vehicle parked in {area} fire lane; owner notified.",
+                "Vehiculo estacionado en carril de bomberos de {area_es}; se notifico al dueno."),
+    "Safety": ("Wet floor near {area}; caution sign placed.",
+               "Piso mojado cerca de {area_es}; se coloco senal de precaucion."),
+    "Incident": ("Disturbance at {area}; police called.",
+                 "Disturbio en {area_es}; se llamo a la policia."),
+    "Loss Prevention": ("Suspected shoplifting near {area}; manager informed.",
+                        "Sospecha de hurto cerca de {area_es}; se informo al gerente."),
+}
+AREAS = [("Main entrance", "la entrada principal"), ("Loading dock", "el muelle de carga"),
+         ("Rear parking", "el estacionamiento trasero"), ("Food court", "el area de comidas"),
+         ("North wing", "el ala norte"), ("Exterior perimeter", "el perimetro exterior")]
+
+FILES = {
+    "registry": "site_registry.json",
+    "officers": "security_officers.json",
+    "schedules": "work_schedules.json",
+    "time_logs": "time_logs.json",
+    # Mismos nombres que shoppingCenter/data: la carpeta generada sirve de reemplazo directo
+    "phrases": "181_line__bank_Shoping_Center_en_es.json",
+}
+
+
+class JsonArrayWriter:
+    """Write a JSON array one record per line, without holding the records."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._f = None
+        self.count = 0
+
+    def __enter__(self) -> "JsonArrayWriter":
+        self._f = open(self.path, "w", encoding="utf-8", buffering=1 << 20)
+        self._f.write("[")
+        return self
+
+    def write(self, record: Dict):
+        self._f.write(",\n" if self.count else "\n")
+        self._f.write(json.dumps(record, ensure_ascii=False))
+        self.count += 1
+
+    def write_all(self, records: Iterable[Dict]) -> int:
+        for r in records:
+            self.write(r)
+        return self.count
+
+    def __exit__(self, *exc):
+        self._f.write("\n]\n" if self.count else "]\n")
+        self._f.close()
+
+
+class JsonlWriter(JsonArrayWriter):
+    """Same interface as JsonArrayWriter, JSONL output (the punch journal format)."""
+
+    def __enter__(self) -> "JsonlWriter":
+        self._f = open(self.path, "w", encoding="utf-8", buffering=1 << 20)
+        return self
+
+    def write(self, record: Dict):
+        self._f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.count += 1
+
+    def __exit__(self, *exc):
+        self._f.close()
+
+
+class DatasetGenerator:
+    """Deterministic synthetic data: the same seed and sizes give the same files.
+
+    Sites and officers are derived from their index, so every file can be
+    written as a stream. Only the site prefixes and officer ids are kept in
+    memory (O(sites + officers)); shifts and punches are never accumulated.
+    """
+
+    def __init__(self, sites: int = 20, officers: int = 100, seed: int = 7, start: Optional[date] = None):
+        self.sites = max(1, sites)
+        self.officers = max(1, officers)
+        self.seed = seed
+        self.start = start or date(2025, 9, 1)
+        self.namespace = uuid.uuid5(uuid.NAMESPACE_DNS, f"amdaops-datagen-{seed}")
+        self.site_prefixes = [self._prefix(i) for i in range(self.sites)]
+        self.officer_ids = [str(uuid.uuid5(self.namespace, f"officer-{i}")) for i in range(self.officers)]
+
+    def _rng(self, kind: str, i: int) -> random.Random:
+        return random.Random(f"{self.seed}:{kind}:{i}")
+
+    @staticmethod
+    def _prefix(i: int) -> str:
+        abbr = CHAINS[i % len(CHAINS)][0]
+        return f"{abbr} {100 + i // len(CHAINS)}"
+
+    def home_site(self, officer_index: int) -> int:
+        return officer_index % self.sites
+
+    # ===== Records =====
+    def site(self, i: int) -> Dict:
+        rng = self._rng("site", i)
+        _, chain, kind = CHAINS[i % len(CHAINS)]
+        prefix = self.site_prefixes[i]
+        city, zip_code = rng.choice(CITIES)
+        address = f"{rng.randint(100, 29999)} {rng.choice(STREETS)}"
+        query = "+".join(f"{address}, {city}, FL, {zip_code}, USA".split(" "))
+        return {
+            "prefix": prefix,
+            "site": kind,
+            "name": f"{chain} {prefix.split(' ')[-1]}",
+            "status": "Active" if rng.random() < 0.95 else "Inactive",
+            "address": address,
+            "city": city,
+            "state": "FL",
+            "zip": zip_code,
+            "country": "USA",
+            "contact_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "contact_phone": f"+1-305-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}",
+            "maps_link": f"https://www.google.com/maps/search/?api=1&query={query}",
+            "notes": "24/7 security required" if rng.random() < 0.3 else "",
+            "special_instructions": "",
+            "required_officers": rng.randint(1, 3),
+            "patrol_frequency": rng.choice(["30 min", "1 hour", "2 hours"]),
+            "has_cctv": rng.random() < 0.6,
+            "requires_vehicle": rng.random() < 0.2,
+            "last_updated": datetime.combine(self.start, datetime.min.time()).isoformat(),
+        }
+
+    def officer(self, i: int) -> Dict:
+        rng = self._rng("officer", i)
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        created = datetime.combine(self.start, datetime.min.time()) - timedelta(days=rng.randint(1, 900))
+        return {
+            "id": self.officer_ids[i],
+            "name": name,
+            "email": f"{name.lower().replace(' ', '.')}.{i}@example.com",
+            "phone": f"+1 786 {rng.randint(200, 999)} {i % 10000:04d}",
+            "status": "Active" if rng.random() < 0.9 else "Inactive",
+            "photo_path": "",
+            "created_at": created.isoformat(),
+            "updated_at": created.isoformat(),
+        }
+
+    def phrase(self, i: int) -> Dict:
+        rng = self._rng("phrase", i)
+        cat = rng.choice(sorted(PHRASE_TEMPLATES))
+        en, es = PHRASE_TEMPLATES[cat]
+        area, area_es = rng.choice(AREAS)
+        site = self.site(rng.randrange(self.sites))
+        return {
+            "site": site["site"],
+            "name": site["name"],
+            "address": site["address"],
+            "cat": cat,
+            "en": en.format(area=area),
+            "es": es.format(area_es=area_es),
+            "hotwords": [w.lower() for w in area.split()] + [cat.lower()],
+        }
+
+    def iter_sites(self) -> Iterator[Dict]:
+        return (self.site(i) for i in range(self.sites))
+
+    def iter_officers(self) -> Iterator[Dict]:
+        return (self.officer(i) for i in range(self.officers))
+
+    def iter_phrases(self, count: int) -> Iterator[Dict]:
+        return (self.phrase(i) for i in range(count))
+
+    def iter_days(self, days: int, work_ratio: float = 5 / 7, now: Optional[datetime] = None) -> Iterator[tuple]:
+        """Yield (shift, punches) day by day; punches only for shifts already started by `now`."""
+        rng = random.Random(f"{self.seed}:days")
+        now_ts = None if now is None else int((now - datetime(1970, 1, 1)).total_seconds())
+        shift_no = 0
+        for d in range(days):
+            day = (self.start + timedelta(days=d)).isoformat()
+            for o in range(self.officers):
+                if rng.random() >= work_ratio:
+                    continue
+                officer_id = self.officer_ids[o]
+                # 10% de los turnos cubren otro sitio
+                site_index = self.home_site(o) if rng.random() >= 0.1 else rng.randrange(self.sites)
+                shift_type, start_time, end_time = SHIFTS[o % len(SHIFTS)]
+                shift = {
+                    "id": f"{shift_no:08x}",
+                    "officer_id": officer_id,
+                    "site_prefix": self.site_prefixes[site_index],
+                    "date": day,
+                    "start_time": start_time,
+                    "end_time": end_time,
+                    "shift_type": shift_type,
+                    "priority": "Normal" if rng.random() < 0.9 else "High",
+                    "notes": "",
+                    "status": "Scheduled",
+                    "created_at": f"{self.start.isoformat()}T00:00:00",
+                }
+                shift_no += 1
+                start, end = shift_bounds(shift)
+                if now_ts is not None and start > now_ts:
+                    yield shift, []
+                    continue
+                punches = self._punches(rng, shift, start, end)
+                if now_ts is not None and end > now_ts:
+                    # Turno en curso: todavia no hay clock-out
+                    yield shift, [p for p in punches if parse_epoch(p["ts"]) <= now_ts]
+                    continue
+                shift["status"] = "Completed"
+                yield shift, punches
+
+    def _punches(self, rng: random.Random, shift: Dict, start: int, end: int) -> List[Dict]:
+        roll = rng.random()
+        if roll < 0.03:
+            return []  # no-show
+        late = rng.randint(10, 45) * 60 if roll < 0.13 else rng.randint(-10, 4) * 60
+        punches = [self._punch(shift, "in", start + late + rng.randint(0, 59))]
+        if roll > 0.99:
+            return punches  # sin clock-out
+        early = rng.randint(15, 60) * 60 if roll > 0.95 else rng.randint(-10, 3) * 60
+        punches.append(self._punch(shift, "out", end - early + rng.randint(0, 59)))
+        return punches
+
+    @staticmethod
+    def _punch(shift: Dict, event: str, ts: int) -> Dict:
+        officer_id, site = shift["officer_id"], shift["site_prefix"]
+        iso = epoch_to_iso(ts)
+        # Mismo id que deriva normalize_punch para un punch sin llave de idempotencia
+        key = hashlib.sha1(f"{officer_id}|{site}|{event}|{ts}".encode("utf-8")).hexdigest()[:16]
+        return {"id": key, "officer_id": officer_id, "site_prefix": site, "event": event,
+                "ts": iso, "device": f"gen-{site}", "received_at": iso}
+
+
+def days_for_punches(punches: int, officers: int, work_ratio: float = 5 / 7) -> int:
+    """Days of schedule needed for roughly `punches` clock events (two per shift)."""
+    return max(1, math.ceil(punches / (2 * officers * work_ratio * 0.96)))
+
+
+def generate(out_dir: Path, sites: int, officers: int, days: Optional[int] = None, punches: Optional[int] = None,
+             phrases: int = 200, seed: int = 7, start: Optional[date] = None, jsonl: bool = False,
+             now: Optional[datetime] = None) -> Dict:
+    """Write the five datasets into `out_dir` and return the record counts."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    gen = DatasetGenerator(sites, officers, seed, start)
+    if days is None:
+        days = days_for_punches(punches, gen.officers) if punches else 7
+    t0 = time.perf_counter()
+    counts = {}
+
+    with JsonArrayWriter(out_dir / FILES["registry"]) as w:
+        counts["sites"] = w.write_all(gen.iter_sites())
+    with JsonArrayWriter(out_dir / FILES["officers"]) as w:
+        counts["officers"] = w.write_all(gen.iter_officers())
+    with JsonArrayWriter(out_dir / FILES["phrases"]) as w:
+        counts["phrases"] = w.write_all(gen.iter_phrases(phrases))
+
+    logs_name = "time_logs.jsonl" if jsonl else FILES["time_logs"]
+    log_writer = JsonlWriter if jsonl else JsonArrayWriter
+    with JsonArrayWriter(out_dir / FILES["schedules"]) as sw, log_writer(out_dir / logs_name) as pw:
+        for shift, day_punches in gen.iter_days(days, now=now):
+            if punches and pw.count >= punches:
+                break
+            sw.write(shift)
+            for p in day_punches:
+                pw.write(p)
+        counts["schedules"] = sw.count
+        counts["punches"] = pw.count
+    counts["days"] = days
+    counts["seconds"] = round(time.perf_counter() - t0, 2)
+    return counts
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Generate synthetic AmdaOps datasets for load testing")
+    parser.add_argument("--out", type=Path, required=True, help="output folder (files are overwritten)")
+    parser.add_argument("--sites", type=int, default=20)
+    parser.add_argument("--officers", type=int, default=100)
+    parser.add_argument("--days", type=int, help="days of schedule (default: enough for --punches, else 7)")
+    parser.add_argument("--punches", type=int, help="stop once this many clock events are written")
+    parser.add_argument("--phrases", type=int, default=200)
+    parser.add_argument("--start", type=date.fromisoformat, default=date(2025, 9, 1), help="first day YYYY-MM-DD")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--now", type=datetime.fromisoformat,
+                        help="shifts starting after this stay Scheduled and get no punches")
+    parser.add_argument("--jsonl", action="store_true", help="write punches as the time_logs.jsonl journal")
+    args = parser.parse_args(argv)
+
+    counts = generate(args.out, args.sites, args.officers, args.days, args.punches, args.phrases,
+                      args.seed, args.start, args.jsonl, args.now)
+    print(json.dumps(counts))
+
+
+if __name__ == "__main__":
+    main()
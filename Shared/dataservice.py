@@ -0,0 +1,448 @@
+import argparse
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from itertools import chain
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from Shared import codec
+from Shared.compact import RecordTable, compact
+from Shared.filestore import WriteConflict, iter_json_records, read_json_records, read_stamp, save_json_changes
+from Shared.partitions import PARTITION_DIRS, open_partitions
+from Shared.punch_ingest import DEFAULT_DATA_DIR, JOURNAL_NAME, iter_jsonl
+from Shared.schedule_index import ScheduleIndex
+from Shared.warmup import DataWarmup, files_signature
+
+DATASET_FILES = {
+    "phrases": "181_line__bank_Shoping_Center_en_es.json",
+    "registry": "site_registry.json",
+    "officers": "security_officers.json",
+    "schedules": "work_schedules.json",
+    "time_logs": "time_logs.json",
+}
+# Llave de cada registro para el merge de escrituras concurrentes
+RECORD_KEYS = {"officers": "id", "schedules": "id", "registry": "prefix", "time_logs": "id"}
+INDEX_METHODS = ("site_range", "officer_range", "next_for_site", "next_for_officer", "sites", "officers")
+SOCKET_NAME = "dataservice.sock"
+DEFAULT_TCP_PORT = 8766
+
+_HEADER = struct.Struct(">I")
+_MAX_FRAME = 1 << 30
+
+
+class ServiceError(Exception):
+    pass
+
+
+# ===== Protocol: 4-byte big-endian length + compact JSON =====
+def send_frame(sock: socket.socket, payload: bytes):
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, n: int) -> Optional[bytes]:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(min(n - len(buf), 1 << 20))
+        if not chunk:
+            return None
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def recv_frame(sock: socket.socket) -> Optional[bytes]:
+    header = _recv_exact(sock, _HEADER.size)
+    if header is None:
+        return None
+    (size,) = _HEADER.unpack(header)
+    if size > _MAX_FRAME:
+        raise ServiceError(f"Frame too large: {size} bytes")
+    return _recv_exact(sock, size)
+
+
+def _plain(obj: Any) -> Any:
+    if isinstance(obj, RecordTable):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _dumps(obj: Any) -> bytes:
+    return codec.dumps(obj, default=_plain)
+
+
+def as_stamp(value: Any) -> Optional[Tuple]:
+    """Stamps travel as JSON lists; compare them as read_stamp tuples."""
+    if value is None:
+        return None
+    version, signature = value
+    return int(version), tuple(signature) if signature is not None else None
+
+
+def default_address(data_dir: Path = DEFAULT_DATA_DIR) -> str:
+    if hasattr(socket, "AF_UNIX"):
+        return f"unix:{Path(data_dir) / SOCKET_NAME}"
+    return f"tcp:127.0.0.1:{DEFAULT_TCP_PORT}"
+
+
+def parse_address(address: str) -> Tuple[int, Any]:
+    """'unix:/path/app.sock' or 'tcp:host:port' -> (family, sockaddr)."""
+    kind, _, rest = address.partition(":")
+    if kind == "unix":
+        return socket.AF_UNIX, rest
+    if kind == "tcp":
+        host, _, port = rest.rpartition(":")
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    raise ValueError(f"Unknown data service address: {address!r}")
+
+
+class _Raw(bytes):
+    """A result that is already JSON-encoded (cached dataset payloads)."""
+
+
+# ===== Server =====
+class DataService:
+    """Datasets and schedule index shared by every Streamlit worker (reads from memory, serialized writes)."""
+
+    def __init__(self, data_dir: Path = DEFAULT_DATA_DIR):
+        self.data_dir = Path(data_dir)
+        # Un snapshot frio puede estar comprimido (.json.gz / .json.xz)
+        self.paths = {name: codec.resolve(self.data_dir / fname) for name, fname in DATASET_FILES.items()}
+        # Datasets migrados a particiones mensuales (Shared.partitions)
+        self.partitions = {name: open_partitions(self.data_dir, name) for name in PARTITION_DIRS}
+        self.partitions = {name: store for name, store in self.partitions.items() if store is not None}
+        self.store = DataWarmup(max_workers=len(DATASET_FILES))
+        for name in self.paths:
+            self.store.register(name, lambda name=name: self._sources(name), self._loader(name))
+        self._encoded: Dict[str, Tuple[Any, bytes]] = {}
+        self._write_lock = threading.Lock()
+        self._index_lock = threading.Lock()
+        self._index: Optional[ScheduleIndex] = None
+        self._index_signature = None
+        self.started_at = time.time()
+        self.requests = 0
+        self.ops = 0
+
+    def _sources(self, name: str) -> List[Path]:
+        if name in self.partitions:
+            return self.partitions[name].sources()
+        if name == "time_logs":
+            return [self.paths[name], self.data_dir / JOURNAL_NAME]
+        return [self.paths[name]]
+
+    def _stamp_path(self, name: str) -> Path:
+        return self.partitions[name].root if name in self.partitions else self.paths[name]
+
+    def _loader(self, name: str):
+        def _load():
+            store = self.partitions.get(name)
+            if name == "time_logs":
+                # Los punches no se editan en memoria: se guardan por columnas, leidos registro a registro
+                if store is not None:
+                    return compact(name, (p for month in store.months() for p in store.read(month)))
+                return compact(name, chain(iter_json_records(self.paths[name]),
+                                           iter_jsonl(self.data_dir / JOURNAL_NAME)))
+            if store is not None:
+                return list(store.read_all())
+            return read_json_records(self.paths[name])
+        return _load
+
+    def start(self) -> "DataService":
+        self.store.start()
+        return self
+
+    def _signature(self, name: str):
+        return files_signature(self._sources(name)), read_stamp(self._stamp_path(name))
+
+    # ===== Operations =====
+    def op_ping(self) -> str:
+        return "pong"
+
+    def op_get(self, dataset: str) -> _Raw:
+        # Stamp antes que los datos (ver DataManager._fetch)
+        signature = self._signature(dataset)
+        cached = self._encoded.get(dataset)
+        if cached is not None and cached[0] == signature:
+            return _Raw(cached[1])
+        records = self.store.get(dataset)
+        payload = b'{"records":' + _dumps(records) + b',"stamp":' + _dumps(signature[1]) + b"}"
+        self._encoded[dataset] = (signature, payload)
+        return _Raw(payload)
+
+    def op_stamp(self, dataset: str):
+        return read_stamp(self._stamp_path(dataset))
+
+    def op_save(self, dataset: str, changes: List[Dict], stamp=None, merge: bool = True) -> Dict:
+        key = RECORD_KEYS[dataset]
+        expected = as_stamp(stamp)
+        with self._write_lock:
+            if dataset in self.partitions:
+                return self._save_partitions(dataset, changes)
+            # time_logs en memoria incluye el journal: el merge se hace contra el archivo
+            current = None if dataset == "time_logs" else self.store.get(dataset)
+            result = save_json_changes(self.paths[dataset], changes, expected, key,
+                                       current_records=current, merge=merge, indent=codec.indent_for(dataset))
+            if current is not None:
+                self.store.put(dataset, result.records)
+            if dataset == "schedules":
+                with self._index_lock:
+                    if self._index is not None:
+                        self._index.sync(result.records)
+                        self._index_signature = self._signature("schedules")
+        out = {"stamp": result.stamp, "merged": result.merged}
+        if result.merged:
+            # El cliente no tiene los cambios de otros: se le devuelve la lista final (con el journal)
+            out["records"] = self.store.get(dataset) if dataset == "time_logs" else result.records
+        return out
+
+    def _save_partitions(self, dataset: str, changes: List[Dict]) -> Dict:
+        # Se reescriben solo los meses tocados; los punches solo se agregan
+        store = self.partitions[dataset]
+        store.save_changes(changes, RECORD_KEYS[dataset], append_only=dataset == "time_logs")
+        out = {"stamp": read_stamp(store.root), "merged": dataset != "time_logs"}
+        if out["merged"]:
+            out["records"] = store.read_all()
+            if dataset == "schedules":
+                with self._index_lock:
+                    if self._index is not None:
+                        self._index.sync(out["records"])
+                        self._index_signature = self._signature("schedules")
+        return out
+
+    def op_index(self, method: str, args: List = ()):
+        if method not in INDEX_METHODS:
+            raise ValueError(f"Unknown index method: {method}")
+        with self._index_lock:
+            signature = self._signature("schedules")
+            if self._index is None or self._index_signature != signature:
+                self._index = ScheduleIndex(self.store.get("schedules"))
+                self._index_signature = signature
+            return getattr(self._index, method)(*args)
+
+    def op_stats(self) -> Dict:
+        return {
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "requests": self.requests,
+            "ops": self.ops,
+            "load_ms": self.store.timings(),
+        }
+
+    def dispatch(self, frame: bytes) -> bytes:
+        """One request frame {"ops": [...]} -> one response frame {"results": [...]}."""
+        self.requests += 1
+        try:
+            ops = codec.loads(frame)["ops"]
+        except (ValueError, KeyError, TypeError) as e:
+            return _dumps({"error": f"Bad request: {e}", "kind": "bad_request"})
+        parts = []
+        for op in ops:
+            self.ops += 1
+            try:
+                handler = getattr(self, "op_" + str(op.get("op")), None)
+                if handler is None:
+                    raise ValueError(f"Unknown op: {op.get('op')!r}")
+                args = {k: v for k, v in op.items() if k != "op"}
+                value = handler(**args)
+                parts.append(b'{"ok":' + (value if isinstance(value, _Raw) else _dumps(value)) + b"}")
+            except WriteConflict as e:
+                parts.append(_dumps({"error": str(e), "kind": "conflict", "keys": e.keys}))
+            except (KeyError, ValueError, TypeError) as e:
+                parts.append(_dumps({"error": repr(e), "kind": "bad_request"}))
+            except Exception as e:
+                parts.append(_dumps({"error": repr(e), "kind": "server_error"}))
+        return b'{"results":[' + b",".join(parts) + b"]}"
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        # Conexion persistente: el cliente la reutiliza desde su pool
+        while True:
+            try:
+                frame = recv_frame(self.request)
+            except (OSError, ServiceError):
+                return
+            if frame is None:
+                return
+            send_frame(self.request, self.server.service.dispatch(frame))
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+
+def make_server(service: DataService, address: str):
+    family, sockaddr = parse_address(address)
+    if family == getattr(socket, "AF_UNIX", None):
+        path = Path(sockaddr)
+        if path.exists():
+            path.unlink()  # socket de una ejecucion anterior
+        server = _UnixServer(str(path), _Handler)
+    else:
+        server = _TCPServer(sockaddr, _Handler)
+    server.service = service
+    return server
+
+
+def serve(data_dir: Path = DEFAULT_DATA_DIR, address: Optional[str] = None):
+    address = address or default_address(data_dir)
+    service = DataService(data_dir).start()
+    server = make_server(service, address)
+    print(f"[dataservice] serving {data_dir} on {address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.store.shutdown()
+        family, sockaddr = parse_address(address)
+        if family == getattr(socket, "AF_UNIX", None) and Path(sockaddr).exists():
+            Path(sockaddr).unlink()
+
+
+# ===== Client =====
+class DataServiceClient:
+    """Thread-safe client with a pool of persistent connections."""
+
+    def __init__(self, address: str, pool_size: int = 8, timeout: float = 30.0):
+        self.address = address
+        self.family, self.sockaddr = parse_address(address)
+        self.timeout = timeout
+        self._pool: "queue.LifoQueue[socket.socket]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(self.family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.sockaddr)
+        if self.family == socket.AF_INET:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    @contextmanager
+    def _connection(self) -> Iterator[Tuple[socket.socket, bool]]:
+        with self._slots:
+            try:
+                sock, reused = self._pool.get_nowait(), True
+            except queue.Empty:
+                sock, reused = self._connect(), False
+            try:
+                yield sock, reused
+            except BaseException:
+                sock.close()
+                raise
+            self._pool.put(sock)
+
+    def call(self, ops: List[Dict]) -> List[Dict]:
+        """Send several ops in one frame (one round trip); returns the raw results."""
+        payload = _dumps({"ops": ops})
+        for attempt in (0, 1):
+            try:
+                with self._connection() as (sock, reused):
+                    send_frame(sock, payload)
+                    frame = recv_frame(sock)
+                    if frame is None:
+                        raise ConnectionError("data service closed the connection")
+                break
+            except (ConnectionError, BrokenPipeError) as e:
+                # Conexion del pool cerrada por un reinicio del servicio: un reintento
+                if attempt or not reused or any(op.get("op") == "save" for op in ops):
+                    raise ServiceError(f"Data service unavailable at {self.address}: {e}") from e
+        response = codec.loads(frame)
+        if "results" not in response:
+            raise ServiceError(response.get("error", "bad response"))
+        return response["results"]
+
+    @staticmethod
+    def _unwrap(result: Dict, dataset: str = "") -> Any:
+        if "ok" in result:
+            return result["ok"]
+        if result.get("kind") == "conflict":
+            raise WriteConflict(Path(DATASET_FILES.get(dataset, dataset)), result.get("keys", []))
+        raise ServiceError(result.get("error", "unknown error"))
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    # ===== Helpers =====
+    def ping(self) -> bool:
+        return self._unwrap(self.call([{"op": "ping"}])[0]) == "pong"
+
+    def get(self, dataset: str) -> Tuple[List[Dict], Tuple]:
+        return self.get_many([dataset])[dataset]
+
+    def get_many(self, datasets: List[str]) -> Dict[str, Tuple[List[Dict], Tuple]]:
+        results = self.call([{"op": "get", "dataset": d} for d in datasets])
+        out = {}
+        for d, r in zip(datasets, results):
+            value = self._unwrap(r, d)
+            out[d] = (value["records"], as_stamp(value["stamp"]))
+        return out
+
+    def save(self, dataset: str, changes: List[Dict], stamp=None, merge: bool = True) -> Dict:
+        value = self._unwrap(self.call([{"op": "save", "dataset": dataset, "changes": changes,
+                                         "stamp": stamp, "merge": merge}])[0], dataset)
+        value["stamp"] = as_stamp(value["stamp"])
+        return value
+
+    def index(self, method: str, *args) -> Any:
+        return self._unwrap(self.call([{"op": "index", "method": method, "args": list(args)}])[0])
+
+    def stats(self) -> Dict:
+        return self._unwrap(self.call([{"op": "stats"}])[0])
+
+
+class RemoteScheduleIndex:
+    """ScheduleIndex read API backed by the service's index (no local copy)."""
+
+    def __init__(self, client: DataServiceClient):
+        self.client = client
+
+    def site_range(self, site_prefix: str, lo: int, hi: int, overlapping: bool = False) -> List[Dict]:
+        return self.client.index("site_range", site_prefix, lo, hi, overlapping)
+
+    def officer_range(self, officer_id: str, lo: int, hi: int, overlapping: bool = False) -> List[Dict]:
+        return self.client.index("officer_range", officer_id, lo, hi, overlapping)
+
+    def next_for_site(self, site_prefix: str, now: int) -> Optional[Dict]:
+        return self.client.index("next_for_site", site_prefix, now)
+
+    def next_for_officer(self, officer_id: str, now: int) -> Optional[Dict]:
+        return self.client.index("next_for_officer", officer_id, now)
+
+    def sites(self) -> List[str]:
+        return self.client.index("sites")
+
+    def officers(self) -> List[str]:
+        return self.client.index("officers")
+
+    def add(self, shift: Dict, position: int = 0) -> bool:
+        return True  # el servicio actualiza su indice al guardar
+
+    def sync(self, schedules: List[Dict]):
+        pass
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="AmdaOps shared data service for Streamlit workers")
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR)
+    parser.add_argument("--address", help="unix:/path/to.sock or tcp:host:port (default: unix socket in data dir)")
+    args = parser.parse_args(argv)
+    serve(args.data_dir, args.address)
+
+
+if __name__ == "__main__":
+    main()
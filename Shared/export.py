@@ -0,0 +1,209 @@
+import argparse
+import csv
+import io
+import os
+import time
+from datetime import datetime, timedelta
+from itertools import chain
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from Shared import codec
+from Shared.filestore import iter_json_records, read_json_records
+from Shared.partitions import PARTITION_DIRS, months_between, open_partitions
+from Shared.punch_ingest import DEFAULT_DATA_DIR, JOURNAL_NAME, iter_jsonl
+from Shared.shards import ShardedPartitions
+from Shared.timeutil import parse_epoch, shift_bounds, to_epoch
+
+try:
+    import openpyxl
+except Exception:
+    openpyxl = None
+
+EXPORT_DIR = "exports"
+# Extractos viejos de la carpeta exports: se borran pasado un dia o si hay mas de EXPORT_KEEP
+EXPORT_MAX_AGE_S = 24 * 3600
+EXPORT_KEEP = 20
+FORMATS = ("csv", "xlsx")
+# Columnas de cada extracto, en orden
+COLUMNS = {
+    "time_logs": ["ts", "site_prefix", "site_name", "officer_id", "officer_name", "event", "device", "id"],
+    "schedules": ["date", "start_time", "end_time", "hours", "site_prefix", "site_name", "officer_id",
+                  "officer_name", "shift_type", "priority", "status", "notes", "id"],
+}
+LEGACY_FILES = {"time_logs": "time_logs.json", "schedules": "work_schedules.json"}
+CSV_CHUNK = 1 << 16
+# Filas de datos por hoja (Excel admite 1,048,576 con el encabezado)
+XLSX_SHEET_ROWS = 1_048_575
+
+
+# ===== Records =====
+def _start(dataset: str, record: Dict) -> Optional[int]:
+    if dataset == "time_logs":
+        return parse_epoch(record.get("ts"))
+    bounds = shift_bounds(record)
+    return bounds[0] if bounds else None
+
+
+def _sources(data_dir: Path, dataset: str, lo: int, hi: int, site_prefix: str) -> Iterator[Dict]:
+    store = open_partitions(data_dir, dataset)
+    if store is None:
+        # Sin particiones: el JSON se lee registro a registro (y el journal de punches)
+        legacy = iter_json_records(codec.resolve(data_dir / LEGACY_FILES[dataset]))
+        return chain(legacy, iter_jsonl(data_dir / JOURNAL_NAME)) if dataset == "time_logs" else legacy
+    if isinstance(store, ShardedPartitions):
+        roots = [store.for_site(site_prefix).root] if site_prefix else [store.root / n for n in store.shard_names()]
+    else:
+        roots = [store.root]
+    # Mes a mes y archivo por archivo, sin pasar por la cache de meses
+    return (r for month in months_between(lo, hi) for root in roots
+            for r in iter_jsonl(codec.resolve(root / f"{month}.jsonl")))
+
+
+def iter_records(data_dir: Path, dataset: str, lo: int, hi: int, site_prefix: str = "") -> Iterator[Dict]:
+    """Punches (by ts) or shifts (by start) in [lo, hi), for one site or all, read one at a time (file order)."""
+    for record in _sources(Path(data_dir), dataset, lo, hi, site_prefix):
+        if not isinstance(record, dict) or (site_prefix and record.get("site_prefix") != site_prefix):
+            continue
+        start = _start(dataset, record)
+        if start is not None and lo <= start < hi:
+            yield record
+
+
+def iter_rows(dataset: str, records: Iterable[Dict], officer_names: Optional[Dict] = None,
+              site_names: Optional[Dict] = None) -> Iterator[List]:
+    """One list of values per record, in COLUMNS order."""
+    officer_names = officer_names or {}
+    site_names = site_names or {}
+    columns = COLUMNS[dataset]
+    for record in records:
+        row = dict(record, officer_name=officer_names.get(record.get("officer_id"), ""),
+                   site_name=site_names.get(record.get("site_prefix"), ""))
+        if dataset == "schedules":
+            bounds = shift_bounds(record)
+            row["hours"] = round((bounds[1] - bounds[0]) / 3600, 2) if bounds else ""
+        yield [row.get(c, "") for c in columns]
+
+
+# ===== Writers =====
+def iter_csv(header: List[str], rows: Iterable[List], chunk_size: int = CSV_CHUNK) -> Iterator[bytes]:
+    """CSV bytes (UTF-8 with BOM, for Excel) in chunks of about `chunk_size`."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    buf.write("\ufeff")
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow(row)
+        if buf.tell() >= chunk_size:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue().encode("utf-8")
+
+
+def write_xlsx(path: Path, header: List[str], rows: Iterable[List], title: str = "export") -> int:
+    """Write rows with openpyxl in write-only mode (rows go to disk as they come); returns the row count."""
+    if openpyxl is None:
+        raise RuntimeError("openpyxl is required to export XLSX files")
+    book = openpyxl.Workbook(write_only=True)
+    sheet, count = None, 0
+    for row in rows:
+        if count % XLSX_SHEET_ROWS == 0:
+            # Hoja llena (o la primera): se sigue en otra
+            sheet = book.create_sheet(title if count == 0 else f"{title} {count // XLSX_SHEET_ROWS + 1}")
+            sheet.append(header)
+        sheet.append(row)
+        count += 1
+    if sheet is None:
+        book.create_sheet(title).append(header)
+    book.save(path)
+    return count
+
+
+def export(data_dir: Path, dataset: str, lo: int, hi: int, out: Path, site_prefix: str = "",
+           fmt: str = "csv") -> int:
+    """Stream an extract to `out` (written to a temp file, then renamed); returns the row count."""
+    data_dir, out = Path(data_dir), Path(out)
+    officers = read_json_records(codec.resolve(data_dir / "security_officers.json"))
+    registry = read_json_records(codec.resolve(data_dir / "site_registry.json"))
+    officer_names = {o.get("id"): o.get("name", "") for o in officers if isinstance(o, dict)}
+    site_names = {s.get("prefix"): s.get("name", "") for s in registry if isinstance(s, dict)}
+    count = [0]
+
+    def _counted(rows):
+        for row in rows:
+            count[0] += 1
+            yield row
+
+    rows = iter_rows(dataset, iter_records(data_dir, dataset, lo, hi, site_prefix), officer_names, site_names)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(f"{out.name}.{os.getpid()}.tmp")
+    try:
+        if fmt == "xlsx":
+            count[0] = write_xlsx(tmp, COLUMNS[dataset], rows, dataset)
+        else:
+            with open(tmp, "wb") as f:
+                for chunk in iter_csv(COLUMNS[dataset], _counted(rows)):
+                    f.write(chunk)
+        os.replace(tmp, out)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return count[0]
+
+
+def prune_exports(export_dir: Path, max_age_s: float = EXPORT_MAX_AGE_S, keep: int = EXPORT_KEEP,
+                  now: Optional[float] = None) -> List[Path]:
+    """Delete extracts older than `max_age_s` and all but the `keep` newest; returns the deleted files."""
+    export_dir = Path(export_dir)
+    if not export_dir.is_dir():
+        return []
+    now = time.time() if now is None else now
+    files = []
+    for path in export_dir.iterdir():
+        try:
+            if path.is_file():
+                files.append((path.stat().st_mtime, path))
+        except OSError:
+            continue
+    files.sort(reverse=True)
+    deleted = []
+    for i, (mtime, path) in enumerate(files):
+        # Los .tmp de una exportacion en curso son recientes: solo se borran por edad
+        if now - mtime > max_age_s or (i >= keep and not path.name.endswith(".tmp")):
+            try:
+                path.unlink()
+                deleted.append(path)
+            except OSError:
+                continue
+    return deleted
+
+
+def export_name(dataset: str, start: str, end: str, site_prefix: str = "", fmt: str = "csv") -> str:
+    site = "".join(c if c.isalnum() else "_" for c in site_prefix) if site_prefix else "all"
+    return f"{dataset}_{site}_{start}_{end}.{fmt}"
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="CSV/XLSX extract of time logs or work schedules for a date range")
+    parser.add_argument("dataset", choices=sorted(PARTITION_DIRS))
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR)
+    parser.add_argument("--start", required=True, help="first day YYYY-MM-DD")
+    parser.add_argument("--end", required=True, help="last day YYYY-MM-DD")
+    parser.add_argument("--site", default="")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--out", type=Path, help=f"output file (default: <data-dir>/{EXPORT_DIR}/...)")
+    args = parser.parse_args(argv)
+
+    lo = to_epoch(datetime.fromisoformat(args.start))
+    hi = to_epoch(datetime.fromisoformat(args.end) + timedelta(days=1))
+    out = args.out or Path(args.data_dir) / EXPORT_DIR / export_name(args.dataset, args.start, args.end, args.site,
+                                                                     args.format)
+    rows = export(args.data_dir, args.dataset, lo, hi, out, args.site, args.format)
+    if args.out is None:
+        prune_exports(out.parent)
+    print(f"{rows} row(s) -> {out}")
+
+
+if __name__ == "__main__":
+    main()
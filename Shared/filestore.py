@@ -0,0 +1,331 @@
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from Shared import codec
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+_MISSING = object()
+_thread_locks: Dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
+Stamp = Tuple[int, Optional[Tuple[int, int]]]
+
+
+class WriteConflict(Exception):
+    """Another writer changed the same records (or fields) since they were read."""
+
+    def __init__(self, path: Path, keys: List[str]):
+        self.path = Path(path)
+        self.keys = keys
+        super().__init__(f"{self.path.name}: {len(keys)} record(s) changed by another session")
+
+
+def _thread_lock(path: Path) -> threading.Lock:
+    # flock/msvcrt excluyen procesos; este lock excluye hilos del mismo proceso
+    with _thread_locks_guard:
+        return _thread_locks.setdefault(str(Path(path).resolve()), threading.Lock())
+
+
+@contextmanager
+def locked(path: Path, timeout: float = 30.0) -> Iterator[None]:
+    """Exclusive advisory lock on `<path>.lock` (fcntl.flock, msvcrt on Windows)."""
+    path = Path(path)
+    lock_path = path.with_name(path.name + ".lock")
+    with _thread_lock(lock_path):
+        with open(lock_path, "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                deadline = time.monotonic() + timeout
+                f.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        if time.monotonic() > deadline:
+                            raise
+                        time.sleep(0.01)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _replace(tmp: Path, path: Path, attempts: int = 50):
+    for i in range(attempts):
+        try:
+            os.replace(tmp, path)
+            return
+        except PermissionError:
+            # Windows no reemplaza un archivo que otro proceso tiene abierto: se reintenta
+            if i == attempts - 1:
+                raise
+            time.sleep(0.01)
+
+
+def atomic_write_bytes(path: Path, data: bytes):
+    """Write to a temp file in the same folder, fsync, then rename over `path`."""
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        _replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def atomic_write_text(path: Path, text: str):
+    atomic_write_bytes(path, text.encode("utf-8"))
+
+
+def atomic_write_json(path: Path, data: Any, indent: Optional[int] = 2):
+    atomic_write_bytes(path, codec.pack(path, codec.dumps(data, indent)))
+
+
+def version_path(path: Path) -> Path:
+    path = Path(path)
+    return path.with_name(path.name + ".ver")
+
+
+def read_stamp(path: Path) -> Stamp:
+    """(save counter, (mtime_ns, size)) of a data file.
+
+    The counter is bumped by every save through this module; the file
+    signature also catches edits made by anything else.
+    """
+    path = Path(path)
+    try:
+        version = int(version_path(path).read_text(encoding="utf-8").strip() or 0)
+    except (OSError, ValueError):
+        version = 0
+    try:
+        st = os.stat(path)
+        signature = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        signature = None
+    return version, signature
+
+
+def record_key(record: Any, key: str) -> str:
+    if isinstance(record, dict) and record.get(key) not in (None, ""):
+        return str(record[key])
+    # Registros sin llave: se identifican por su contenido
+    return "#" + json.dumps(record, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def snapshot(records: Optional[List]) -> Optional[List]:
+    """Per-record copy taken at read time: the base of a later three-way merge."""
+    if records is None:
+        return None
+    return [dict(r) if isinstance(r, dict) else r for r in records]
+
+
+def diff_records(base: Optional[List], mine: List, key: str = "id") -> List[Dict]:
+    """Changes from base to mine as [{"key", "base", "new"}] (base/new None = added/deleted).
+
+    Without a base every record is a blind upsert ({"key", "new", "blind": True}).
+    """
+    by_mine = {record_key(r, key): r for r in mine}
+    if base is None:
+        return [{"key": k, "new": r, "blind": True} for k, r in by_mine.items()]
+    by_base = {record_key(r, key): r for r in base}
+    changes = [{"key": k, "base": by_base.get(k), "new": r}
+               for k, r in by_mine.items() if by_base.get(k, _MISSING) != r]
+    changes.extend({"key": k, "base": b, "new": None} for k, b in by_base.items() if k not in by_mine)
+    return changes
+
+
+def apply_diff(theirs: List, changes: List[Dict], key: str = "id", path: Path = Path("")) -> List:
+    """Apply changes from diff_records on top of the current records.
+
+    Inside a record that both sides changed, changes to different fields are
+    combined. Changing the same field (or editing a record the other side
+    deleted) raises WriteConflict.
+    """
+    by_theirs = {record_key(r, key): r for r in theirs}
+    order = list(by_theirs)
+    out = dict(by_theirs)
+    conflicts = []
+    for change in changes:
+        k, r = change["key"], change.get("new")
+        t = by_theirs.get(k)
+        if change.get("blind"):
+            if k not in out:
+                order.append(k)
+            out[k] = r
+            continue
+        b = change.get("base")
+        if r is None:
+            # Borrado: solo si el otro lado no lo modifico
+            if t is not None:
+                if t != b:
+                    conflicts.append(k)
+                else:
+                    del out[k]
+            continue
+        if b is None:
+            if t is None:
+                order.append(k)
+                out[k] = r
+            elif t != r:
+                conflicts.append(k)
+            continue
+        if r == t:
+            continue
+        if t is None:
+            conflicts.append(k)
+            continue
+        if t == b or not (isinstance(r, dict) and isinstance(b, dict) and isinstance(t, dict)):
+            if t != b:
+                conflicts.append(k)
+            else:
+                out[k] = r
+            continue
+        merged = dict(t)
+        for field in set(r) | set(b):
+            mv, bv = r.get(field, _MISSING), b.get(field, _MISSING)
+            if mv == bv:
+                continue
+            tv = t.get(field, _MISSING)
+            if tv != bv and tv != mv:
+                conflicts.append(k)
+                break
+            if mv is _MISSING:
+                merged.pop(field, None)
+            else:
+                merged[field] = mv
+        else:
+            out[k] = merged
+
+    if conflicts:
+        raise WriteConflict(path, conflicts)
+    return [out[k] for k in order if k in out]
+
+
+def merge_records(base: Optional[List], mine: List, theirs: List, key: str = "id",
+                  path: Path = Path("")) -> List:
+    """Apply my changes (base -> mine) on top of the current file (theirs).
+
+    Records are matched by `key`. Without a base, my records are upserted and
+    nothing is deleted.
+    """
+    return apply_diff(theirs, diff_records(base, mine, key), key, path)
+
+
+def read_json_records(path: Path) -> List:
+    path = Path(path)
+    if not path.exists():
+        return []
+    with codec.open_file(path, "rb") as f:
+        raw = f.read()
+    data = codec.loads(raw) if raw.strip() else []
+    return data if isinstance(data, list) else [data]
+
+
+_SEPARATORS = re.compile(r"[ \t\r\n,]*")
+
+
+def iter_json_records(path: Path, chunk_size: int = 1 << 20) -> Iterator:
+    """Items of a JSON list file parsed one at a time, reading `chunk_size` characters at a time."""
+    path = Path(path)
+    if not path.exists():
+        return
+    decoder = json.JSONDecoder()
+    # .gz / .xz se descomprimen en streaming
+    with codec.open_file(path, "rt") as f:
+        buf = f.read(chunk_size).lstrip()
+        if not buf.startswith("["):
+            # Vacio o un solo objeto: igual que read_json_records
+            yield from read_json_records(path)
+            return
+        pos, eof = 1, False
+        while True:
+            pos = _SEPARATORS.match(buf, pos).end()
+            if pos < len(buf) and buf[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                end = None
+            # Registro cortado por el fin del bloque (o un numero que podria seguir): se lee mas
+            if end is None or (end == len(buf) and not eof):
+                if eof:
+                    raise ValueError(f"{path.name}: invalid or truncated JSON list at character {pos}")
+                chunk = f.read(chunk_size)
+                buf, pos, eof = buf[pos:] + chunk, 0, not chunk
+                continue
+            yield item
+            pos = end
+
+
+class SaveResult(NamedTuple):
+    records: List
+    stamp: Stamp
+    merged: bool
+
+
+def save_json_records(path: Path, records: List, expected: Optional[Stamp], base: Optional[List] = None,
+                      key: str = "id", merge: bool = True, indent: Optional[int] = 2) -> SaveResult:
+    """Compare-and-swap save of a JSON list.
+
+    `expected` is the stamp read together with `base`. If the file still has
+    that stamp the records are written as they are; otherwise (or when the
+    stamp is unknown) they are merged record by record into the current file,
+    or WriteConflict is raised when `merge` is False.
+    """
+    path = Path(path)
+    with locked(path):
+        current = read_stamp(path)
+        merged = False
+        if expected is None or current != expected:
+            if not merge:
+                raise WriteConflict(path, [])
+            records = merge_records(base, records, read_json_records(path), key, path)
+            merged = True
+        return _commit(path, records, current, merged, indent)
+
+
+def save_json_changes(path: Path, changes: List[Dict], expected: Optional[Stamp], key: str = "id",
+                      current_records: Optional[List] = None, merge: bool = True,
+                      indent: Optional[int] = 2) -> SaveResult:
+    """Like save_json_records, but with only the changed records (see diff_records).
+
+    `current_records` is an in-memory copy of the file; it is used only if it
+    is still current, otherwise the file is read under the lock.
+    """
+    path = Path(path)
+    with locked(path):
+        current = read_stamp(path)
+        merged = expected is None or current != expected
+        if merged and not merge:
+            raise WriteConflict(path, [])
+        if current_records is None or merged:
+            current_records = read_json_records(path)
+        records = apply_diff(current_records, changes, key, path)
+        return _commit(path, records, current, merged, indent)
+
+
+def _commit(path: Path, records: List, current: Stamp, merged: bool, indent: Optional[int]) -> SaveResult:
+    atomic_write_json(path, records, indent)
+    atomic_write_text(version_path(path), str(current[0] + 1))
+    return SaveResult(records, read_stamp(path), merged)
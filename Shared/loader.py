@@ -1,14 +1,16 @@
-import json
 from pathlib import Path
 import streamlit as st
 
+from Shared import codec
+
 def load_phrases(path: Path):
+    # Acepta el banco comprimido (.json.gz / .json.xz) junto al nombre original
+    path = codec.resolve(path)
     if not path.exists():
         st.error(f"❌ No se encontró el archivo de frases en {path}")
         st.stop()
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = codec.load(path)
         if not isinstance(data, list):
             raise ValueError("El archivo debe contener una lista.")
         return data
@@ -0,0 +1,264 @@
+import json
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from Shared.changefeed import ChangeFeed
+from Shared.filestore import iter_json_records, read_stamp
+from Shared.partitions import folder_stamp, iter_appended
+from Shared.payroll import PayrollRollup
+from Shared.schedule_index import ScheduleIndex
+from Shared.timeutil import epoch_to_iso, parse_epoch, shift_bounds
+
+ON_DUTY = "on-duty"
+LATE = "late"
+DUE = "due"
+UNSCHEDULED = "unscheduled"
+
+
+class _Pointer:
+    """Shifts in progress and the next shift for one site or officer, valid until `valid_until`."""
+
+    __slots__ = ("current", "next", "valid_until")
+
+    def __init__(self, current: List[Dict], next_shift: Optional[Dict], valid_until: Optional[int]):
+        self.current = current
+        self.next = next_shift
+        self.valid_until = valid_until
+
+
+class OpsBoard:
+    """Live on-duty state for every site, shared by all sessions of the server."""
+
+    # Por sitio y por oficial: puntero a los turnos en curso y al siguiente, recalculado solo cuando
+    # uno empieza o termina. Los clock-ins salen del journal (desde el ultimo offset) y del feed.
+
+    def __init__(self, schedules_path: Path, journal_path: Path, legacy_path: Optional[Path] = None,
+                 rollup_path: Optional[Path] = None, feed: Optional[ChangeFeed] = None,
+                 grace_minutes: int = 5, early_minutes: int = 60):
+        self.schedules_path = Path(schedules_path)
+        self.journal_path = Path(journal_path)
+        self.legacy_path = Path(legacy_path) if legacy_path else None
+        self.rollup_path = Path(rollup_path) if rollup_path else None
+        self.feed = feed
+        self.grace = grace_minutes * 60
+        # Un clock-in hasta esta cantidad antes del inicio cuenta para el turno
+        self.early = early_minutes * 60
+        self.index: Optional[ScheduleIndex] = None
+        self._schedules_stamp = None
+        self._feed_seq = feed.seq if feed is not None else 0
+        self._pointers: Dict[Tuple[str, str], _Pointer] = {}
+        # officer_id -> [site_prefix, epoch del clock-in abierto]
+        self.clocked_in: Dict[str, List] = {}
+        self._clocked_by_site: Dict[str, set] = {}
+        # officer_id -> epoch del ultimo punch aplicado (los punches viejos no cambian el estado)
+        self._last_punch: Dict[str, int] = {}
+        self.journal_offset = 0
+        self.partition_offsets: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.refreshed_at: Optional[int] = None
+
+    # ===== Punch stream =====
+    def _apply_punch(self, punch: Dict):
+        officer_id = punch.get("officer_id") if isinstance(punch, dict) else None
+        ts = parse_epoch(punch.get("ts")) if officer_id else None
+        if ts is None or ts < self._last_punch.get(officer_id, -1):
+            return
+        self._last_punch[officer_id] = ts
+        if punch.get("event") == "in":
+            self._clock_out(officer_id)
+            self._clock_in(officer_id, punch.get("site_prefix", ""), ts)
+        elif punch.get("event") == "out":
+            self._clock_out(officer_id)
+
+    def _clock_in(self, officer_id: str, site: str, ts: int):
+        self.clocked_in[officer_id] = [site, ts]
+        self._clocked_by_site.setdefault(site, set()).add(officer_id)
+
+    def _clock_out(self, officer_id: str):
+        opened = self.clocked_in.pop(officer_id, None)
+        if opened is not None:
+            self._clocked_by_site.get(opened[0], set()).discard(officer_id)
+
+    def _load_punches(self):
+        # Arranque: se parte del rollup de nomina (clock-ins abiertos + offset) si ya existe
+        rollup = PayrollRollup.load(self.rollup_path) if self.rollup_path and self.rollup_path.exists() else None
+        if rollup is not None and rollup.legacy_applied:
+            for officer_id, (site, ts) in rollup.open_shifts.items():
+                self._clock_in(officer_id, site, ts)
+                self._last_punch[officer_id] = ts
+            self.journal_offset = rollup.journal_offset
+            self.partition_offsets = dict(rollup.partition_offsets)
+        else:
+            self._load_legacy()
+        self._catch_up_journal()
+
+    def _load_legacy(self):
+        # Solo al arrancar sin rollup; el orden no importa: manda el ultimo punch de cada oficial
+        if self.legacy_path is not None:
+            for punch in iter_json_records(self.legacy_path):
+                self._apply_punch(punch)
+
+    def _catch_up_journal(self) -> int:
+        if self.journal_path.is_dir():
+            applied = 0
+            # Mes reescrito: se sigue desde su final, sin releer la historia
+            for punch in iter_appended(self.journal_path, self.partition_offsets, skip_rewritten=True):
+                self._apply_punch(punch)
+                applied += 1
+            return applied
+        if not self.journal_path.exists():
+            return 0
+        size = self.journal_path.stat().st_size
+        if size < self.journal_offset:
+            self.journal_offset = 0  # journal rotado: se relee completo
+        if size == self.journal_offset:
+            return 0
+        applied = 0
+        with open(self.journal_path, "rb") as f:
+            f.seek(self.journal_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # ultima linea aun incompleta
+                self.journal_offset += len(line)
+                try:
+                    self._apply_punch(json.loads(line))
+                except ValueError:
+                    continue
+                applied += 1
+        return applied
+
+    # ===== Schedules =====
+    def _invalidate(self, shift: Optional[Dict]):
+        if shift:
+            self._pointers.pop(("site", shift.get("site_prefix", "")), None)
+            self._pointers.pop(("officer", shift.get("officer_id", "")), None)
+
+    def _rebuild(self, schedules: List[Dict]):
+        if self.index is None:
+            self.index = ScheduleIndex(schedules or [])
+        else:
+            self.index.sync(schedules or [])
+        self._pointers.clear()
+
+    def _apply_feed(self, load_schedules: Callable[[], List[Dict]]) -> bool:
+        """Apply schedule and punch changes saved in this process. True if schedules changed."""
+        batch = self.feed.since(self._feed_seq, ["schedules", "time_logs"])
+        self._feed_seq = batch.seq
+        # Los punches no necesitan el reset: refresh sigue el journal (o las particiones) desde su offset
+        if batch.reset:
+            self._rebuild(load_schedules())
+            return True
+        touched = False
+        for entry in batch.entries:
+            if entry["dataset"] == "time_logs":
+                if entry["op"] == "upsert":
+                    self._apply_punch(entry["record"])
+                continue
+            touched = True
+            key = entry["key"]
+            if entry["op"] == "reset" or not key or key.startswith("#"):
+                # Turno sin id: no se puede ubicar en el indice
+                self._rebuild(load_schedules())
+                continue
+            self._invalidate(self.index.get(key))
+            self.index.remove(key)
+            if entry["op"] == "upsert":
+                self.index.add(entry["record"])
+                self._invalidate(entry["record"])
+        return touched
+
+    def _read_schedules_stamp(self):
+        # Particiones (por mes o por sitio): un stat de la carpeta y de cada shard
+        if self.schedules_path.is_dir():
+            return folder_stamp(self.schedules_path)
+        return read_stamp(self.schedules_path)
+
+    def refresh(self, now: int, load_schedules: Callable[[], List[Dict]]):
+        """Bring the board up to date; `load_schedules` is only called on first use or external edits."""
+        with self._lock:
+            if self.index is None:
+                self._schedules_stamp = self._read_schedules_stamp()
+                self._rebuild(load_schedules())
+                self._load_punches()
+            else:
+                changed = self.feed is not None and self._apply_feed(load_schedules)
+                stamp = self._read_schedules_stamp()
+                if stamp != self._schedules_stamp and not changed:
+                    # work_schedules.json cambio fuera de este proceso
+                    self._rebuild(load_schedules())
+                self._schedules_stamp = stamp
+                self._catch_up_journal()
+            self.refreshed_at = now
+
+    # ===== Pointers =====
+    def _pointer(self, kind: str, key: str, now: int) -> _Pointer:
+        ptr = self._pointers.get((kind, key))
+        if ptr is not None and (ptr.valid_until is None or now < ptr.valid_until):
+            return ptr
+        if kind == "site":
+            current = self.index.site_range(key, now, now + 1, overlapping=True)
+            next_shift = self.index.next_for_site(key, now + 1)
+        else:
+            current = self.index.officer_range(key, now, now + 1, overlapping=True)
+            next_shift = self.index.next_for_officer(key, now + 1)
+        # El puntero vence cuando termina un turno en curso o empieza el siguiente
+        edges = [shift_bounds(s)[1] for s in current]
+        if next_shift is not None:
+            edges.append(shift_bounds(next_shift)[0])
+        ptr = _Pointer(current, next_shift, min(edges) if edges else None)
+        self._pointers[(kind, key)] = ptr
+        return ptr
+
+    def site_pointer(self, site_prefix: str, now: int) -> _Pointer:
+        with self._lock:
+            return self._pointer("site", site_prefix, now)
+
+    def officer_pointer(self, officer_id: str, now: int) -> _Pointer:
+        with self._lock:
+            return self._pointer("officer", officer_id, now)
+
+    # ===== Board =====
+    def _shift_row(self, site: str, shift: Dict, now: int) -> Dict:
+        start, end = shift_bounds(shift)
+        officer_id = shift.get("officer_id", "")
+        opened = self.clocked_in.get(officer_id)
+        late_by = 0
+        if opened is not None and opened[1] >= start - self.early:
+            status = ON_DUTY
+            late_by = max(0, opened[1] - start)
+        elif now - start > self.grace:
+            status = LATE
+            late_by = now - start
+        else:
+            status = DUE
+        return {
+            "site_prefix": site,
+            "status": status,
+            "officer_id": officer_id,
+            "shift_id": shift.get("id", ""),
+            "start": epoch_to_iso(start),
+            "end": epoch_to_iso(end),
+            "clocked_in": epoch_to_iso(opened[1]) if opened else "",
+            "late_minutes": late_by // 60 if late_by > self.grace else 0,
+        }
+
+    def site_status(self, site_prefix: str, now: int) -> Dict:
+        """On-duty / late rows and the next shift of one site."""
+        with self._lock:
+            ptr = self._pointer("site", site_prefix, now)
+            rows = [self._shift_row(site_prefix, s, now) for s in ptr.current]
+            scheduled = {r["officer_id"] for r in rows}
+            for officer_id in self._clocked_by_site.get(site_prefix, ()):
+                if officer_id in scheduled:
+                    continue
+                ts = self.clocked_in[officer_id][1]
+                # Marco entrada sin turno en curso en ningun sitio
+                if not self._pointer("officer", officer_id, now).current:
+                    rows.append({"site_prefix": site_prefix, "status": UNSCHEDULED, "officer_id": officer_id,
+                                 "shift_id": "", "start": "", "end": "", "clocked_in": epoch_to_iso(ts),
+                                 "late_minutes": 0})
+            return {"site_prefix": site_prefix, "rows": rows, "next": ptr.next}
+
+    def board(self, sites: Iterable[str], now: int) -> List[Dict]:
+        return [self.site_status(site, now) for site in sites]
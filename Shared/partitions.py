@@ -0,0 +1,507 @@
+import argparse
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from itertools import chain
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from Shared import codec
+from Shared.compact import RecordTable, compact
+from Shared.filestore import apply_diff, atomic_write_bytes, iter_json_records, locked, record_key
+from Shared.punch_ingest import DEFAULT_DATA_DIR, JOURNAL_NAME, append_jsonl, iter_jsonl
+from Shared.timeutil import day_of, from_epoch, parse_epoch, shift_bounds
+from Shared.warmup import files_signature
+
+# dataset -> carpeta de particiones dentro de data/
+PARTITION_DIRS = {"time_logs": "time_logs", "schedules": "work_schedules"}
+CLOSE_AFTER_DAYS = 7
+CACHE_SIZE = 24
+
+
+class PartitionClosed(ValueError):
+    """Write to a month that is already closed (immutable)."""
+
+
+def punch_month(record: Dict) -> Optional[str]:
+    ts = parse_epoch(record.get("ts")) if isinstance(record, dict) else None
+    return day_of(ts)[:7] if ts is not None else None
+
+
+def shift_month(record: Dict) -> Optional[str]:
+    if not isinstance(record, dict) or shift_bounds(record) is None:
+        return None
+    return str(record["date"])[:7]
+
+
+MONTH_OF = {"time_logs": punch_month, "schedules": shift_month}
+UNDATED = "undated"
+# Meses cerrados comprimidos (MonthlyPartitions.compress): YYYY-MM.jsonl.gz
+PACKED_SUFFIX = ".gz"
+
+
+def month_file_name(path: Path) -> Optional[str]:
+    """`YYYY-MM.jsonl` for a month file, compressed or not (None for anything else)."""
+    name = path.name
+    if name.endswith(".jsonl" + PACKED_SUFFIX):
+        name = name[:-len(PACKED_SUFFIX)]
+    return name if name.endswith(".jsonl") else None
+
+
+def month_files(root: Path, pattern: str = "*.jsonl*") -> Dict[str, Path]:
+    """Relative `[<shard>/]YYYY-MM.jsonl` -> file under `root`; the compressed copy wins if both exist."""
+    files: Dict[str, Path] = {}
+    for path in sorted(Path(root).glob(pattern)):
+        name = month_file_name(path)
+        if name is not None:
+            rel = path.parent.relative_to(root).joinpath(name).as_posix()
+            if rel not in files or path.name.endswith(PACKED_SUFFIX):
+                files[rel] = path
+    return files
+
+
+def months_between(lo: int, hi: int) -> List[str]:
+    """'YYYY-MM' of every month touching the epoch range [lo, hi)."""
+    months = []
+    current = from_epoch(lo).date().replace(day=1)
+    last = from_epoch(max(lo, hi - 1)).date()
+    while current <= last:
+        months.append(current.strftime("%Y-%m"))
+        current = (current + timedelta(days=32)).replace(day=1)
+    return months
+
+
+def month_closed(month: str, close_after_days: int = CLOSE_AFTER_DAYS, today: Optional[date] = None) -> bool:
+    """True once `close_after_days` of the following month have passed."""
+    if month == UNDATED:
+        return False
+    try:
+        first = datetime.strptime(month, "%Y-%m").date()
+    except ValueError:
+        return False
+    next_month = (first + timedelta(days=32)).replace(day=1)
+    return (today or date.today()) >= next_month + timedelta(days=close_after_days)
+
+
+def folder_stamp(root: Path) -> Tuple:
+    """Signature of a partition folder and its shard folders; changes whenever a month file is replaced."""
+    root = Path(root)
+    if not root.is_dir():
+        return files_signature([root])
+    return files_signature([root] + sorted(p for p in root.iterdir() if p.is_dir()))
+
+
+class MonthlyPartitions:
+    """A dataset stored as one JSONL file per month (`<root>/YYYY-MM.jsonl`, sin fecha en `undated.jsonl`)."""
+
+    # Un mes se cierra `close_after_days` despues de terminar: ya no acepta escrituras (salvo force)
+    # y queda en cache sin volver a mirar el archivo; los abiertos se cachean por firma de archivo
+
+    def __init__(self, root: Path, month_of: Callable[[Dict], Optional[str]],
+                 close_after_days: int = CLOSE_AFTER_DAYS, cache_size: int = CACHE_SIZE,
+                 compact_as: Optional[str] = None):
+        self.root = Path(root)
+        self.month_of = month_of
+        self.close_after_days = close_after_days
+        self.cache_size = cache_size
+        self.compact_as = compact_as
+        # month -> (signature o None si cerrado, registros)
+        self._cache: "OrderedDict[str, Tuple[Optional[Tuple], List[Dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return self.root.is_dir()
+
+    def _plain(self, month: str) -> Path:
+        # Tambien es la llave del lock del mes, este comprimido o no
+        return self.root / f"{month}.jsonl"
+
+    def path(self, month: str) -> Path:
+        """The month's file: `YYYY-MM.jsonl`, or `YYYY-MM.jsonl.gz` once compressed."""
+        plain = self._plain(month)
+        packed = plain.with_name(plain.name + PACKED_SUFFIX)
+        return packed if packed.exists() else plain
+
+    def months(self) -> List[str]:
+        if not self.root.is_dir():
+            return []
+        return sorted(name[:-len(".jsonl")] for name in month_files(self.root))
+
+    def sources(self) -> List[Path]:
+        """Folder + partition files: their signatures change on any write."""
+        return [self.root] + [self.path(m) for m in self.months()]
+
+    def is_closed(self, month: str, today: Optional[date] = None) -> bool:
+        return month_closed(month, self.close_after_days, today)
+
+    def for_site(self, site_prefix: str) -> "MonthlyPartitions":
+        """Store holding one site's records (all of them here; see Shared.shards)."""
+        return self
+
+    def fan_out(self, fn: Callable[["MonthlyPartitions"], object]) -> List:
+        return [fn(self)]
+
+    # ===== Reads =====
+    def read(self, month: str) -> List[Dict]:
+        """Records of one month (shared with other readers: copy before editing)."""
+        closed = self.is_closed(month)
+        with self._lock:
+            cached = self._cache.get(month)
+            if cached is not None and closed and cached[0] is None:
+                self._cache.move_to_end(month)
+                return cached[1]
+        path = self.path(month)
+        try:
+            st = path.stat()
+            signature = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return []
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        records = compact(self.compact_as, iter_jsonl(path)) if self.compact_as else list(iter_jsonl(path))
+        with self._lock:
+            # Un mes cerrado no se vuelve a validar contra el archivo
+            self._cache[month] = (None if closed else signature, records)
+            self._cache.move_to_end(month)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return records
+
+    def read_months(self, months: Iterable[str]) -> List[Dict]:
+        out: List[Dict] = []
+        for month in months:
+            out.extend(self.read(month))
+        return out
+
+    def read_range(self, lo: int, hi: int) -> List[Dict]:
+        """Records of the months touching [lo, hi) plus undated ones; callers filter exactly."""
+        wanted = set(months_between(lo, hi)) | {UNDATED}
+        out: List[Dict] = []
+        for month in self.months():
+            if month in wanted:
+                records = self.read(month)
+                # Tabla con columna de tiempo: solo se decodifican las filas del rango
+                out.extend(records.select(lo, hi) if isinstance(records, RecordTable) and records.time_field
+                           else records)
+        return out
+
+    def read_from(self, lo: int) -> Iterator[List[Dict]]:
+        """Months from the one containing `lo` onwards, one list per month."""
+        first = day_of(lo)[:7]
+        for month in self.months():
+            if month != UNDATED and month >= first:
+                yield self.read(month)
+
+    def read_all(self) -> List[Dict]:
+        return self.read_months(self.months())
+
+    # ===== Writes =====
+    def _month(self, record: Dict) -> str:
+        return self.month_of(record) or UNDATED
+
+    def _check_open(self, months: Iterable[str], force: bool):
+        closed = sorted(m for m in set(months) if self.is_closed(m))
+        if closed and not force:
+            raise PartitionClosed(f"{self.root.name}: month(s) {', '.join(closed)} are closed")
+
+    def _forget(self, month: str):
+        with self._lock:
+            self._cache.pop(month, None)
+
+    def append(self, records: List[Dict], force: bool = False):
+        """Append-only write, grouped by month (one write + fsync per month)."""
+        by_month: Dict[str, List[Dict]] = {}
+        for r in records:
+            by_month.setdefault(self._month(r), []).append(r)
+        self._check_open(by_month, force)
+        self.root.mkdir(parents=True, exist_ok=True)
+        for month, batch in sorted(by_month.items()):
+            with locked(self._plain(month)):
+                self._append_month(month, batch)
+            if force:
+                self._forget(month)
+
+    def _append_month(self, month: str, batch: List[Dict]):
+        # Caller holds the month lock
+        path = self.path(month)
+        if path.name.endswith(PACKED_SUFFIX):
+            # Mes comprimido (cerrado, escritura forzada): se recomprime con las lineas agregadas al final,
+            # asi los offsets de nomina/anomalias (bytes sin comprimir) siguen valiendo
+            if batch:
+                with codec.open_file(path, "rb") as f:
+                    data = f.read()
+                data += b"".join(codec.dumps(r) + b"\n" for r in batch)
+                atomic_write_bytes(path, codec.pack(path, data))
+                self._forget(month)
+        else:
+            append_jsonl(path, batch)
+
+    def write_month(self, month: str, records: List[Dict]):
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.path(month)
+        atomic_write_bytes(path, codec.pack(path, b"".join(codec.dumps(r) + b"\n" for r in records)))
+        self._forget(month)
+
+    def compress(self, today: Optional[date] = None) -> List[str]:
+        """Gzip the closed months still stored as plain JSONL; returns the months compressed."""
+        done = []
+        for month in self.months():
+            plain = self._plain(month)
+            if not self.is_closed(month, today) or not plain.exists():
+                continue
+            with locked(plain):
+                codec.compress_file(plain, PACKED_SUFFIX)
+            done.append(month)
+        return done
+
+    def save_changes(self, changes: List[Dict], key: str = "id", force: bool = False,
+                     append_only: bool = False) -> List[str]:
+        """Apply diff_records changes month by month; returns the months written."""
+        if append_only:
+            # Punches: solo altas, agregadas al final (los lectores por offset siguen validos)
+            return self._append_changes(changes, key, force)
+        by_month: Dict[str, List[Dict]] = {}
+        for change in changes:
+            # Un registro que cambio de mes se borra del viejo y se agrega al nuevo
+            base, new = change.get("base"), change.get("new")
+            old_month = self._month(base) if base is not None else None
+            new_month = self._month(new) if new is not None else None
+            if old_month is not None and new_month is not None and old_month != new_month:
+                by_month.setdefault(old_month, []).append({"key": change["key"], "base": base, "new": None})
+                by_month.setdefault(new_month, []).append({"key": change["key"], "base": None, "new": new})
+            else:
+                by_month.setdefault(old_month or new_month, []).append(change)
+        self._check_open(by_month, force)
+        for month, month_changes in sorted(by_month.items()):
+            self.root.mkdir(parents=True, exist_ok=True)
+            with locked(self._plain(month)):
+                path = self.path(month)
+                current = list(iter_jsonl(path))
+                records = apply_diff(current, month_changes, key, path)
+                self.write_month(month, records)
+        return sorted(by_month)
+
+    def _append_changes(self, changes: List[Dict], key: str, force: bool) -> List[str]:
+        by_month: Dict[str, List[Dict]] = {}
+        for change in changes:
+            if change.get("new") is None or change.get("base") is not None:
+                raise ValueError(f"{self.root.name} is append-only: record {change['key']} cannot be "
+                                 "changed or deleted (add a correcting record instead)")
+            by_month.setdefault(self._month(change["new"]), []).append(change["new"])
+        self._check_open(by_month, force)
+        self.root.mkdir(parents=True, exist_ok=True)
+        for month, records in sorted(by_month.items()):
+            with locked(self._plain(month)):
+                path = self.path(month)
+                existing = {record_key(r, key): r for r in iter_jsonl(path)}
+                batch = []
+                for r in records:
+                    current = existing.get(record_key(r, key))
+                    if current is None:
+                        batch.append(r)
+                    elif current != r:
+                        raise ValueError(f"{self.root.name} is append-only: record {record_key(r, key)} "
+                                         "already exists with other values")
+                self._append_month(month, batch)
+        return sorted(by_month)
+
+    def save_all(self, records: List[Dict], key: str = "id", force: bool = False) -> List[str]:
+        """Replace the whole dataset, rewriting only the months whose content changed."""
+        by_month: Dict[str, List[Dict]] = {}
+        for r in records:
+            by_month.setdefault(self._month(r), []).append(r)
+        changed = [m for m in set(by_month) | set(self.months())
+                   if by_month.get(m, []) != self.read(m)]
+        self._check_open(changed, force)
+        self.root.mkdir(parents=True, exist_ok=True)
+        for month in sorted(changed):
+            with locked(self._plain(month)):
+                self.write_month(month, by_month.get(month, []))
+        return sorted(changed)
+
+
+_STORES: Dict[Tuple[str, str], MonthlyPartitions] = {}
+_STORES_GUARD = threading.Lock()
+
+
+def open_partitions(data_dir: Path, dataset: str) -> Optional[MonthlyPartitions]:
+    """Process-wide store for a dataset (split by site with a shard map), or None if not partitioned."""
+    root = Path(data_dir) / PARTITION_DIRS[dataset]
+    if not root.is_dir():
+        return None
+    from Shared.shards import SHARD_MAP_NAME, open_shards
+
+    if (Path(data_dir) / SHARD_MAP_NAME).exists():
+        return open_shards(data_dir, dataset)
+    with _STORES_GUARD:
+        # Una sola instancia por carpeta: la cache de meses cerrados se comparte
+        key = (str(root.resolve()), dataset)
+        if key not in _STORES:
+            _STORES[key] = MonthlyPartitions(root, MONTH_OF[dataset], compact_as=dataset)
+        return _STORES[key]
+
+
+def iter_appended(source: Path, offsets: Dict[str, int], skip_rewritten: bool = False) -> Iterator[Dict]:
+    """Records appended to a JSONL file or a partition folder since `offsets` (updated in place).
+
+    Offsets are keyed by the path inside the folder (`2026-10.jsonl`, `<shard>/2026-10.jsonl`) and count
+    uncompressed bytes. A file shorter than its offset raises ValueError, or with `skip_rewritten` is
+    followed from its new end.
+    """
+    source = Path(source)
+    if source.is_dir():
+        files = {**month_files(source), **month_files(source, "*/*.jsonl*")}
+    else:
+        files = {"": source}
+    for name, path in sorted(files.items()):
+        offset = offsets.get(name, 0)
+        try:
+            size = codec.data_size(path)
+        except OSError:
+            continue
+        if size < offset:
+            if not skip_rewritten:
+                raise ValueError(f"{path} is shorter than the recorded offset")
+            offsets[name] = size
+            continue
+        if size == offset:
+            continue
+        with codec.open_file(path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # ultima linea aun incompleta
+                offset += len(line)
+                offsets[name] = offset
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield codec.loads(line)
+                except ValueError:
+                    continue
+
+
+MIGRATE_BATCH = 50_000
+
+
+def _split_by_month(records: Iterable[Dict], month_of: Callable[[Dict], Optional[str]], root: Path) -> List[str]:
+    # Se reparte por mes en lotes acotados, agregando al final de cada archivo
+    months = set()
+    by_month: Dict[str, List[Dict]] = {}
+    pending = 0
+    for r in records:
+        if not isinstance(r, dict):
+            continue
+        by_month.setdefault(month_of(r) or UNDATED, []).append(r)
+        pending += 1
+        if pending >= MIGRATE_BATCH:
+            for month, batch in by_month.items():
+                append_jsonl(root / f"{month}.jsonl", batch)
+            months.update(by_month)
+            by_month, pending = {}, 0
+    for month, batch in by_month.items():
+        append_jsonl(root / f"{month}.jsonl", batch)
+    months.update(by_month)
+    return sorted(months)
+
+
+def migrate(data_dir: Path) -> Dict[str, Dict[str, int]]:
+    """Split time_logs.json + time_logs.jsonl and work_schedules.json into monthly partitions.
+
+    The inputs are streamed; only one month is held in memory (to drop ids repeated by the journal).
+    The payroll rollup and the anomaly detector are pointed at the end of every partition.
+    """
+    import shutil
+
+    from Shared.anomaly import STATE_NAME, AnomalyDetector
+    from Shared.payroll import ROLLUP_NAME, PayrollRollup
+
+    data_dir = Path(data_dir)
+    journal = data_dir / JOURNAL_NAME
+    legacy = data_dir / "time_logs.json"
+    report = {}
+    # Se valida todo antes de escribir nada: nunca queda un dataset migrado y el otro no
+    for dirname in PARTITION_DIRS.values():
+        root = data_dir / dirname
+        if month_files(root) or month_files(root, "*/*.jsonl*"):
+            raise ValueError(f"{root} already has partitions; remove it to migrate again.")
+
+    rollup_path = data_dir / ROLLUP_NAME
+    rollup = PayrollRollup.load(rollup_path)
+    rollup.catch_up(journal, legacy)
+    detector = AnomalyDetector()
+    detector.restore(data_dir / STATE_NAME)
+    detector.catch_up(journal)
+
+    sources = {
+        "time_logs": lambda: chain(iter_json_records(codec.resolve(legacy)), iter_jsonl(journal)),
+        "schedules": lambda: iter_json_records(codec.resolve(data_dir / "work_schedules.json")),
+    }
+    for dataset, records in sources.items():
+        root = data_dir / PARTITION_DIRS[dataset]
+        # Se arma en una carpeta aparte y se renombra al final: la app nunca ve una migracion a medias
+        staging = root.with_name(root.name + ".migrating")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        store = MonthlyPartitions(staging, MONTH_OF[dataset])
+        report[dataset] = {}
+        for month in _split_by_month(records(), MONTH_OF[dataset], staging):
+            unique, seen = [], set()
+            for r in iter_jsonl(store.path(month)):
+                k = record_key(r, "id")
+                if k not in seen:  # el journal puede repetir un punch ya copiado al legado
+                    seen.add(k)
+                    unique.append(r)
+            store.write_month(month, unique)
+            report[dataset][month] = len(unique)
+        shutil.rmtree(root, ignore_errors=True)
+        staging.rename(root)
+
+    offsets = {p.name: p.stat().st_size for p in (data_dir / PARTITION_DIRS["time_logs"]).glob("*.jsonl")}
+    rollup.partition_offsets = dict(offsets)
+    rollup.save(rollup_path)
+    detector.partition_offsets = dict(offsets)
+    detector.save(data_dir / STATE_NAME)
+    return report
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Monthly partitions for time logs and work schedules")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_migrate = sub.add_parser("migrate", help="split the JSON files into monthly partitions")
+    p_migrate.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR)
+    p_list = sub.add_parser("list", help="show partitions and record counts")
+    p_list.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR)
+    p_compress = sub.add_parser("compress", help="gzip the closed months (still read transparently)")
+    p_compress.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == "migrate":
+        try:
+            report = migrate(args.data_dir)
+        except ValueError as e:
+            parser.exit(1, f"{e}\n")
+        for dataset, months in report.items():
+            print(f"{dataset}: {sum(months.values())} records in {len(months)} partitions")
+    elif args.command == "compress":
+        for dataset in PARTITION_DIRS:
+            store = open_partitions(args.data_dir, dataset)
+            if store is None:
+                print(f"{dataset}: not partitioned")
+                continue
+            months = store.compress()
+            print(f"{dataset}: {len(months)} closed month(s) compressed")
+    else:
+        for dataset in PARTITION_DIRS:
+            store = open_partitions(args.data_dir, dataset)
+            if store is None:
+                print(f"{dataset}: not partitioned")
+                continue
+            for month in store.months():
+                state = "closed" if store.is_closed(month) else "open"
+                print(f"{dataset}/{month}.jsonl  {len(store.read(month)):>8}  {state}")
+
+
+if __name__ == "__main__":
+    main()
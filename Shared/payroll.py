@@ -0,0 +1,263 @@
+import json
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from Shared.filestore import atomic_write_json, iter_json_records, locked
+from Shared.partitions import iter_appended
+from Shared.timeutil import day_of, parse_epoch
+from Shared.warmup import files_signature
+
+ROLLUP_NAME = "payroll_rollups.json"
+DAY = 86400
+
+
+def _key(officer_id: str, site_prefix: str) -> str:
+    return f"{officer_id}|{site_prefix}"
+
+
+def _split_key(key: str) -> Tuple[str, str]:
+    officer_id, _, site_prefix = key.partition("|")
+    return officer_id, site_prefix
+
+
+def _merge_periods(*lists: List[Dict]) -> List[Dict]:
+    # Un periodo por (start, end): gana el cerrado mas tarde
+    by_range: Dict[Tuple, Dict] = {}
+    for periods in lists:
+        for period in periods:
+            key = (period.get("start"), period.get("end"))
+            if key not in by_range or period.get("closed_at", "") >= by_range[key].get("closed_at", ""):
+                by_range[key] = period
+    return sorted(by_range.values(), key=lambda p: p.get("closed_at", ""))
+
+
+class PayrollRollup:
+    """Worked seconds per officer, site and day, applied punch by punch from the journal."""
+
+    def __init__(self):
+        # "YYYY-MM-DD" -> {"officer|site": segundos}
+        self.daily: Dict[str, Dict[str, int]] = {}
+        # officer_id -> [site_prefix, epoch del clock-in abierto]
+        self.open_shifts: Dict[str, List] = {}
+        self.journal_offset = 0
+        # Con time_logs particionado por mes: bytes aplicados de cada archivo
+        self.partition_offsets: Dict[str, int] = {}
+        self.legacy_applied = False
+        # [mtime_ns, size] del JSON legado cuando se aplico ([] si no existia): si cambia, se reconstruye todo
+        self.legacy_signature: Optional[List[int]] = None
+        self.closed_periods: List[Dict] = []
+        self.orphan_outs = 0
+        self._dirty = False
+        self._last_save = 0.0
+
+    # ===== Incremental updates =====
+    def apply(self, punch: Dict):
+        officer_id = punch.get("officer_id")
+        ts = parse_epoch(punch.get("ts"))
+        if not officer_id or ts is None:
+            return
+        event = punch.get("event")
+        if event == "in":
+            # Un segundo "in" sin "out" reemplaza al anterior (lo marca el detector de anomalias)
+            self.open_shifts[officer_id] = [punch.get("site_prefix", ""), ts]
+        elif event == "out":
+            opened = self.open_shifts.pop(officer_id, None)
+            if opened is None or ts <= opened[1]:
+                self.orphan_outs += 1
+            else:
+                self._add_interval(officer_id, opened[0], opened[1], ts)
+        self._dirty = True
+
+    def apply_many(self, punches: Iterable[Dict]):
+        for punch in punches:
+            self.apply(punch)
+
+    def _add_interval(self, officer_id: str, site_prefix: str, start: int, end: int):
+        key = _key(officer_id, site_prefix)
+        # Los turnos que cruzan medianoche se reparten entre ambos dias
+        while start < end:
+            day_end = start - start % DAY + DAY
+            chunk_end = min(end, day_end)
+            bucket = self.daily.setdefault(day_of(start), {})
+            bucket[key] = bucket.get(key, 0) + (chunk_end - start)
+            start = chunk_end
+
+    def reset(self):
+        """Drop every applied punch (closed periods are kept) so the next catch_up starts over."""
+        self.daily = {}
+        self.open_shifts = {}
+        self.orphan_outs = 0
+        self.journal_offset = 0
+        self.partition_offsets = {}
+        self.legacy_applied = False
+        self.legacy_signature = None
+        self._dirty = True
+
+    def catch_up(self, journal_path: Path, legacy_path: Optional[Path] = None) -> int:
+        """Apply punches appended to the journal since the last call. Returns how many.
+
+        When the legacy JSON changed since it was applied (an edit saved by the app),
+        the rollup is rebuilt from scratch. Once time_logs is partitioned the partitions
+        hold the legacy punches too, so the legacy file is no longer checked.
+        """
+        applied = 0
+        journal_path = Path(journal_path)
+        if legacy_path is not None:
+            # Firma antes de leer: en el peor caso se reconstruye una vez de mas
+            signature = list(files_signature([Path(legacy_path)])[0] or ())
+            if self.legacy_applied and not journal_path.is_dir() and signature != self.legacy_signature:
+                if self.legacy_signature is None:
+                    self.legacy_signature = signature  # snapshot anterior a la firma: se adopta
+                else:
+                    self.reset()
+            if not self.legacy_applied:
+                # El JSON legado se recorre registro a registro, sin cargarlo entero
+                for punch in iter_json_records(Path(legacy_path)):
+                    if isinstance(punch, dict):
+                        self.apply(punch)
+                        applied += 1
+                self.legacy_applied = True
+                self.legacy_signature = signature
+                self._dirty = True
+
+        if journal_path.is_dir():
+            for punch in iter_appended(journal_path, self.partition_offsets):
+                self.apply(punch)
+                applied += 1
+            return applied
+        if not journal_path.exists():
+            return applied
+        size = journal_path.stat().st_size
+        if size < self.journal_offset:
+            # El journal fue truncado/rotado: no se puede continuar desde el offset
+            raise ValueError(f"{journal_path} is shorter than the recorded offset; rebuild the rollup.")
+        if size == self.journal_offset:
+            return applied
+        with open(journal_path, "rb") as f:
+            f.seek(self.journal_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # ultima linea aun incompleta
+                self.journal_offset += len(line)
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    self.apply(json.loads(line))
+                except ValueError:
+                    continue
+                applied += 1
+        return applied
+
+    # ===== Queries =====
+    def period_totals(self, start_day: str, end_day: str) -> Dict[Tuple[str, str], int]:
+        """Worked seconds per (officer_id, site_prefix) for days in [start_day, end_day]."""
+        totals: Dict[Tuple[str, str], int] = {}
+        day = date.fromisoformat(start_day)
+        last = date.fromisoformat(end_day)
+        while day <= last:
+            for key, seconds in self.daily.get(day.isoformat(), {}).items():
+                pair = _split_key(key)
+                totals[pair] = totals.get(pair, 0) + seconds
+            day += timedelta(days=1)
+        return totals
+
+    def period_rows(self, start_day: str, end_day: str, site_prefix: str = "") -> List[Dict]:
+        rows = []
+        for (officer_id, site), seconds in sorted(self.period_totals(start_day, end_day).items()):
+            if site_prefix and site != site_prefix:
+                continue
+            rows.append({"officer_id": officer_id, "site_prefix": site, "hours": round(seconds / 3600, 2)})
+        return rows
+
+    def close_period(self, start_day: str, end_day: str) -> Dict:
+        closed = {
+            "start": start_day,
+            "end": end_day,
+            "closed_at": datetime.now().isoformat(timespec="seconds"),
+            "rows": self.period_rows(start_day, end_day),
+        }
+        self.closed_periods = [p for p in self.closed_periods
+                               if not (p.get("start") == start_day and p.get("end") == end_day)]
+        self.closed_periods.append(closed)
+        self._dirty = True
+        return closed
+
+    # ===== Persistence =====
+    def to_dict(self) -> Dict:
+        return {
+            "journal_offset": self.journal_offset,
+            "partition_offsets": self.partition_offsets,
+            "legacy_applied": self.legacy_applied,
+            "legacy_signature": self.legacy_signature,
+            "orphan_outs": self.orphan_outs,
+            "open_shifts": self.open_shifts,
+            "daily": self.daily,
+            "closed_periods": self.closed_periods,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "PayrollRollup":
+        rollup = cls()
+        rollup.journal_offset = int(data.get("journal_offset", 0))
+        rollup.partition_offsets = {k: int(v) for k, v in data.get("partition_offsets", {}).items()}
+        rollup.legacy_applied = bool(data.get("legacy_applied", False))
+        rollup.legacy_signature = data.get("legacy_signature")
+        rollup.orphan_outs = int(data.get("orphan_outs", 0))
+        rollup.open_shifts = dict(data.get("open_shifts", {}))
+        rollup.daily = dict(data.get("daily", {}))
+        rollup.closed_periods = list(data.get("closed_periods", []))
+        return rollup
+
+    @classmethod
+    def load(cls, path: Path) -> "PayrollRollup":
+        path = Path(path)
+        if not path.exists():
+            return cls()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls.from_dict(json.load(f))
+        except ValueError:
+            # Snapshot corrupto: se reconstruye desde el journal
+            return cls()
+
+    def _progress(self) -> Tuple[bool, int]:
+        return self.legacy_applied, self.journal_offset + sum(self.partition_offsets.values())
+
+    def save(self, path: Path):
+        """Write the snapshot, keeping the periods closed by other writers (service and app sessions)."""
+        path = Path(path)
+        with locked(path):
+            current = PayrollRollup.load(path)
+            self.closed_periods = _merge_periods(current.closed_periods, self.closed_periods)
+            # Si otro proceso ya aplico mas del journal, el archivo no retrocede
+            state = current if current._progress() > self._progress() else self
+            atomic_write_json(path, dict(state.to_dict(), closed_periods=self.closed_periods), indent=None)
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+    def save_if_due(self, path: Path, min_interval: float = 5.0) -> bool:
+        if self._dirty and time.monotonic() - self._last_save >= min_interval:
+            self.save(path)
+            return True
+        return False
+
+
+def attach_to_ingestor(ingestor, data_dir: Path, min_interval: float = 5.0) -> PayrollRollup:
+    """Keep a rollup updated from every batch the ingestion service commits."""
+    data_dir = Path(data_dir)
+    rollup_path = data_dir / ROLLUP_NAME
+    legacy_path = data_dir / "time_logs.json"
+    rollup = PayrollRollup.load(rollup_path)
+    rollup.catch_up(ingestor.journal_path, legacy_path)
+    rollup.save(rollup_path)
+
+    def _on_commit(batch):
+        # El callback corre dentro del lock de commit: el journal termina en este batch
+        rollup.catch_up(ingestor.journal_path, legacy_path)
+        rollup.save_if_due(rollup_path, min_interval)
+
+    ingestor.on_commit.append(_on_commit)
+    return rollup
@@ -0,0 +1,113 @@
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from typing import Dict, List, Optional
+
+RING_SIZE = 2048
+
+
+class Metric:
+    """Ring buffer of the last RING_SIZE durations (ms) plus lifetime totals."""
+
+    __slots__ = ("samples", "count", "total_ms")
+
+    def __init__(self, size: int = RING_SIZE):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def add(self, ms: float):
+        # deque.append es atomico en CPython: sin lock en el camino caliente
+        self.samples.append(ms)
+        self.count += 1
+        self.total_ms += ms
+
+    def summary(self) -> Dict:
+        values = sorted(self.samples)
+        if not values:
+            return {"count": self.count}
+
+        def pct(q: float) -> float:
+            return values[min(len(values) - 1, int(q * len(values)))]
+
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+            "max_ms": values[-1],
+        }
+
+
+class PerfRegistry:
+    """Process-wide timings and counters (shared by every Streamlit session)."""
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+        self.counters: Dict[str, int] = {}
+        self.enabled = True
+
+    def metric(self, name: str) -> Metric:
+        m = self.metrics.get(name)
+        if m is None:
+            m = self.metrics.setdefault(name, Metric())
+        return m
+
+    def record(self, name: str, ms: float):
+        if self.enabled:
+            self.metric(name).add(ms)
+
+    def incr(self, name: str, n: int = 1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self) -> Dict:
+        return {
+            "metrics": {name: m.summary() for name, m in sorted(self.metrics.items())},
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def rows(self) -> List[Dict]:
+        return [dict(name=name, **summary) for name, summary in self.snapshot()["metrics"].items()]
+
+    def dump_json(self, path: Optional[Path] = None) -> str:
+        data = json.dumps(self.snapshot(), indent=2)
+        if path is not None:
+            Path(path).write_text(data, encoding="utf-8")
+        return data
+
+    def reset(self):
+        self.metrics.clear()
+        self.counters.clear()
+
+
+PERF = PerfRegistry()
+
+
+@contextmanager
+def timer(name: str, registry: PerfRegistry = PERF):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.record(name, (time.perf_counter() - t0) * 1000)
+
+
+def timed(name: Optional[str] = None, registry: PerfRegistry = PERF):
+    """Decorator: record each call's duration under `name` (default: qualified name)."""
+    def decorator(fn):
+        label = name or fn.__qualname__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                registry.record(label, (time.perf_counter() - t0) * 1000)
+        return wrapper
+    return decorator
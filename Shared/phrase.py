@@ -1,7 +1,8 @@
-import json
 from pathlib import Path
 import streamlit as st
 
+from Shared import codec
+
 def filter_phrases_by_site(phrases: list, site_info: dict):
     return [
         p for p in phrases
@@ -23,5 +24,4 @@ def get_hotwords(phrases: list):
 
 def save_phrase(path: Path, phrases: list, new_phrase: dict):
     phrases.append(new_phrase)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(phrases, f, indent=2, ensure_ascii=False)
+    codec.dump(path, phrases, codec.indent_for("phrases"))
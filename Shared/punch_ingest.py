@@ -0,0 +1,353 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from itertools import chain
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from Shared import codec
+from Shared.filestore import iter_json_records
+from Shared.timeutil import epoch_to_iso, parse_epoch
+
+DEFAULT_DATA_DIR = Path(__file__).resolve().parent.parent / "shoppingCenter" / "data"
+JOURNAL_NAME = "time_logs.jsonl"
+PUNCH_EVENTS = ("in", "out")
+# Ids recordados para descartar reintentos (los mas recientes)
+DEDUPE_WINDOW = 200_000
+# Espera maxima entre reintentos de un commit fallido (backoff exponencial)
+RETRY_MAX_S = 5.0
+# Rangos de tickets fallidos que se recuerdan para responder a wait_committed
+FAILED_WINDOW = 1_000
+
+log = logging.getLogger(__name__)
+
+
+class PunchError(ValueError):
+    pass
+
+
+def normalize_punch(payload: Dict, idempotency_key: str = "") -> Dict:
+    """Validate a clock event posted by a device and return the stored record."""
+    if not isinstance(payload, dict):
+        raise PunchError("Each punch must be a JSON object.")
+    officer_id = str(payload.get("officer_id") or "").strip()
+    site_prefix = str(payload.get("site_prefix") or "").strip()
+    event = str(payload.get("event") or "").strip().lower()
+    if not officer_id or not site_prefix:
+        raise PunchError("officer_id and site_prefix are required.")
+    if event not in PUNCH_EVENTS:
+        raise PunchError(f"event must be one of {PUNCH_EVENTS}.")
+    ts = parse_epoch(payload.get("ts")) if payload.get("ts") not in (None, "") else int(time.time())
+    if ts is None:
+        raise PunchError(f"Invalid ts: {payload.get('ts')!r}")
+
+    key = str(payload.get("id") or payload.get("idempotency_key") or idempotency_key or "").strip()
+    if not key:
+        # Reintentos sin llave: mismo oficial/sitio/evento/instante = mismo punch
+        key = hashlib.sha1(f"{officer_id}|{site_prefix}|{event}|{ts}".encode("utf-8")).hexdigest()[:16]
+    return {
+        "id": key,
+        "officer_id": officer_id,
+        "site_prefix": site_prefix,
+        "event": event,
+        "ts": epoch_to_iso(ts),
+        "device": str(payload.get("device") or ""),
+        "received_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def append_jsonl(path: Path, records: List[Dict]):
+    """Group commit: one write + fsync for the whole batch."""
+    if not records:
+        return
+    data = b"".join(codec.dumps(r) + b"\n" for r in records)
+    with open(path, "ab") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def iter_jsonl(path: Path) -> Iterator[Dict]:
+    if not path.exists():
+        return
+    with codec.open_file(path, "rt") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    yield codec.loads(line)
+                except ValueError:
+                    # Linea truncada por un corte de luz: se ignora
+                    continue
+
+
+class PunchIngestor:
+    """Punch buffer flushed to the journal every `batch_size` events or `flush_ms` ms (group commit)."""
+
+    def __init__(self, journal_path: Path, batch_size: int = 500, flush_ms: int = 200,
+                 known_ids: Iterable[str] = (), partitions=None, dedupe_window: int = DEDUPE_WINDOW):
+        self.journal_path = Path(journal_path)
+        # MonthlyPartitions: cada batch se agrega al archivo del mes de cada punch
+        self.partitions = partitions
+        self.batch_size = max(1, int(batch_size))
+        self.flush_ms = max(1, int(flush_ms))
+        self.on_commit: List[Callable[[List[Dict]], None]] = []
+
+        self.dedupe_window = max(1, int(dedupe_window))
+        self._seen = set()
+        self._seen_order = deque()
+        for key in known_ids:
+            self._remember(key)
+        self._buffer: List[Dict] = []
+        self._cond = threading.Condition()
+        self._commit_lock = threading.Lock()
+        self._submitted_seq = 0
+        self._committed_seq = 0
+        self._closed = False
+        self._error: Optional[Exception] = None
+        self._retry_delay = 0.0
+        self._retry_at = 0.0
+        # (primer seq, ultimo seq, error) de los batches descartados
+        self._failed = deque(maxlen=FAILED_WINDOW)
+        self._thread = threading.Thread(target=self._run, name="punch-flusher", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def for_data_dir(cls, data_dir: Path, **kwargs) -> "PunchIngestor":
+        from Shared.partitions import open_partitions
+
+        data_dir = Path(data_dir)
+        store = open_partitions(data_dir, "time_logs")
+        if store is not None:
+            # Solo los meses abiertos: un punch de un mes cerrado se rechaza antes de deduplicar
+            records = (r for month in store.months() if not store.is_closed(month) for r in store.read(month))
+            known = (str(r["id"]) for r in records if r.get("id"))
+            return cls(store.root, known_ids=known, partitions=store, **kwargs)
+        journal = data_dir / JOURNAL_NAME
+        # Registro a registro: la ventana se queda con los ultimos ids
+        records = chain(iter_json_records(codec.resolve(data_dir / "time_logs.json")), iter_jsonl(journal))
+        known = (str(r["id"]) for r in records if isinstance(r, dict) and r.get("id"))
+        return cls(journal, known_ids=known, **kwargs)
+
+    def _remember(self, key: str):
+        if key in self._seen:
+            return
+        self._seen.add(key)
+        self._seen_order.append(key)
+        if len(self._seen_order) > self.dedupe_window:
+            self._seen.discard(self._seen_order.popleft())
+
+    def check_open(self, records: List[Dict]):
+        """Reject punches for months whose partition is already closed."""
+        if self.partitions is None:
+            return
+        for rec in records:
+            month = rec["ts"][:7]
+            if self.partitions.is_closed(month):
+                raise PunchError(f"Punch {rec['id']} falls in {month}, which is closed.")
+
+    def submit(self, records: List[Dict]) -> Tuple[int, int, int]:
+        """Buffer normalized records. Returns (accepted, duplicates, ticket)."""
+        accepted = duplicates = 0
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Ingestor is closed.")
+            for rec in records:
+                if rec["id"] in self._seen:
+                    duplicates += 1
+                    continue
+                self._remember(rec["id"])
+                self._buffer.append(rec)
+                accepted += 1
+            self._submitted_seq += accepted
+            ticket = self._submitted_seq
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify_all()
+        return accepted, duplicates, ticket
+
+    def wait_committed(self, ticket: int, timeout: float = 5.0) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._committed_seq < ticket and self._error is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return self._committed_seq >= ticket and self._failure(ticket) is None
+
+    def ticket_error(self, ticket: int) -> Optional[Exception]:
+        """Error that made the batch holding `ticket` fail for good (None if it did not)."""
+        with self._cond:
+            return self._failure(ticket)
+
+    def _failure(self, ticket: int) -> Optional[Exception]:
+        # Un submit nunca se reparte entre dos batches: basta con su ultimo seq
+        for first, last, error in self._failed:
+            if first <= ticket <= last:
+                return error
+        return None
+
+    def flush(self):
+        # El buffer se toma dentro del lock de commit para mantener el orden FIFO
+        with self._commit_lock:
+            with self._cond:
+                batch, self._buffer = self._buffer, []
+            if batch:
+                self._commit(batch)
+
+    def _commit(self, batch: List[Dict]):
+        try:
+            if self.partitions is not None:
+                self.partitions.append(batch)
+            else:
+                append_jsonl(self.journal_path, batch)
+        except OSError as e:
+            with self._cond:
+                # Error transitorio (disco, lock): se devuelven al buffer y se reintenta con backoff
+                self._buffer[:0] = batch
+                self._error = e
+                self._retry_delay = min(RETRY_MAX_S, max(self.flush_ms / 1000.0, self._retry_delay * 2))
+                self._retry_at = time.monotonic() + self._retry_delay
+                self._cond.notify_all()
+            log.warning("Punch commit failed, retrying in %.1fs: %s", self._retry_delay, e)
+            return
+        except Exception as e:
+            # PartitionClosed y similares no se arreglan reintentando: fallan los tickets del batch
+            log.error("Punch commit failed, dropping %d punches: %s", len(batch), e)
+            with self._cond:
+                first = self._committed_seq + 1
+                self._committed_seq += len(batch)
+                self._failed.append((first, self._committed_seq, e))
+                for rec in batch:
+                    # Un reintento del dispositivo no debe tomarse como duplicado
+                    self._seen.discard(rec["id"])
+                self._cond.notify_all()
+            return
+        with self._cond:
+            self._error = None
+            self._retry_delay = 0.0
+            self._committed_seq += len(batch)
+            self._cond.notify_all()
+        for callback in list(self.on_commit):
+            try:
+                callback(batch)
+            except Exception:
+                log.exception("on_commit callback failed")
+
+    def _run(self):
+        interval = self.flush_ms / 1000.0
+        while True:
+            with self._cond:
+                backoff = self._retry_at - time.monotonic()
+                if not self._closed and backoff > 0:
+                    # Tras un commit fallido no se reintenta antes de tiempo aunque el buffer este lleno
+                    self._cond.wait(backoff)
+                    continue
+                if not self._closed and len(self._buffer) < self.batch_size:
+                    self._cond.wait(interval)
+                closing = self._closed
+            self.flush()
+            if closing:
+                return
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self.flush()
+
+
+def make_handler(ingestor: PunchIngestor, wait_timeout: float = 5.0):
+    class PunchHandler(BaseHTTPRequestHandler):
+        server_version = "AmdaOpsPunch/1.0"
+
+        def _reply(self, status: int, body: Dict):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/health":
+                self._reply(200, {"status": "ok"})
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path.rstrip("/") not in ("/punch", "/punches"):
+                self._reply(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"null")
+                items = payload if isinstance(payload, list) else [payload]
+                key = self.headers.get("Idempotency-Key", "")
+                # La llave del header solo aplica a un punch individual
+                records = [normalize_punch(p, key if len(items) == 1 else "") for p in items]
+                ingestor.check_open(records)
+            except (ValueError, PunchError) as e:
+                self._reply(400, {"error": str(e)})
+                return
+
+            accepted, duplicates, ticket = ingestor.submit(records)
+            if accepted and not ingestor.wait_committed(ticket, wait_timeout):
+                error = ingestor.ticket_error(ticket)
+                if error is not None:
+                    self._reply(400 if isinstance(error, ValueError) else 500, {"error": str(error)})
+                    return
+                self._reply(503, {"error": "commit timeout", "accepted": accepted})
+                return
+            self._reply(201 if accepted else 200, {"accepted": accepted, "duplicates": duplicates})
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return PunchHandler
+
+
+def serve(data_dir: Path = DEFAULT_DATA_DIR, host: str = "127.0.0.1", port: int = 8765,
+          batch_size: int = 500, flush_ms: int = 200):
+    # Imports locales: payroll/anomaly no son requisito para usar solo el ingestor
+    from Shared import anomaly, payroll
+
+    ingestor = PunchIngestor.for_data_dir(data_dir, batch_size=batch_size, flush_ms=flush_ms)
+    rollup = payroll.attach_to_ingestor(ingestor, data_dir)
+    detector, stop_sweep = anomaly.attach_to_ingestor(ingestor, data_dir)
+    httpd = ThreadingHTTPServer((host, port), make_handler(ingestor))
+    httpd.daemon_threads = True
+    print(f"[punch_ingest] listening on http://{host}:{port}/punch -> {ingestor.journal_path}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        ingestor.close()
+        stop_sweep()
+        rollup.save(Path(data_dir) / payroll.ROLLUP_NAME)
+        detector.save(Path(data_dir) / anomaly.STATE_NAME)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="AmdaOps clock-in/clock-out ingestion service")
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--batch-size", type=int, default=500, help="commit every N events")
+    parser.add_argument("--flush-ms", type=int, default=200, help="commit at least every T milliseconds")
+    args = parser.parse_args(argv)
+    serve(args.data_dir, args.host, args.port, args.batch_size, args.flush_ms)
+
+
+if __name__ == "__main__":
+    main()
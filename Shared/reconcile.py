@@ -0,0 +1,267 @@
+import argparse
+import json
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from Shared.timeutil import epoch_to_iso, parse_epoch, shift_bounds
+
+try:
+    import pandas as pd
+except Exception:
+    pd = None
+
+ON_TIME = "on-time"
+LATE = "late"
+EARLY_OUT = "early-out"
+NO_SHOW = "no-show"
+UNSCHEDULED = "unscheduled"
+STATUSES = (ON_TIME, LATE, EARLY_OUT, NO_SHOW, UNSCHEDULED)
+
+
+def pair_punches(punches: Iterable[Dict]) -> List[Dict]:
+    """in/out punches -> worked intervals sorted by (officer_id, start); end=None while still open."""
+    events = []
+    for p in punches:
+        ts = parse_epoch(p.get("ts"))
+        if ts is None or not p.get("officer_id") or p.get("event") not in ("in", "out"):
+            continue
+        events.append((p["officer_id"], ts, p["event"], p.get("site_prefix", "")))
+    events.sort()
+
+    intervals = []
+    open_in: Optional[Tuple[str, int, str]] = None
+    for officer_id, ts, event, site in events:
+        if open_in and open_in[0] != officer_id:
+            intervals.append({"officer_id": open_in[0], "site_prefix": open_in[2], "start": open_in[1], "end": None})
+            open_in = None
+        if event == "in":
+            if open_in:
+                intervals.append({"officer_id": officer_id, "site_prefix": open_in[2], "start": open_in[1], "end": None})
+            open_in = (officer_id, ts, site)
+        elif open_in:
+            intervals.append({"officer_id": officer_id, "site_prefix": open_in[2], "start": open_in[1], "end": ts})
+            open_in = None
+    if open_in:
+        intervals.append({"officer_id": open_in[0], "site_prefix": open_in[2], "start": open_in[1], "end": None})
+    return intervals
+
+
+def sorted_shifts(shifts: Iterable[Dict]) -> List[Tuple[str, int, int, Dict]]:
+    rows = []
+    for s in shifts:
+        bounds = shift_bounds(s)
+        if bounds and s.get("officer_id"):
+            rows.append((s["officer_id"], bounds[0], bounds[1], s))
+    rows.sort(key=lambda r: (r[0], r[1]))
+    return rows
+
+
+def _merge_groups(shift_rows: List[Tuple], intervals: List[Dict]) -> Iterator[Tuple[str, List, List]]:
+    """Walk both (officer_id, start)-sorted inputs once, yielding one officer at a time."""
+    i = j = 0
+    while i < len(shift_rows) or j < len(intervals):
+        a = shift_rows[i][0] if i < len(shift_rows) else None
+        b = intervals[j]["officer_id"] if j < len(intervals) else None
+        officer = min(x for x in (a, b) if x is not None)
+        i0 = i
+        while i < len(shift_rows) and shift_rows[i][0] == officer:
+            i += 1
+        j0 = j
+        while j < len(intervals) and intervals[j]["officer_id"] == officer:
+            j += 1
+        yield officer, shift_rows[i0:i], intervals[j0:j]
+
+
+def _row(status: str, officer_id: str, shift: Optional[Dict], sched: Tuple[Optional[int], Optional[int]],
+         actual: Tuple[Optional[int], Optional[int]], site: str, late: int = 0, early: int = 0) -> Dict:
+    return {
+        "status": status,
+        "officer_id": officer_id,
+        "site_prefix": (shift or {}).get("site_prefix", site),
+        "shift_id": (shift or {}).get("id", ""),
+        "scheduled_start": epoch_to_iso(sched[0]) if sched[0] is not None else "",
+        "scheduled_end": epoch_to_iso(sched[1]) if sched[1] is not None else "",
+        "actual_start": epoch_to_iso(actual[0]) if actual[0] is not None else "",
+        "actual_end": epoch_to_iso(actual[1]) if actual[1] is not None else "",
+        "late_minutes": late,
+        "early_minutes": early,
+    }
+
+
+def _classify(sched_start, sched_end, actual_start, actual_end, grace: int) -> Tuple[str, int, int]:
+    late = max(0, actual_start - sched_start)
+    early = max(0, sched_end - actual_end) if actual_end is not None else 0
+    late_min, early_min = late // 60, early // 60
+    if late > grace:
+        return LATE, late_min, early_min
+    if early > grace:
+        return EARLY_OUT, late_min, early_min
+    return ON_TIME, late_min, early_min
+
+
+def reconcile(shifts: Iterable[Dict], punches: Iterable[Dict], grace_minutes: int = 5,
+              window_minutes: int = 120) -> List[Dict]:
+    """Sort-merge join of scheduled shifts and worked intervals by (officer_id, start)."""
+    # Un intervalo cuenta para un turno si cae dentro del turno +/- window; las pausas se unen
+    grace = grace_minutes * 60
+    window = window_minutes * 60
+    results = []
+    for officer, group_shifts, group_intervals in _merge_groups(sorted_shifts(shifts), pair_punches(punches)):
+        j = 0
+        for _, start, end, shift in group_shifts:
+            # Intervalos que terminan antes de que este turno pudiera empezar
+            while j < len(group_intervals):
+                iv = group_intervals[j]
+                iv_end = iv["end"] if iv["end"] is not None else iv["start"]
+                if iv_end >= start - window:
+                    break
+                results.append(_row(UNSCHEDULED, officer, None, (None, None), (iv["start"], iv["end"]), iv["site_prefix"]))
+                j += 1
+
+            if j < len(group_intervals) and group_intervals[j]["start"] <= end + window \
+                    and group_intervals[j]["start"] < end:
+                actual_start = group_intervals[j]["start"]
+                actual_end = group_intervals[j]["end"]
+                j += 1
+                # Pausas: varios intervalos dentro del mismo turno
+                while j < len(group_intervals) and group_intervals[j]["start"] < end and actual_end is not None:
+                    actual_end = group_intervals[j]["end"]
+                    j += 1
+                status, late, early = _classify(start, end, actual_start, actual_end, grace)
+                results.append(_row(status, officer, shift, (start, end), (actual_start, actual_end), "", late, early))
+            else:
+                results.append(_row(NO_SHOW, officer, shift, (start, end), (None, None), ""))
+
+        for iv in group_intervals[j:]:
+            results.append(_row(UNSCHEDULED, officer, None, (None, None), (iv["start"], iv["end"]), iv["site_prefix"]))
+    return results
+
+
+def reconcile_frame(shifts: Iterable[Dict], punches: Iterable[Dict], grace_minutes: int = 5,
+                    window_minutes: int = 120):
+    """Vectorized reconcile for bulk historical runs (pandas), with the same matching rules as reconcile()."""
+    if pd is None:
+        raise RuntimeError("pandas is required for reconcile_frame")
+    grace = grace_minutes * 60
+    window = window_minutes * 60
+
+    rows = sorted_shifts(shifts)
+    sdf = pd.DataFrame({
+        "officer_id": pd.Series([r[0] for r in rows], dtype="str"),
+        "start": pd.array([r[1] for r in rows], dtype="int64"),
+        "end": pd.array([r[2] for r in rows], dtype="int64"),
+        "shift_id": [r[3].get("id", "") for r in rows],
+        "site_prefix": [r[3].get("site_prefix", "") for r in rows],
+    })
+    sdf["shift_row"] = range(len(sdf))
+    ivs = pair_punches(punches)
+    idf = pd.DataFrame({
+        "officer_id": pd.Series([iv["officer_id"] for iv in ivs], dtype="str"),
+        "actual_start": pd.array([iv["start"] for iv in ivs], dtype="int64"),
+        "actual_end": pd.array([iv["end"] for iv in ivs], dtype="Int64"),
+        "actual_site": [iv["site_prefix"] for iv in ivs],
+    })
+
+    # Como reconcile(): un intervalo va al primer turno que aun no termino cuando empieza,
+    # si llega (por su fin, o su inicio si sigue abierto) a start - window; sin limite para llegar tarde
+    ivs_df = pd.merge_asof(
+        idf.sort_values("actual_start"), sdf[["officer_id", "start", "end", "shift_row"]].sort_values("end"),
+        left_on="actual_start", right_on="end", by="officer_id", direction="forward", allow_exact_matches=False,
+    ).sort_values(["officer_id", "actual_start"], kind="stable", ignore_index=True)
+    reach = ivs_df["actual_end"].fillna(ivs_df["actual_start"])
+    ivs_df.loc[reach < ivs_df["start"] - window, "shift_row"] = pd.NA
+    # Pausas: los intervalos siguientes del mismo turno se unen hasta el primero sin clock-out
+    matched = ivs_df[ivs_df["shift_row"].notna()]
+    is_open = matched["actual_end"].isna().astype("int64")
+    kept = matched[is_open.groupby(matched["shift_row"]).cumsum() - is_open == 0]
+    first = kept.drop_duplicates("shift_row", keep="first").set_index("shift_row")["actual_start"]
+    last = kept.drop_duplicates("shift_row", keep="last").set_index("shift_row")["actual_end"]
+    merged = sdf.copy()
+    merged["actual_start"] = merged["shift_row"].map(first).astype("Int64")
+    merged["actual_end"] = merged["shift_row"].map(last).astype("Int64")
+
+    late = (merged["actual_start"] - merged["start"]).clip(lower=0)
+    early = (merged["end"] - merged["actual_end"]).clip(lower=0).fillna(0)
+    merged["status"] = ON_TIME
+    merged.loc[early > grace, "status"] = EARLY_OUT
+    merged.loc[late > grace, "status"] = LATE
+    merged.loc[merged["actual_start"].isna(), "status"] = NO_SHOW
+    merged["late_minutes"] = (late.fillna(0) // 60).astype("int64")
+    merged["early_minutes"] = (early // 60).astype("int64")
+
+    unmatched = ivs_df.drop(index=kept.index)
+    unscheduled = pd.DataFrame({
+        "officer_id": unmatched["officer_id"],
+        "site_prefix": unmatched["actual_site"],
+        "actual_start": unmatched["actual_start"],
+        "actual_end": unmatched["actual_end"],
+        "status": UNSCHEDULED,
+        "late_minutes": 0,
+        "early_minutes": 0,
+    })
+    cols = ["status", "officer_id", "site_prefix", "shift_id", "start", "end",
+            "actual_start", "actual_end", "late_minutes", "early_minutes"]
+    out = pd.concat([merged.drop(columns=["shift_row"]), unscheduled], ignore_index=True)
+    return out.reindex(columns=cols).sort_values(["officer_id", "start", "actual_start"], ignore_index=True)
+
+
+def summarize(results: Iterable[Dict]) -> Dict[str, int]:
+    counts = {s: 0 for s in STATUSES}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    return counts
+
+
+def _in_range(ts: Optional[int], lo: Optional[int], hi: Optional[int]) -> bool:
+    return ts is not None and (lo is None or ts >= lo) and (hi is None or ts < hi)
+
+
+def _load_records(data_dir: Path, dataset: str, lo: Optional[int], hi: Optional[int]) -> Iterator[Dict]:
+    from itertools import chain
+
+    from Shared import codec
+    from Shared.filestore import iter_json_records
+    from Shared.partitions import open_partitions
+    from Shared.punch_ingest import JOURNAL_NAME, iter_jsonl
+
+    store = open_partitions(data_dir, dataset)
+    if store is not None:
+        # Particiones (por mes y/o por sitio): con rango solo se abren los meses que toca
+        return iter(store.read_all() if lo is None or hi is None else store.read_range(lo, hi))
+    if dataset == "schedules":
+        return iter_json_records(codec.resolve(data_dir / "work_schedules.json"))
+    return chain(iter_json_records(codec.resolve(data_dir / "time_logs.json")), iter_jsonl(data_dir / JOURNAL_NAME))
+
+
+def main(argv: Optional[List[str]] = None):
+    from Shared.punch_ingest import DEFAULT_DATA_DIR
+
+    parser = argparse.ArgumentParser(description="Reconcile scheduled shifts against clock punches")
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR)
+    parser.add_argument("--start", help="YYYY-MM-DD (inclusive)")
+    parser.add_argument("--end", help="YYYY-MM-DD (exclusive)")
+    parser.add_argument("--grace", type=int, default=5, help="grace minutes")
+    parser.add_argument("--pandas", action="store_true", help="use the vectorized bulk path")
+    parser.add_argument("--out", type=Path, help="write the per-shift report as JSON")
+    args = parser.parse_args(argv)
+
+    lo = parse_epoch(args.start) if args.start else None
+    hi = parse_epoch(args.end) if args.end else None
+    shifts = [s for s in _load_records(args.data_dir, "schedules", lo, hi) if isinstance(s, dict)
+              and _in_range((shift_bounds(s) or (None,))[0], lo, hi)]
+    punches = [p for p in _load_records(args.data_dir, "time_logs", lo, hi)
+               if isinstance(p, dict) and _in_range(parse_epoch(p.get("ts")), lo, hi)]
+
+    if args.pandas:
+        frame = reconcile_frame(shifts, punches, args.grace)
+        results = frame.astype(object).where(frame.notna(), None).to_dict("records")
+    else:
+        results = reconcile(shifts, punches, args.grace)
+    print(json.dumps(summarize(results)))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False, default=str)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from Shared.timeutil import shift_bounds
+
+
+class _SortedShifts:
+    """Parallel arrays sorted by start epoch -> shift id."""
+
+    __slots__ = ("starts", "ids")
+
+    def __init__(self):
+        self.starts: List[int] = []
+        self.ids: List[str] = []
+
+    def insert(self, start: int, shift_id: str):
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ids.insert(i, shift_id)
+
+    def remove(self, start: int, shift_id: str):
+        i = bisect_left(self.starts, start)
+        while i < len(self.starts) and self.starts[i] == start:
+            if self.ids[i] == shift_id:
+                del self.starts[i]
+                del self.ids[i]
+                return
+            i += 1
+
+    def between(self, lo: int, hi: int) -> List[str]:
+        return self.ids[bisect_left(self.starts, lo):bisect_left(self.starts, hi)]
+
+    def first_at_or_after(self, ts: int) -> Optional[str]:
+        i = bisect_left(self.starts, ts)
+        return self.ids[i] if i < len(self.ids) else None
+
+
+class ScheduleIndex:
+    """Per-site and per-officer shift index sorted by start time.
+
+    Range queries cost O(log n + k) instead of scanning every schedule.
+    """
+
+    def __init__(self, schedules: Iterable[Dict] = ()):
+        self._by_site: Dict[str, _SortedShifts] = {}
+        self._by_officer: Dict[str, _SortedShifts] = {}
+        # id -> (start, end, registro)
+        self._shifts: Dict[str, Tuple[int, int, Dict]] = {}
+        self._max_duration = 0
+        for i, shift in enumerate(schedules or []):
+            self.add(shift, i)
+
+    def __len__(self):
+        return len(self._shifts)
+
+    def __contains__(self, shift_id):
+        return shift_id in self._shifts
+
+    @staticmethod
+    def _shift_id(shift: Dict, position: int = 0) -> str:
+        return str(shift.get("id") or f"row-{position}")
+
+    def add(self, shift: Dict, position: int = 0) -> bool:
+        bounds = shift_bounds(shift)
+        if bounds is None:
+            return False
+        shift_id = self._shift_id(shift, position)
+        if shift_id in self._shifts:
+            self.remove(shift_id)
+        start, end = bounds
+        # Copia superficial: la UI puede mutar el dict original antes de guardar
+        shift = dict(shift)
+        self._shifts[shift_id] = (start, end, shift)
+        self._max_duration = max(self._max_duration, end - start)
+        self._by_site.setdefault(shift.get("site_prefix", ""), _SortedShifts()).insert(start, shift_id)
+        self._by_officer.setdefault(shift.get("officer_id", ""), _SortedShifts()).insert(start, shift_id)
+        return True
+
+    def remove(self, shift_id: str) -> bool:
+        entry = self._shifts.pop(shift_id, None)
+        if entry is None:
+            return False
+        start, _, shift = entry
+        for bucket, key in ((self._by_site, shift.get("site_prefix", "")),
+                            (self._by_officer, shift.get("officer_id", ""))):
+            arr = bucket.get(key)
+            if arr is not None:
+                arr.remove(start, shift_id)
+                if not arr.ids:
+                    del bucket[key]
+        return True
+
+    def sync(self, schedules: List[Dict]):
+        """Apply only the differences between the index and a new schedules list."""
+        seen = set()
+        for i, shift in enumerate(schedules):
+            shift_id = self._shift_id(shift, i)
+            seen.add(shift_id)
+            current = self._shifts.get(shift_id)
+            if current is None or current[2] != shift:
+                self.add(shift, i)
+        for shift_id in [k for k in self._shifts if k not in seen]:
+            self.remove(shift_id)
+
+    def bounds(self, shift_id: str) -> Optional[Tuple[int, int]]:
+        entry = self._shifts.get(shift_id)
+        return (entry[0], entry[1]) if entry else None
+
+    def get(self, shift_id: str) -> Optional[Dict]:
+        entry = self._shifts.get(shift_id)
+        return entry[2] if entry else None
+
+    def _query(self, arr: Optional[_SortedShifts], lo: int, hi: int, overlapping: bool) -> List[Dict]:
+        if arr is None:
+            return []
+        if not overlapping:
+            return [self._shifts[i][2] for i in arr.between(lo, hi)]
+        # Turnos iniciados antes de lo que todavía siguen activos
+        out = []
+        for shift_id in arr.between(lo - self._max_duration, hi):
+            start, end, shift = self._shifts[shift_id]
+            if end > lo:
+                out.append(shift)
+        return out
+
+    def site_range(self, site_prefix: str, lo: int, hi: int, overlapping: bool = False) -> List[Dict]:
+        """Shifts of a site starting in [lo, hi) (or overlapping it)."""
+        return self._query(self._by_site.get(site_prefix), lo, hi, overlapping)
+
+    def officer_range(self, officer_id: str, lo: int, hi: int, overlapping: bool = False) -> List[Dict]:
+        return self._query(self._by_officer.get(officer_id), lo, hi, overlapping)
+
+    def next_for_officer(self, officer_id: str, now: int) -> Optional[Dict]:
+        arr = self._by_officer.get(officer_id)
+        shift_id = arr.first_at_or_after(now) if arr else None
+        return self._shifts[shift_id][2] if shift_id else None
+
+    def next_for_site(self, site_prefix: str, now: int) -> Optional[Dict]:
+        arr = self._by_site.get(site_prefix)
+        shift_id = arr.first_at_or_after(now) if arr else None
+        return self._shifts[shift_id][2] if shift_id else None
+
+    def sites(self) -> List[str]:
+        return list(self._by_site)
+
+    def officers(self) -> List[str]:
+        return list(self._by_officer)
+
+
+class SharedScheduleIndex:
+    """One ScheduleIndex per server process, rebuilt only when `signature()` changes (same read API)."""
+
+    def __init__(self, signature: Callable[[], Any], load: Callable[[], List[Dict]]):
+        self.signature = signature
+        self.load = load
+        self._lock = threading.Lock()
+        self._index: Optional[ScheduleIndex] = None
+        self._signature = None
+        self.builds = 0
+
+    def _current(self) -> ScheduleIndex:
+        # Caller holds the lock. La firma se toma antes de leer: un cambio en el medio fuerza otro rebuild
+        signature = self.signature()
+        if self._index is None or signature != self._signature:
+            self._index = ScheduleIndex(self.load())
+            self._signature = signature
+            self.builds += 1
+        return self._index
+
+    def site_range(self, site_prefix: str, lo: int, hi: int, overlapping: bool = False) -> List[Dict]:
+        with self._lock:
+            return self._current().site_range(site_prefix, lo, hi, overlapping)
+
+    def officer_range(self, officer_id: str, lo: int, hi: int, overlapping: bool = False) -> List[Dict]:
+        with self._lock:
+            return self._current().officer_range(officer_id, lo, hi, overlapping)
+
+    def next_for_site(self, site_prefix: str, now: int) -> Optional[Dict]:
+        with self._lock:
+            return self._current().next_for_site(site_prefix, now)
+
+    def next_for_officer(self, officer_id: str, now: int) -> Optional[Dict]:
+        with self._lock:
+            return self._current().next_for_officer(officer_id, now)
+
+    def sites(self) -> List[str]:
+        with self._lock:
+            return self._current().sites()
+
+    def officers(self) -> List[str]:
+        with self._lock:
+            return self._current().officers()
+
+    # Al guardar: se aplica el cambio al indice compartido y se adopta la firma del archivo nuevo
+    def add(self, shift: Dict, position: int = 0) -> bool:
+        with self._lock:
+            if self._index is None:
+                return False
+            added = self._index.add(shift, position)
+            self._signature = self.signature()
+            return added
+
+    def sync(self, schedules: List[Dict]):
+        with self._lock:
+            if self._index is not None:
+                self._index.sync(schedules)
+                self._signature = self.signature()
@@ -0,0 +1,351 @@
+import argparse
+import json
+import re
+import shutil
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from Shared.filestore import atomic_write_json, locked
+from Shared.partitions import (CLOSE_AFTER_DAYS, MONTH_OF, PARTITION_DIRS, UNDATED, MonthlyPartitions,
+                               PartitionClosed, month_closed, month_files, open_partitions)
+from Shared.punch_ingest import DEFAULT_DATA_DIR, iter_jsonl
+from Shared.timeutil import day_of
+from Shared.warmup import files_signature
+
+SHARD_MAP_NAME = "shard_map.json"
+# Registros sin site_prefix
+UNASSIGNED = "_unassigned"
+MAX_RESIDENT = 16
+SHARD_CACHE_SIZE = 6
+FAN_OUT_WORKERS = 8
+
+
+def shard_slug(site_prefix: str) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "-", str(site_prefix or "").lower()).strip("-")
+    return slug or UNASSIGNED
+
+
+def _allocate(shards: Dict[str, str], site_prefix: str) -> str:
+    if site_prefix not in shards:
+        used = set(shards.values())
+        base = shard = shard_slug(site_prefix)
+        n = 2
+        while shard in used or shard == UNASSIGNED:
+            shard, n = f"{base}-{n}", n + 1
+        shards[site_prefix] = shard
+    return shards[site_prefix]
+
+
+class ShardMap:
+    """site_prefix -> shard folder name ("PX 106" -> "px-106"), kept in `shard_map.json`."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._shards: Dict[str, str] = {}
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        signature = files_signature([self.path])
+        if signature == self._signature:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        self._shards = dict(data.get("shards", {})) if isinstance(data, dict) else {}
+        self._signature = signature
+
+    def get(self, site_prefix: str) -> Optional[str]:
+        with self._lock:
+            self._refresh()
+            return self._shards.get(site_prefix)
+
+    def sites(self) -> Dict[str, str]:
+        with self._lock:
+            self._refresh()
+            return dict(self._shards)
+
+    def assign(self, site_prefix: str) -> str:
+        """Shard of a site, adding it to the map if it is new."""
+        if not site_prefix:
+            return UNASSIGNED
+        shard = self.get(site_prefix)
+        if shard is not None:
+            return shard
+        # Bajo el lock del archivo: el servicio de punches y la app pueden agregar sitios a la vez
+        with locked(self.path):
+            with self._lock:
+                self._signature = None
+                self._refresh()
+                if site_prefix not in self._shards:
+                    _allocate(self._shards, site_prefix)
+                    self.save()
+                return self._shards[site_prefix]
+
+    def save(self):
+        atomic_write_json(self.path, {"shards": dict(sorted(self._shards.items()))})
+        self._signature = files_signature([self.path])
+
+
+class ShardedPartitions:
+    """A partitioned dataset split by site: `<root>/<shard>/YYYY-MM.jsonl`, one MonthlyPartitions per shard."""
+
+    def __init__(self, root: Path, month_of: Callable[[Dict], Optional[str]], shard_map: ShardMap,
+                 max_resident: int = MAX_RESIDENT, workers: int = FAN_OUT_WORKERS,
+                 close_after_days: int = CLOSE_AFTER_DAYS, compact_as: Optional[str] = None):
+        self.root = Path(root)
+        self.month_of = month_of
+        self.shard_map = shard_map
+        self.max_resident = max_resident
+        self.workers = workers
+        self.close_after_days = close_after_days
+        self.compact_as = compact_as
+        # Solo los ultimos `max_resident` shards usados quedan en memoria (con su cache de meses)
+        self._resident: "OrderedDict[str, MonthlyPartitions]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    # ===== Shards =====
+    def shard(self, name: str) -> MonthlyPartitions:
+        with self._lock:
+            store = self._resident.get(name)
+            if store is None:
+                store = MonthlyPartitions(self.root / name, self.month_of, self.close_after_days,
+                                          cache_size=SHARD_CACHE_SIZE, compact_as=self.compact_as)
+                self._resident[name] = store
+                # El shard menos usado sale de memoria junto con su cache de meses
+                while len(self._resident) > self.max_resident:
+                    self._resident.popitem(last=False)
+            self._resident.move_to_end(name)
+            return store
+
+    def for_site(self, site_prefix: str) -> MonthlyPartitions:
+        """The shard of one site (empty if the site has no data yet)."""
+        return self.shard(self.shard_map.get(site_prefix) or shard_slug(site_prefix))
+
+    def shard_names(self) -> List[str]:
+        if not self.root.is_dir():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir())
+
+    def resident(self) -> List[str]:
+        with self._lock:
+            return list(self._resident)
+
+    def fan_out(self, fn: Callable[[MonthlyPartitions], object], shards: Optional[List[str]] = None) -> List:
+        """fn(shard) for every shard, in parallel; results in shard order."""
+        names = self.shard_names() if shards is None else shards
+        if len(names) <= 1:
+            return [fn(self.shard(n)) for n in names]
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="shards")
+        return list(self._pool.map(lambda n: fn(self.shard(n)), names))
+
+    @staticmethod
+    def _concat(parts: List[List[Dict]]) -> List[Dict]:
+        out: List[Dict] = []
+        for part in parts:
+            out.extend(part)
+        return out
+
+    # ===== Same reads as MonthlyPartitions, over all sites =====
+    def exists(self) -> bool:
+        return self.root.is_dir()
+
+    def months(self) -> List[str]:
+        return sorted({rel.rsplit("/", 1)[-1][:-len(".jsonl")] for rel in month_files(self.root, "*/*.jsonl*")})
+
+    def sources(self) -> List[Path]:
+        return ([self.root, self.shard_map.path] + [self.root / n for n in self.shard_names()]
+                + list(month_files(self.root, "*/*.jsonl*").values()))
+
+    def is_closed(self, month: str, today: Optional[date] = None) -> bool:
+        return month_closed(month, self.close_after_days, today)
+
+    def read(self, month: str) -> List[Dict]:
+        return self._concat(self.fan_out(lambda s: s.read(month)))
+
+    def read_range(self, lo: int, hi: int) -> List[Dict]:
+        return self._concat(self.fan_out(lambda s: s.read_range(lo, hi)))
+
+    def read_from(self, lo: int) -> Iterator[List[Dict]]:
+        first = day_of(lo)[:7]
+        for month in self.months():
+            if month != UNDATED and month >= first:
+                yield self.read(month)
+
+    def read_all(self) -> List[Dict]:
+        return self._concat(self.fan_out(lambda s: s.read_all()))
+
+    # ===== Writes, routed by site =====
+    def _shard_of(self, record: Dict) -> str:
+        return self.shard_map.assign(str(record.get("site_prefix") or ""))
+
+    def _check_open(self, records: List[Dict], force: bool):
+        closed = sorted({m for m in (self.month_of(r) or UNDATED for r in records) if self.is_closed(m)})
+        if closed and not force:
+            raise PartitionClosed(f"{self.root.name}: month(s) {', '.join(closed)} are closed")
+
+    def append(self, records: List[Dict], force: bool = False):
+        self._check_open(records, force)
+        by_shard: Dict[str, List[Dict]] = {}
+        for r in records:
+            by_shard.setdefault(self._shard_of(r), []).append(r)
+        for name, batch in sorted(by_shard.items()):
+            self.shard(name).append(batch, force=force)
+
+    def save_changes(self, changes: List[Dict], key: str = "id", force: bool = False,
+                     append_only: bool = False) -> List[str]:
+        """MonthlyPartitions.save_changes per shard; a record moved to another site changes shard."""
+        # Todos los meses se validan antes de escribir el primer shard
+        self._check_open([r for c in changes for r in (c.get("base"), c.get("new")) if r is not None], force)
+        by_shard: Dict[str, List[Dict]] = {}
+        for change in changes:
+            base, new = change.get("base"), change.get("new")
+            old_shard = self._shard_of(base) if base is not None else None
+            new_shard = self._shard_of(new) if new is not None else None
+            if old_shard is not None and new_shard is not None and old_shard != new_shard and not append_only:
+                by_shard.setdefault(old_shard, []).append({"key": change["key"], "base": base, "new": None})
+                by_shard.setdefault(new_shard, []).append({"key": change["key"], "base": None, "new": new})
+            else:
+                by_shard.setdefault(new_shard or old_shard, []).append(change)
+        written = set()
+        for name, shard_changes in sorted(by_shard.items()):
+            months = self.shard(name).save_changes(shard_changes, key, force, append_only)
+            written.update(f"{name}/{m}" for m in months)
+        return sorted(written)
+
+    def save_all(self, records: List[Dict], key: str = "id", force: bool = False) -> List[str]:
+        by_shard: Dict[str, List[Dict]] = {name: [] for name in self.shard_names()}
+        for r in records:
+            by_shard.setdefault(self._shard_of(r), []).append(r)
+        written = []
+        for name, shard_records in sorted(by_shard.items()):
+            written.extend(f"{name}/{m}" for m in self.shard(name).save_all(shard_records, key, force))
+        return written
+
+    def compress(self, today: Optional[date] = None) -> List[str]:
+        names = self.shard_names()
+        return [f"{name}/{m}" for name, months in zip(names, self.fan_out(lambda s: s.compress(today), names))
+                for m in months]
+
+
+_STORES: Dict[Tuple[str, str], ShardedPartitions] = {}
+_MAPS: Dict[str, ShardMap] = {}
+_STORES_GUARD = threading.Lock()
+
+
+def open_shards(data_dir: Path, dataset: str) -> ShardedPartitions:
+    """Process-wide sharded store for a dataset (one shard map per data dir)."""
+    data_dir = Path(data_dir).resolve()
+    root = data_dir / PARTITION_DIRS[dataset]
+    with _STORES_GUARD:
+        store = _STORES.get((str(root), dataset))
+        if store is None:
+            shard_map = _MAPS.setdefault(str(data_dir), ShardMap(data_dir / SHARD_MAP_NAME))
+            store = _STORES[(str(root), dataset)] = ShardedPartitions(root, MONTH_OF[dataset], shard_map,
+                                                                      compact_as=dataset)
+        return store
+
+
+def migrate(data_dir: Path) -> Dict[str, Dict[str, int]]:
+    """Split the monthly partitions into one folder per site and write the shard map.
+
+    The flat month files are moved to `pre_shard/`; rollup and detector are pointed at the shard files.
+    """
+    from Shared.anomaly import STATE_NAME, AnomalyDetector
+    from Shared.partitions import migrate as migrate_partitions
+    from Shared.payroll import ROLLUP_NAME, PayrollRollup
+
+    data_dir = Path(data_dir)
+    map_path = data_dir / SHARD_MAP_NAME
+    if map_path.exists():
+        raise ValueError(f"{map_path} already exists; the data is already sharded.")
+    for dirname in PARTITION_DIRS.values():
+        # Carpetas de shard sin mapa (migracion interrumpida): no se mezclan con una nueva
+        if month_files(data_dir / dirname, "*/*.jsonl*"):
+            raise ValueError(f"{data_dir / dirname} already has shard folders; remove them to migrate again.")
+    if all(open_partitions(data_dir, dataset) is None for dataset in PARTITION_DIRS):
+        migrate_partitions(data_dir)
+    time_logs_root = data_dir / PARTITION_DIRS["time_logs"]
+
+    rollup_path = data_dir / ROLLUP_NAME
+    rollup = PayrollRollup.load(rollup_path)
+    rollup.catch_up(time_logs_root, data_dir / "time_logs.json")
+    detector = AnomalyDetector()
+    detector.restore(data_dir / STATE_NAME)
+    detector.catch_up(time_logs_root)
+
+    shards: Dict[str, str] = {}
+    report = {}
+    for dataset, dirname in PARTITION_DIRS.items():
+        root = data_dir / dirname
+        flat = MonthlyPartitions(root, MONTH_OF[dataset])
+        counts: Dict[str, int] = {}
+        for month in flat.months():
+            # Mes a mes, leido del archivo (sin la cache de meses): solo un mes en memoria
+            by_shard: Dict[str, List[Dict]] = {}
+            for r in iter_jsonl(flat.path(month)):
+                if not isinstance(r, dict):
+                    continue
+                site = str(r.get("site_prefix") or "")
+                name = _allocate(shards, site) if site else UNASSIGNED
+                by_shard.setdefault(name, []).append(r)
+            for name, records in sorted(by_shard.items()):
+                MonthlyPartitions(root / name, MONTH_OF[dataset]).write_month(month, records)
+                counts[name] = counts.get(name, 0) + len(records)
+        backup = data_dir / "pre_shard" / dirname
+        backup.mkdir(parents=True, exist_ok=True)
+        for month in flat.months():
+            shutil.move(str(flat.path(month)), str(backup / flat.path(month).name))
+        report[dataset] = dict(sorted(counts.items()))
+
+    offsets = {p.relative_to(time_logs_root).as_posix(): p.stat().st_size for p in time_logs_root.rglob("*.jsonl")}
+    rollup.partition_offsets = dict(offsets)
+    rollup.save(rollup_path)
+    detector.partition_offsets = dict(offsets)
+    detector.save(data_dir / STATE_NAME)
+    # El mapa se escribe al final: hasta aqui los lectores siguen usando los meses planos
+    shard_map = ShardMap(map_path)
+    shard_map._shards = shards
+    shard_map.save()
+    return report
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Per-site shards of time logs and work schedules")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_migrate = sub.add_parser("migrate", help="split the partitions into one folder per site")
+    p_migrate.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR)
+    p_list = sub.add_parser("list", help="show the shard map and record counts")
+    p_list.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == "migrate":
+        try:
+            report = migrate(args.data_dir)
+        except ValueError as e:
+            parser.exit(1, f"{e}\n")
+        for dataset, counts in report.items():
+            print(f"{dataset}: {sum(counts.values())} records in {len(counts)} shards")
+    else:
+        shard_map = ShardMap(Path(args.data_dir) / SHARD_MAP_NAME)
+        if not shard_map.path.exists():
+            print("not sharded")
+            return
+        stores = {dataset: open_shards(args.data_dir, dataset) for dataset in PARTITION_DIRS}
+        for site, name in sorted(shard_map.sites().items(), key=lambda kv: kv[1]):
+            counts = "  ".join(f"{dataset}={len(store.shard(name).read_all()):>7}"
+                               for dataset, store in stores.items())
+            print(f"{name:<24} {site:<16} {counts}")
+
+
+if __name__ == "__main__":
+    main()
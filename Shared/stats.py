@@ -0,0 +1,71 @@
+import json
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from Shared.filestore import atomic_write_json, locked
+
+STATS_NAME = "quick_stats.json"
+SECTIONS = ("officers", "schedules", "sites")
+
+
+def count_by_status(records: List[Dict], default: str = "") -> Dict:
+    by_status = Counter(str(r.get("status") or default) for r in records if isinstance(r, dict))
+    return {"total": sum(by_status.values()), "by_status": dict(by_status)}
+
+
+def officer_stats(officers: List[Dict]) -> Dict:
+    stats = count_by_status(officers, "Active")
+    stats["active"] = stats["by_status"].get("Active", 0)
+    return stats
+
+
+def schedule_stats(schedules: List[Dict]) -> Dict:
+    return count_by_status(schedules, "Scheduled")
+
+
+def site_stats(registry: List[Dict]) -> Dict:
+    return count_by_status(registry, "Active")
+
+
+def file_signature(path: Union[Path, List[Path]]) -> Optional[List]:
+    """(mtime_ns, size) of a data file, one per file for a list: detects edits made outside the app."""
+    if isinstance(path, (list, tuple)):
+        # Dataset particionado: carpeta(s) y archivos de mes (MonthlyPartitions.sources)
+        return [file_signature(p) for p in path]
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def is_stale(section: Dict, source_path: Union[Path, List[Path]]) -> bool:
+    return not section or section.get("source") != file_signature(source_path)
+
+
+def load_stats(path: Path) -> Dict:
+    path = Path(path)
+    if not path.exists():
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except ValueError:
+        return {}
+
+
+def update_stats(path: Path, section: str, values: Dict,
+                 source_path: Union[Path, List[Path], None] = None) -> Dict:
+    """Replace one section of the counters file (locked read-modify-write)."""
+    path = Path(path)
+    if source_path is not None:
+        values = dict(values, source=file_signature(source_path))
+    # Otra sesion (u otro proceso) puede estar escribiendo otra seccion
+    with locked(path):
+        stats = load_stats(path)
+        stats[section] = values
+        atomic_write_json(path, stats)
+    return stats
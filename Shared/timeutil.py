@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+# Las fechas del sistema son hora local "de pared" sin zona horaria.
+# Se convierten a epoch tratándolas como UTC para que la conversión sea
+# determinista (sin saltos de horario de verano) y reversible.
+
+
+EPOCH = datetime(1970, 1, 1)
+_SECOND = timedelta(seconds=1)
+
+
+def to_epoch(dt: datetime) -> int:
+    return (dt.replace(microsecond=0) - EPOCH) // _SECOND
+
+
+def from_epoch(ts: int) -> datetime:
+    return EPOCH + timedelta(seconds=int(ts))
+
+
+def _wall(dt: datetime) -> datetime:
+    # Con zona horaria: se pasa a la hora local antes de quitarla (no se descarta el offset)
+    return dt.astimezone().replace(tzinfo=None) if dt.tzinfo is not None else dt
+
+
+def parse_epoch(value) -> Optional[int]:
+    """ISO string / datetime / int -> epoch int (None if it cannot be parsed)."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, datetime):
+        return to_epoch(_wall(value))
+    try:
+        return to_epoch(_wall(datetime.fromisoformat(str(value))))
+    except ValueError:
+        return None
+
+
+def epoch_to_iso(ts: int) -> str:
+    return from_epoch(ts).isoformat(timespec="seconds")
+
+
+def day_of(ts: int) -> str:
+    return from_epoch(ts).strftime("%Y-%m-%d")
+
+
+def shift_bounds(shift: dict) -> Optional[Tuple[int, int]]:
+    """(start, end) epochs for a work_schedules.json shift.
+
+    When end_time <= start_time the shift ends on the next day.
+    """
+    try:
+        # fromisoformat es bastante mas rapido que strptime
+        start = datetime.fromisoformat(f"{shift['date']}T{shift.get('start_time') or '00:00'}")
+        end = datetime.fromisoformat(f"{shift['date']}T{shift.get('end_time') or '23:59'}")
+    except (KeyError, TypeError, ValueError):
+        return None
+    if end <= start:
+        end += timedelta(days=1)
+    return to_epoch(start), to_epoch(end)
@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+def files_signature(paths: Iterable[Path]) -> Tuple:
+    sig = []
+    for p in paths:
+        try:
+            st = os.stat(p)
+            sig.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            sig.append(None)
+    return tuple(sig)
+
+
+class _Entry:
+    __slots__ = ("future", "signature", "load_ms")
+
+    def __init__(self, future: Future, signature: Tuple):
+        self.future = future
+        self.signature = signature
+        self.load_ms: Optional[float] = None
+
+
+class DataWarmup:
+    """Loads every dataset concurrently and shares the parsed result.
+
+    Each dataset is registered with the files it is read from and a loader.
+    `start()` submits all loads to a thread pool; `get()` waits on the future
+    instead of loading again, as long as the files have not changed since
+    (one stat per file). Saves hand the new data back through `put()`.
+    """
+
+    def __init__(self, max_workers: int = 5):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="warmup")
+        self._lock = threading.Lock()
+        self._sources: Dict[str, Tuple[Callable[[], List[Path]], Callable[[], Any], bool]] = {}
+        self._entries: Dict[str, _Entry] = {}
+        self.started_at: Optional[float] = None
+        self.ready_ms: Optional[float] = None
+
+    def register(self, name: str, paths, loader: Callable[[], Any], copy_records: bool = False):
+        """copy_records: hand out a fresh dict per record (for data the UI edits in place).
+
+        `paths` is a list of files, or a callable returning it when the set of
+        files can grow (monthly partitions).
+        """
+        if not callable(paths):
+            paths = list(paths)
+            self._sources[name] = (lambda: paths, loader, copy_records)
+        else:
+            self._sources[name] = (paths, loader, copy_records)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._sources
+
+    def start(self, on_ready: Optional[Callable[["DataWarmup"], None]] = None) -> "DataWarmup":
+        self.started_at = time.perf_counter()
+        with self._lock:
+            for name in self._sources:
+                self._submit(name)
+        futures = [e.future for e in self._entries.values()]
+        # Marca cuando termina el ultimo dataset (tiempo total del warm-up)
+        remaining = [len(futures)]
+
+        def _done(_):
+            with self._lock:
+                remaining[0] -= 1
+                if remaining[0] != 0:
+                    return
+                self.ready_ms = (time.perf_counter() - self.started_at) * 1000
+            if on_ready is not None:
+                on_ready(self)
+
+        for f in futures:
+            f.add_done_callback(_done)
+        return self
+
+    def _submit(self, name: str) -> _Entry:
+        paths, loader, _ = self._sources[name]
+        entry = _Entry(None, files_signature(paths()))
+
+        def _load():
+            t0 = time.perf_counter()
+            try:
+                return loader()
+            finally:
+                entry.load_ms = (time.perf_counter() - t0) * 1000
+
+        entry.future = self._pool.submit(_load)
+        self._entries[name] = entry
+        return entry
+
+    def get(self, name: str, timeout: Optional[float] = None) -> Any:
+        if name not in self._sources:
+            raise KeyError(name)
+        paths, _, copy_records = self._sources[name]
+        current = files_signature(paths())
+        with self._lock:
+            entry = self._entries.get(name)
+            # Archivo cambiado (otra sesion, otro proceso o edicion manual): se recarga una vez
+            if entry is None or entry.signature != current:
+                entry = self._submit(name)
+        data = entry.future.result(timeout)
+        if copy_records and isinstance(data, list):
+            return [dict(r) if isinstance(r, dict) else r for r in data]
+        return data
+
+    def put(self, name: str, data: Any):
+        """Publish freshly saved data so other sessions do not reload it."""
+        paths, _, copy_records = self._sources[name]
+        if copy_records and isinstance(data, list):
+            data = [dict(r) if isinstance(r, dict) else r for r in data]
+        future: Future = Future()
+        future.set_result(data)
+        entry = _Entry(future, files_signature(paths()))
+        entry.load_ms = 0.0
+        with self._lock:
+            self._entries[name] = entry
+
+    def timings(self) -> Dict[str, Optional[float]]:
+        """Per-dataset load time in ms (None while still loading)."""
+        with self._lock:
+            out = {name: e.load_ms for name, e in self._entries.items()}
+        out["total"] = self.ready_ms
+        return out
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,11 @@
+@echo off
+REM Archivo columnar (Parquet) de los meses cerrados de time_logs y work_schedules
+REM Programar una vez por semana; solo se escriben los meses nuevos o cambiados
+REM Los JSONL de los meses cerrados quedan comprimidos (.jsonl.gz); --keep-plain lo evita
+
+cd /d "C:\AmdaOps"
+python -m Shared.archive build --data-dir "C:\AmdaOps\shoppingCenter\data"
+
+echo.
+echo Archivo actualizado. Presiona una tecla para cerrar...
+pause >nul
@@ -0,0 +1,192 @@
+"""Micro-benchmark harness (no plugins needed).
+
+    python -m pytest benchmarks                          # run, compare with baseline.json
+    python -m pytest benchmarks --bench-save-baseline    # store this machine's baseline
+    python -m pytest benchmarks --bench-sizes 100,50000 --bench-threshold 0.5
+    python -m pytest benchmarks/test_e2e_pages.py --e2e-sizes 100,1000,5000
+
+Results go to benchmarks/results/latest.json. A benchmark fails when its
+median is more than --bench-threshold (fraction) slower than the baseline.
+"""
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Dict, Optional
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from Shared.datagen import DatasetGenerator  # noqa: E402
+
+HERE = Path(__file__).resolve().parent
+DEFAULT_SIZES = "100,1000,10000"
+RESULTS: Dict[str, Dict] = {}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("bench")
+    group.addoption("--bench-sizes", default=DEFAULT_SIZES, help="comma separated dataset sizes")
+    group.addoption("--bench-rounds", type=int, default=7)
+    group.addoption("--e2e-sizes", default="100,1000", help="dataset sizes for the AppTest page benchmarks")
+    group.addoption("--bench-min-time", type=float, default=0.02, help="seconds per round (auto loops)")
+    group.addoption("--bench-baseline", type=Path, default=HERE / "baseline.json")
+    group.addoption("--bench-threshold", type=float, default=0.25, help="allowed slowdown vs baseline")
+    group.addoption("--bench-json", type=Path, default=HERE / "results" / "latest.json")
+    group.addoption("--bench-save-baseline", action="store_true", help="write results as the new baseline")
+
+
+def pytest_generate_tests(metafunc):
+    if "e2e_size" in metafunc.fixturenames:
+        sizes = [int(s) for s in metafunc.config.getoption("--e2e-sizes").split(",") if s.strip()]
+        metafunc.parametrize("e2e_size", sizes, ids=[str(s) for s in sizes])
+    if "size" in metafunc.fixturenames:
+        sizes = [int(s) for s in metafunc.config.getoption("--bench-sizes").split(",") if s.strip()]
+        metafunc.parametrize("size", sizes, ids=[str(s) for s in sizes])
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not RESULTS:
+        return
+    config = session.config
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": config.getoption("--bench-sizes"),
+            "rounds": config.getoption("--bench-rounds"),
+        },
+        "results": dict(sorted(RESULTS.items())),
+    }
+    out = config.getoption("--bench-json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if config.getoption("--bench-save-baseline"):
+        config.getoption("--bench-baseline").write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+class Bench:
+    def __init__(self, config, name: str, baseline: Dict):
+        self.rounds = config.getoption("--bench-rounds")
+        self.min_time = config.getoption("--bench-min-time")
+        self.threshold = config.getoption("--bench-threshold")
+        self.compare = not config.getoption("--bench-save-baseline")
+        self.name = name
+        self.baseline = baseline
+
+    def __call__(self, fn: Callable, *args, setup: Optional[Callable] = None):
+        """Time fn(*args). With `setup`, each call gets fresh args from setup() (untimed)."""
+        samples = []
+        if setup is None:
+            # Calibracion: cuantas llamadas caben en min_time
+            loops = 1
+            while True:
+                t0 = time.perf_counter()
+                for _ in range(loops):
+                    fn(*args)
+                elapsed = time.perf_counter() - t0
+                if elapsed >= self.min_time or loops >= 1 << 20:
+                    break
+                loops *= 10 if elapsed < self.min_time / 10 else 2
+            for _ in range(self.rounds):
+                t0 = time.perf_counter()
+                for _ in range(loops):
+                    fn(*args)
+                samples.append((time.perf_counter() - t0) / loops)
+        else:
+            loops = 1
+            for _ in range(self.rounds):
+                call_args = setup()
+                t0 = time.perf_counter()
+                fn(*call_args)
+                samples.append(time.perf_counter() - t0)
+
+        return self._record(self.name, samples, loops)
+
+    def step(self, label: str, fn: Callable, rounds: int = 1):
+        """Time one end-to-end interaction (e.g. an AppTest click + rerun) as `<test>::<label>`."""
+        samples = []
+        for _ in range(rounds):
+            t0 = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - t0)
+        return self._record(f"{self.name}::{label}", samples, 1)
+
+    def _record(self, name: str, samples, loops: int) -> Dict:
+        result = {
+            "median_ms": statistics.median(samples) * 1000,
+            "min_ms": min(samples) * 1000,
+            "rounds": len(samples),
+            "loops": loops,
+        }
+        RESULTS[name] = result
+        base = self.baseline.get(name)
+        if self.compare and base:
+            limit = base["median_ms"] * (1 + self.threshold)
+            if result["median_ms"] > limit:
+                pytest.fail(f"{name}: {result['median_ms']:.3f} ms > {limit:.3f} ms "
+                            f"(baseline {base['median_ms']:.3f} ms + {self.threshold:.0%})")
+        return result
+
+
+@pytest.fixture(scope="session")
+def baseline(request) -> Dict:
+    path = request.config.getoption("--bench-baseline")
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8")).get("results", {})
+
+
+@pytest.fixture
+def bench(request, baseline) -> Bench:
+    return Bench(request.config, request.node.name, baseline)
+
+
+_DATASETS: Dict[int, Dict] = {}
+
+
+@pytest.fixture
+def dataset(size) -> Dict:
+    """Synthetic records for one size: `size` phrases, officers, shifts and punches."""
+    if size not in _DATASETS:
+        gen = DatasetGenerator(sites=max(2, size // 10), officers=size, seed=1)
+        schedules, punches = [], []
+        for shift, day_punches in gen.iter_days(days=30):
+            if len(schedules) < size:
+                schedules.append(shift)
+            if len(punches) < size:
+                punches.extend(day_punches)
+            if len(schedules) >= size and len(punches) >= size:
+                break
+        _DATASETS[size] = {
+            "phrases": list(gen.iter_phrases(size)),
+            "registry": list(gen.iter_sites()),
+            "officers": list(gen.iter_officers()),
+            "schedules": schedules,
+            "time_logs": punches[:size],
+        }
+    return _DATASETS[size]
+
+
+@pytest.fixture
+def data_config(tmp_path):
+    """Config with the same attributes as shoppingCenter.app.Config, rooted in tmp_path."""
+    return SimpleNamespace(
+        DATA_DIR=tmp_path,
+        PHRASES_PATH=tmp_path / "phrases.json",
+        REGISTRY_PATH=tmp_path / "site_registry.json",
+        OFFICERS_PATH=tmp_path / "security_officers.json",
+        SCHEDULES_PATH=tmp_path / "work_schedules.json",
+        TIME_LOGS_PATH=tmp_path / "time_logs.json",
+        TIME_LOGS_JOURNAL_PATH=tmp_path / "time_logs.jsonl",
+        PAYROLL_ROLLUP_PATH=tmp_path / "payroll_rollups.json",
+        STATS_PATH=tmp_path / "quick_stats.json",
+    )
@@ -0,0 +1,249 @@
+"""Multi-session load test for DataManager with lost-update detection.
+
+    python benchmarks/loadtest.py --sessions 8 --ops 200 --write-ratio 0.3
+
+Each simulated session does what a Streamlit rerun does: build a DataManager,
+read a dataset and, for writes, modify one record and save the whole file.
+Every edit increments a `loadtest_edits` counter on the record and every add
+uses a unique id, so the final files tell exactly how many writes were lost.
+The data is copied to a temporary folder first; the source is never modified.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from Shared.datagen import generate  # noqa: E402
+from Shared.perf import PerfRegistry, timer  # noqa: E402
+
+READ_OPS = ("read_officers", "read_registry")
+WRITE_OPS = ("edit_officer", "edit_site", "add_officer")
+
+
+def _app():
+    # Import diferido: app.py lee AMDAOPS_DATA_DIR al crear Config
+    from shoppingCenter import app
+    return app
+
+
+class Session(threading.Thread):
+    def __init__(self, number: int, ops: int, write_ratio: float, config, modules, warmup, service,
+                 registry: PerfRegistry, barrier: threading.Barrier, seed: int):
+        super().__init__(name=f"session-{number}", daemon=True)
+        self.number = number
+        self.ops = ops
+        self.write_ratio = write_ratio
+        self.config = config
+        self.modules = modules
+        self.warmup = warmup
+        self.service = service
+        self.perf = registry
+        self.barrier = barrier
+        self.rng = random.Random(seed * 1000 + number)
+        # Escrituras que save_* reporto como exitosas
+        self.edits = {"officers": 0, "sites": 0}
+        self.added: List[str] = []
+        self.failed_saves = 0
+        self.empty_reads = 0
+        self.errors: List[str] = []
+
+    def run(self):
+        self.barrier.wait()
+        for i in range(self.ops):
+            is_write = self.rng.random() < self.write_ratio
+            op = self.rng.choice(WRITE_OPS if is_write else READ_OPS)
+            try:
+                with timer(op, self.perf):
+                    getattr(self, op)(i)
+            except Exception as e:
+                self.errors.append(f"{op}: {e!r}")
+
+    def _manager(self):
+        return _app().DataManager(self.config, self.modules, warmup=self.warmup, service=self.service)
+
+    def _read(self, dm, name: str) -> List[Dict]:
+        records = getattr(dm, name) or []
+        if not records:
+            # Un archivo leido a medio escribir devuelve [] (y se guardaria encima)
+            self.empty_reads += 1
+        return records
+
+    def read_officers(self, i: int):
+        self._read(self._manager(), "officers")
+
+    def read_registry(self, i: int):
+        self._read(self._manager(), "registry")
+
+    def edit_officer(self, i: int):
+        dm = self._manager()
+        officers = self._read(dm, "officers")
+        if not officers:
+            return
+        off = self.rng.choice(officers)
+        off["loadtest_edits"] = int(off.get("loadtest_edits", 0)) + 1
+        # Como updated_at en la UI: dos ediciones concurrentes nunca escriben el mismo valor
+        off["loadtest_token"] = f"{self.number}-{i}"
+        if dm.save_officers(officers):
+            self.edits["officers"] += 1
+        else:
+            self.failed_saves += 1
+
+    def edit_site(self, i: int):
+        dm = self._manager()
+        registry = self._read(dm, "registry")
+        if not registry:
+            return
+        site = self.rng.choice(registry)
+        site["loadtest_edits"] = int(site.get("loadtest_edits", 0)) + 1
+        site["loadtest_token"] = f"{self.number}-{i}"
+        if dm.save_registry(registry):
+            self.edits["sites"] += 1
+        else:
+            self.failed_saves += 1
+
+    def add_officer(self, i: int):
+        dm = self._manager()
+        officers = list(self._read(dm, "officers"))
+        new_id = f"loadtest-{self.number}-{i}"
+        officers.append({"id": new_id, "name": f"Load Test {self.number}-{i}", "email": "",
+                         "phone": "", "status": "Active", "photo_path": ""})
+        if dm.save_officers(officers):
+            self.added.append(new_id)
+        else:
+            self.failed_saves += 1
+
+
+def _read_json(path: Path) -> List[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        raw = f.read()
+    return json.loads(raw) if raw.strip() else []
+
+
+def prepare_data_dir(source: Optional[Path], work_dir: Path, officers: int, sites: int) -> Path:
+    if source is not None:
+        shutil.copytree(source, work_dir, dirs_exist_ok=True)
+    else:
+        generate(work_dir, sites=sites, officers=officers, days=1, phrases=50)
+    return work_dir
+
+
+def _start_service(data_dir: Path):
+    from Shared.dataservice import DataService, DataServiceClient, default_address, make_server
+    address = default_address(data_dir)
+    server = make_server(DataService(data_dir).start(), address)
+    threading.Thread(target=server.serve_forever, name="dataservice", daemon=True).start()
+    return server, DataServiceClient(address)
+
+
+def run_load_test(data_dir: Path, sessions: int = 8, ops: int = 100, write_ratio: float = 0.3,
+                  use_warmup: bool = False, seed: int = 7, use_service: bool = False) -> Dict:
+    """Run the sessions against `data_dir` (modified in place) and return the report."""
+    os.environ["AMDAOPS_DATA_DIR"] = str(data_dir)
+    app = _app()
+    config = app.Config()
+    modules = app.load_shared_modules()
+    warmup = app.start_warmup(config, modules) if use_warmup else None
+    # Las sesiones hablan con un servicio de datos como lo harian varios workers
+    server, service = _start_service(data_dir) if use_service else (None, None)
+
+    start_officers = _read_json(config.OFFICERS_PATH)
+    start_sites = _read_json(config.REGISTRY_PATH)
+    base = {
+        "officers": sum(int(o.get("loadtest_edits", 0)) for o in start_officers),
+        "sites": sum(int(s.get("loadtest_edits", 0)) for s in start_sites),
+    }
+
+    perf = PerfRegistry()
+    barrier = threading.Barrier(sessions)
+    workers = [Session(n, ops, write_ratio, config, modules, warmup, service, perf, barrier, seed)
+               for n in range(sessions)]
+    t0 = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - t0
+    if warmup is not None:
+        warmup.shutdown()
+    if server is not None:
+        service.close()
+        server.shutdown()
+        server.server_close()
+
+    final_officers = _read_json(config.OFFICERS_PATH)
+    final_sites = _read_json(config.REGISTRY_PATH)
+    final_ids = {o.get("id") for o in final_officers}
+    expected = {k: base[k] + sum(w.edits[k] for w in workers) for k in base}
+    found = {
+        "officers": sum(int(o.get("loadtest_edits", 0)) for o in final_officers),
+        "sites": sum(int(s.get("loadtest_edits", 0)) for s in final_sites),
+    }
+    added = [i for w in workers for i in w.added]
+    lost = {
+        "officer_edits": expected["officers"] - found["officers"],
+        "site_edits": expected["sites"] - found["sites"],
+        "added_officers": sum(1 for i in added if i not in final_ids),
+        # Registros originales que desaparecieron (p. ej. se guardo sobre una lectura vacia)
+        "original_officers": sum(1 for o in start_officers if o.get("id") not in final_ids),
+    }
+    total_ops = sessions * ops
+    return {
+        "sessions": sessions,
+        "ops": total_ops,
+        "write_ratio": write_ratio,
+        "warmup": use_warmup,
+        "service": use_service,
+        "seconds": round(elapsed, 3),
+        "throughput_ops_s": round(total_ops / elapsed, 1) if elapsed else None,
+        "latency_ms": perf.snapshot()["metrics"],
+        "writes": {"officer_edits": expected["officers"] - base["officers"],
+                   "site_edits": expected["sites"] - base["sites"], "added_officers": len(added)},
+        "lost_updates": lost,
+        "lost_total": sum(lost.values()),
+        "failed_saves": sum(w.failed_saves for w in workers),
+        "empty_reads": sum(w.empty_reads for w in workers),
+        "errors": [e for w in workers for e in w.errors][:20],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Concurrent DataManager sessions with lost-update detection")
+    parser.add_argument("--data-dir", type=Path, help="dataset to copy (default: small synthetic one)")
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=100, help="operations per session")
+    parser.add_argument("--write-ratio", type=float, default=0.3)
+    parser.add_argument("--officers", type=int, default=50, help="synthetic dataset size")
+    parser.add_argument("--sites", type=int, default=10, help="synthetic dataset size")
+    parser.add_argument("--warmup", action="store_true", help="share a DataWarmup like the server does")
+    parser.add_argument("--service", action="store_true", help="go through Shared.dataservice (one server thread)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", type=Path, help="write the report as JSON")
+    args = parser.parse_args(argv)
+    # Fuera de "streamlit run" cada st.* avisa que no hay ScriptRunContext
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory(prefix="amdaops-load-") as tmp:
+        data_dir = prepare_data_dir(args.data_dir, Path(tmp) / "data", args.officers, args.sites)
+        report = run_load_test(data_dir, args.sessions, args.ops, args.write_ratio, args.warmup, args.seed,
+                               args.service)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        args.out.write_text(text, encoding="utf-8")
+    return 1 if report["lost_total"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
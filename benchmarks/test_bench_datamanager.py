@@ -0,0 +1,43 @@
+import pytest
+
+from shoppingCenter.app import DataManager, _search_phrases
+
+
+@pytest.fixture
+def data_manager(data_config):
+    return DataManager(data_config, {})
+
+
+def _copy(records):
+    return [dict(r) for r in records]
+
+
+def test_search_phrases_category(bench, dataset):
+    bench(_search_phrases, dataset["phrases"], "Patrol", "", 10 ** 9)
+
+
+def test_search_phrases_hotword(bench, dataset):
+    # Sin limite: recorre toda la lista
+    bench(_search_phrases, dataset["phrases"], "", "dock", 10 ** 9)
+
+
+@pytest.mark.parametrize("method,data_type", [
+    ("save_officers", "officers"),
+    ("save_schedules", "schedules"),
+    ("save_time_logs", "time_logs"),
+    ("save_registry", "registry"),
+])
+def test_data_manager_save(bench, dataset, data_manager, method, data_type):
+    save = getattr(data_manager, method)
+    bench(lambda records: save(records), setup=lambda: (_copy(dataset[data_type]),))
+
+
+def test_data_manager_add_schedule(bench, dataset, data_manager):
+    data_manager.save_schedules(_copy(dataset["schedules"]))
+    shift = dict(dataset["schedules"][0])
+
+    def setup():
+        data_manager._schedules = _copy(dataset["schedules"])
+        return (dict(shift, id=f"bench-{len(data_manager._schedules)}"),)
+
+    bench(data_manager.add_schedule, setup=setup)
@@ -0,0 +1,177 @@
+import json
+import tracemalloc
+
+import pytest
+
+from Shared import codec
+from Shared.archive import read_columns, write_columns
+from Shared.bulk_import import Indexes, import_rows
+from Shared.changefeed import ChangeFeed
+from Shared.compact import compact
+from Shared.datagen import DatasetGenerator
+from Shared.export import export
+from Shared.loader import load_phrases
+from Shared.partitions import MONTH_OF, MonthlyPartitions
+from Shared.phrase import filter_phrases_by_site, get_categories, get_hotwords, save_phrase
+from Shared.punch_ingest import iter_jsonl
+from Shared.registry import get_site_by_prefix, load_registry
+from Shared.shards import ShardedPartitions, ShardMap
+from Shared.timeutil import shift_bounds
+
+
+def _write(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(records, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def test_load_phrases(bench, dataset, tmp_path):
+    path = _write(tmp_path / "phrases.json", dataset["phrases"])
+    bench(load_phrases, path)
+
+
+def test_load_registry(bench, dataset, tmp_path):
+    path = _write(tmp_path / "site_registry.json", dataset["registry"])
+    bench(load_registry, path)
+
+
+def test_get_site_by_prefix(bench, dataset):
+    registry = dataset["registry"]
+    # Peor caso: el ultimo sitio del registro
+    bench(get_site_by_prefix, registry, registry[-1]["prefix"])
+
+
+def test_filter_phrases_by_site(bench, dataset):
+    phrase = dataset["phrases"][0]
+    site_info = {"site": phrase["site"], "name": phrase["name"], "address": phrase["address"]}
+    bench(filter_phrases_by_site, dataset["phrases"], site_info)
+
+
+def test_get_categories(bench, dataset):
+    bench(get_categories, dataset["phrases"])
+
+
+def test_get_hotwords(bench, dataset):
+    bench(get_hotwords, dataset["phrases"])
+
+
+def test_save_phrase(bench, dataset, tmp_path):
+    path = tmp_path / "phrases.json"
+    new_phrase = {"site": "ShoppingCenter", "cat": "Patrol", "en": "Benchmark phrase.", "es": "Frase de prueba."}
+    bench(save_phrase, setup=lambda: (path, list(dataset["phrases"]), dict(new_phrase)))
+
+
+def test_changefeed_since(bench, dataset):
+    feed = ChangeFeed()
+    for shift in dataset["schedules"]:
+        feed.append("schedules", "upsert", shift.get("id"), shift)
+    # Poll tipico de una vista en vivo: solo las ultimas entradas
+    bench(feed.since, max(0, feed.seq - 10))
+
+
+def test_partitions_read_week(bench, dataset, tmp_path):
+    store = MonthlyPartitions(tmp_path / "work_schedules", MONTH_OF["schedules"])
+    store.save_all(dataset["schedules"], force=True)
+    # Ultima semana con turnos: solo se abren los meses que toca
+    hi = max(shift_bounds(s)[0] for s in dataset["schedules"])
+
+    def _fresh():
+        # Instancia nueva: mide la lectura en frio, sin la cache de meses
+        return MonthlyPartitions(store.root, MONTH_OF["schedules"]), hi - 7 * 86400, hi
+
+    bench(MonthlyPartitions.read_range, setup=_fresh)
+
+
+def test_shards_read_site_week(bench, dataset, tmp_path):
+    shard_map = ShardMap(tmp_path / "shard_map.json")
+    store = ShardedPartitions(tmp_path / "work_schedules", MONTH_OF["schedules"], shard_map)
+    store.save_all(dataset["schedules"], force=True)
+    site = dataset["schedules"][-1]["site_prefix"]
+    hi = max(shift_bounds(s)[0] for s in dataset["schedules"])
+
+    def _fresh():
+        # Sin shards residentes: se abre solo el del sitio
+        return ShardedPartitions(store.root, MONTH_OF["schedules"], shard_map), site
+
+    bench(lambda s, site: s.for_site(site).read_range(hi - 7 * 86400, hi), setup=_fresh)
+
+
+def test_archive_read_columns(bench, dataset, tmp_path):
+    pytest.importorskip("pandas")
+    path = write_columns(tmp_path / "2026-01", "time_logs", dataset["time_logs"])
+    # Consulta tipica de nomina: 4 de las 6 columnas
+    bench(read_columns, path, "time_logs", ["officer_id", "site_prefix", "event", "ts"])
+
+
+def test_compact_time_logs(bench, dataset):
+    raw = json.dumps(dataset["time_logs"])
+    bench(lambda: compact("time_logs", json.loads(raw)))
+
+
+def test_compact_time_logs_memory():
+    # Cardinalidad de un cliente real: pocos sitios y oficiales, muchos punches
+    gen = DatasetGenerator(sites=20, officers=200, seed=1)
+    punches = [p for _, day_punches in gen.iter_days(days=60) for p in day_punches]
+    raw = json.dumps(punches)
+    # Registros recien parseados, como al cargar el archivo (sin strings compartidos)
+    tracemalloc.start()
+    try:
+        records = json.loads(raw)
+        as_dicts = tracemalloc.get_traced_memory()[0]
+        del records
+        before = tracemalloc.get_traced_memory()[0]
+        table = compact("time_logs", json.loads(raw))
+        as_table = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    assert len(table) == len(punches)
+    assert as_dicts >= 4 * as_table
+
+
+def _use_backend(monkeypatch, backend):
+    if backend == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(codec, "orjson", None)
+
+
+@pytest.mark.parametrize("backend", ["json", "orjson"])
+def test_codec_loads_schedules(bench, dataset, monkeypatch, backend):
+    _use_backend(monkeypatch, backend)
+    raw = codec.dumps(dataset["schedules"], indent=2)
+    bench(codec.loads, raw)
+
+
+@pytest.mark.parametrize("backend", ["json", "orjson"])
+def test_codec_dumps_schedules(bench, dataset, monkeypatch, backend):
+    _use_backend(monkeypatch, backend)
+    bench(codec.dumps, dataset["schedules"], codec.indent_for("schedules"))
+
+
+@pytest.mark.parametrize("suffix", ["", ".gz", ".xz"])
+def test_read_time_logs_month(bench, dataset, tmp_path, suffix):
+    # Costo de descomprimir un mes de punches frente al JSONL plano (un mes caliente conviene sin comprimir)
+    path = tmp_path / f"2026-01.jsonl{suffix}"
+    path.write_bytes(codec.pack(path, b"".join(codec.dumps(r) + b"\n" for r in dataset["time_logs"])))
+    bench(lambda p: list(iter_jsonl(p)), path)
+
+
+def test_bulk_import_shifts(bench, dataset, tmp_path):
+    pytest.importorskip("pandas")
+    import pandas as pd
+
+    # Los turnos del dataset como CSV (oficial por email): valida, busca duplicados y arma los cambios
+    emails = {o["id"]: o["email"] for o in dataset["officers"]}
+    path = tmp_path / "shifts.csv"
+    pd.DataFrame([{"officer_email": emails[s["officer_id"]], "site_prefix": s["site_prefix"], "date": s["date"],
+                   "start_time": s["start_time"], "end_time": s["end_time"]}
+                  for s in dataset["schedules"] if s["officer_id"] in emails]).to_csv(path, index=False)
+    bench(lambda p: import_rows(p, "shifts", Indexes(dataset["officers"], dataset["registry"])), path)
+
+
+def test_export_time_logs_csv(bench, dataset, tmp_path):
+    # Todos los punches del dataset a CSV, leyendo el JSON registro a registro
+    _write(tmp_path / "time_logs.json", dataset["time_logs"])
+    _write(tmp_path / "security_officers.json", dataset["officers"])
+    _write(tmp_path / "site_registry.json", dataset["registry"])
+    bench(lambda d: export(d, "time_logs", 0, 2 ** 40, d / "out.csv"), tmp_path)
@@ -0,0 +1,21 @@
+"""Acceptance test for the storage layer: concurrent sessions must not lose writes."""
+import pytest
+
+from loadtest import prepare_data_dir, run_load_test
+
+from conftest import RESULTS
+
+
+@pytest.mark.parametrize("use_warmup,use_service", [(False, False), (True, False), (False, True)],
+                         ids=["direct", "warmup", "service"])
+def test_no_lost_updates(request, tmp_path, monkeypatch, use_warmup, use_service):
+    data_dir = prepare_data_dir(None, tmp_path / "data", officers=50, sites=10)
+    # run_load_test fija AMDAOPS_DATA_DIR; monkeypatch lo restaura al terminar
+    monkeypatch.setenv("AMDAOPS_DATA_DIR", str(data_dir))
+    report = run_load_test(data_dir, sessions=8, ops=60, write_ratio=0.4, use_warmup=use_warmup,
+                           use_service=use_service)
+    RESULTS[f"{request.node.name}::throughput"] = {"ops_s": report["throughput_ops_s"],
+                                                     "lost_total": report["lost_total"]}
+    assert not report["errors"], report["errors"]
+    assert report["lost_total"] == 0, report["lost_updates"]
+    assert report["empty_reads"] == 0
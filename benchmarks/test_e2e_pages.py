@@ -0,0 +1,106 @@
+"""Page render benchmarks: AppTest drives the app against synthetic datasets.
+
+Every interaction (script run after a click or selection) is recorded as
+`<test>::<label>` in the same results/baseline files as the micro-benchmarks.
+"""
+import json
+from collections import Counter
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from Shared.datagen import FILES, generate
+
+from conftest import RESULTS, ROOT
+
+APP = ROOT / "shoppingCenter" / "app.py"
+MULTIPAGE_DIR = ROOT / "shoppingCenter" / "streamlit_app"
+MULTIPAGE = sorted(p.relative_to(MULTIPAGE_DIR).as_posix()
+                   for p in list(MULTIPAGE_DIR.glob("*.py")) + list(MULTIPAGE_DIR.glob("pages/*.py"))
+                   if p.name != "__init__.py")
+PAGES = ["Home", "Work Scheduling", "Time Tracking", "Operations Board", "Search phrases", "View all"]
+TIMEOUT = 600
+
+
+@pytest.fixture(scope="module")
+def e2e_datasets(tmp_path_factory):
+    cache = {}
+
+    def _get(size: int):
+        if size not in cache:
+            out = tmp_path_factory.mktemp(f"data{size}")
+            generate(out, sites=max(2, size // 10), officers=size, punches=size * 4, phrases=max(200, size * 3))
+            with open(out / FILES["phrases"], "r", encoding="utf-8") as f:
+                per_site = Counter((p["site"], p["name"], p["address"]) for p in json.load(f))
+            with open(out / FILES["registry"], "r", encoding="utf-8") as f:
+                registry = json.load(f)
+            with open(out / FILES["officers"], "r", encoding="utf-8") as f:
+                officer_id = json.load(f)[0]["id"]
+            # Sitio con mas frases: el que tiene paginacion en "View all"
+            prefix = max(registry, key=lambda s: per_site[(s["site"], s["name"], s["address"])])["prefix"]
+            cache[size] = {"dir": out, "prefix": prefix, "officer_id": officer_id}
+        return cache[size]
+    return _get
+
+
+def _check(at: AppTest):
+    assert not at.exception, [e.value for e in at.exception]
+
+
+def _button(at: AppTest, label: str):
+    return next(b for b in at.button if label in b.label)
+
+
+def _selectbox(at: AppTest, label: str):
+    return next(s for s in at.selectbox if label in s.label)
+
+
+def test_app_pages(bench, e2e_datasets, e2e_size, monkeypatch):
+    data = e2e_datasets(e2e_size)
+    monkeypatch.setenv("AMDAOPS_DATA_DIR", str(data["dir"]))
+    # bootstrap() se cachea por proceso: cada tamano arranca en frio
+    st.cache_resource.clear()
+    at = AppTest.from_file(str(APP), default_timeout=TIMEOUT)
+
+    bench.step("cold_start", at.run)
+    _check(at)
+    bench.step("select_site", lambda: at.sidebar.selectbox(key="site_selector").set_value(data["prefix"]).run())
+    _check(at)
+
+    for page in PAGES:
+        bench.step(f"open:{page}", lambda: at.sidebar.radio(key="nav_menu").set_value(page).run())
+        _check(at)
+        bench.step(f"rerun:{page}", at.run, rounds=3)
+
+    # Edicion de oficial (la lista completa se vuelve a pintar con sus avatares)
+    at.sidebar.radio(key="nav_menu").set_value("Home").run()
+    bench.step("officer_edit_open", lambda: at.button(key=f"btn_edit_{data['officer_id']}").click().run())
+    _check(at)
+    bench.step("officer_edit_save", lambda: _button(at, "Save").click().run())
+    _check(at)
+
+    at.sidebar.radio(key="nav_menu").set_value("Search phrases").run()
+    _selectbox(at, "Category").set_value("Patrol")
+    bench.step("search", lambda: _button(at, "Search Phrases").click().run())
+    _check(at)
+
+    at.sidebar.radio(key="nav_menu").set_value("View all").run()
+    assert at.number_input, "selected site should have more than one page of phrases"
+    bench.step("paginate", lambda: at.number_input[0].set_value(2).run())
+    _check(at)
+
+
+@pytest.mark.parametrize("page", MULTIPAGE)
+def test_multipage(bench, e2e_datasets, e2e_size, monkeypatch, page):
+    data = e2e_datasets(e2e_size)
+    monkeypatch.setenv("AMDAOPS_DATA_DIR", str(data["dir"]))
+    st.cache_resource.clear()
+    at = AppTest.from_file(str(MULTIPAGE_DIR / page), default_timeout=TIMEOUT)
+    bench.step("render", at.run)
+    if at.exception and "No module named" in at.exception[0].value:
+        # Varias paginas importan modules.core / shared, que no existen en este arbol
+        RESULTS.pop(f"{bench.name}::render", None)
+        pytest.skip(f"{page}: {at.exception[0].value}")
+    _check(at)
+    bench.step("rerun", at.run, rounds=3)
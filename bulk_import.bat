@@ -0,0 +1,10 @@
+@echo off
+REM Importacion masiva desde CSV/XLSX: bulk_import.bat officers C:\ruta\archivo.xlsx (o sites / shifts)
+REM Las filas con error no se guardan; el detalle queda en archivo_report.csv, junto al archivo
+
+cd /d "C:\AmdaOps"
+python -m Shared.bulk_import %1 %2 --data-dir "C:\AmdaOps\shoppingCenter\data" --report "%~dpn2_report.csv"
+
+echo.
+echo Importacion terminada. Presiona una tecla para cerrar...
+pause >nul
@@ -0,0 +1,11 @@
+@echo off
+REM Extracto de nomina/facturacion: export_extract.bat time_logs 2026-01-01 2026-01-31 (o schedules)
+REM Para un solo sitio agregar el prefijo: export_extract.bat time_logs 2026-01-01 2026-01-31 "WD 100"
+REM El CSV queda en C:\AmdaOps\shoppingCenter\data\exports (agregar --format xlsx para Excel)
+
+cd /d "C:\AmdaOps"
+python -m Shared.export %1 --start %2 --end %3 --site "%~4" --data-dir "C:\AmdaOps\shoppingCenter\data"
+
+echo.
+echo Extracto terminado. Presiona una tecla para cerrar...
+pause >nul
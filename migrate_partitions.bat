@@ -0,0 +1,11 @@
+@echo off
+REM Migra time_logs y work_schedules a particiones mensuales (YYYY-MM.jsonl)
+REM Detener la app, el servicio de punches y el de datos antes de migrar
+
+cd /d "C:\AmdaOps"
+python -m Shared.partitions migrate --data-dir "C:\AmdaOps\shoppingCenter\data"
+python -m Shared.partitions list --data-dir "C:\AmdaOps\shoppingCenter\data"
+
+echo.
+echo Migracion terminada. Presiona una tecla para cerrar...
+pause >nul
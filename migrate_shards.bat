@@ -0,0 +1,11 @@
+@echo off
+REM Separa las particiones mensuales en una carpeta por sitio (shard_map.json)
+REM Detener la app, el servicio de punches y el de datos antes de migrar
+
+cd /d "C:\AmdaOps"
+python -m Shared.shards migrate --data-dir "C:\AmdaOps\shoppingCenter\data"
+python -m Shared.shards list --data-dir "C:\AmdaOps\shoppingCenter\data"
+
+echo.
+echo Migracion terminada. Presiona una tecla para cerrar...
+pause >nul
@@ -0,0 +1,10 @@
+@echo off
+REM Servicio de datos compartido por los workers de Streamlit
+REM En la app: set AMDAOPS_DATA_SERVICE=tcp:127.0.0.1:8766
+
+cd /d "C:\AmdaOps"
+python -m Shared.dataservice --data-dir "C:\AmdaOps\shoppingCenter\data" --address tcp:127.0.0.1:8766
+
+echo.
+echo Servicio de datos detenido. Presiona una tecla para cerrar...
+pause >nul
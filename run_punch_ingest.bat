@@ -0,0 +1,9 @@
+@echo off
+REM Servicio local de clock-in/clock-out (POST http://127.0.0.1:8765/punch)
+
+cd /d "C:\AmdaOps"
+python -m Shared.punch_ingest --data-dir "C:\AmdaOps\shoppingCenter\data" --port 8765
+
+echo.
+echo Servicio de punches detenido. Presiona una tecla para cerrar...
+pause >nul
@@ -3,11 +3,15 @@ import streamlit as st
 from pathlib import Path
 import sys
 import json
-from datetime import datetime
-from typing import Dict, List, Optional, Any
+import logging
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import Dict, List, Optional, Any, Union
 import re
 import uuid
 import base64, hashlib, io
+import os
+import time
 try:
     from PIL import Image
 except Exception:
@@ -16,6 +20,35 @@ except Exception:
 # ðŸ”— Add shared folder to path
 shared_path = Path(__file__).resolve().parent.parent / "shared"
 sys.path.append(str(shared_path))
+# Raiz del proyecto, para que "from Shared..." funcione sin depender del cwd
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.append(str(project_root))
+
+from Shared import codec
+from Shared.anomaly import read_flags
+from Shared.archive import site_kpis
+from Shared.bulk_import import KINDS as IMPORT_KINDS, ON_DUPLICATE, Indexes, import_rows, report_csv
+from Shared.changefeed import ChangeFeed, FeedBatch
+from Shared.compact import RecordTable, compact
+from Shared.export import EXPORT_DIR, FORMATS as EXPORT_FORMATS, export, export_name, prune_exports
+from Shared.dataservice import DataServiceClient, RemoteScheduleIndex, ServiceError
+from Shared.filestore import (SaveResult, WriteConflict, apply_diff, diff_records, iter_json_records, read_stamp,
+                              save_json_changes, save_json_records, snapshot)
+from Shared.opsboard import LATE, OpsBoard
+from Shared.partitions import PARTITION_DIRS, MonthlyPartitions, open_partitions
+from Shared.payroll import ROLLUP_NAME, PayrollRollup
+from Shared.perf import PERF, timed
+from Shared.punch_ingest import JOURNAL_NAME, iter_jsonl
+from Shared.reconcile import reconcile, summarize
+from Shared.schedule_index import ScheduleIndex, SharedScheduleIndex
+from Shared.shards import ShardedPartitions
+from Shared.stats import (STATS_NAME, is_stale, load_stats, officer_stats, schedule_stats,
+                          site_stats, update_stats)
+from Shared.timeutil import parse_epoch, shift_bounds, to_epoch
+from Shared.warmup import DataWarmup, files_signature
+
+log = logging.getLogger(__name__)
 
 # âš™ï¸ Page config
 st.set_page_config(
@@ -94,7 +127,7 @@ def load_shared_modules():
             'load_registry': load_registry,
             'get_prefixes': get_prefixes,
             'get_site_by_prefix': get_site_by_prefix,
-            'filter_phrases_by_site': filter_phrases_by_site,
+            'filter_phrases_by_site': timed("filter_phrases_by_site")(filter_phrases_by_site),
             'get_categories': get_categories,
             'get_hotwords': get_hotwords
         }
@@ -109,20 +142,37 @@ class Config:
 
     def __init__(self):
         self.BASE_DIR = Path(__file__).resolve().parent
-        self.DATA_DIR = self.BASE_DIR / "data"
+        # AMDAOPS_DATA_DIR: otra carpeta de datos (p. ej. datasets sinteticos de Shared.datagen)
+        self.DATA_DIR = Path(os.environ.get("AMDAOPS_DATA_DIR") or self.BASE_DIR / "data")
         self.DATA_DIR.mkdir(exist_ok=True)
 
         # Photos dir for officers
         self.PHOTOS_DIR = self.DATA_DIR / "officers_photos"
 
         # Core data files
-        self.PHRASES_PATH = self.DATA_DIR / "181_line__bank_Shoping_Center_en_es.json"
+        # El banco de frases puede guardarse comprimido (python -m Shared.codec compress)
+        self.PHRASES_PATH = codec.resolve(self.DATA_DIR / "181_line__bank_Shoping_Center_en_es.json")
         self.REGISTRY_PATH = self.DATA_DIR / "site_registry.json"
 
         # Security officer files
         self.OFFICERS_PATH = self.DATA_DIR / "security_officers.json"
         self.SCHEDULES_PATH = self.DATA_DIR / "work_schedules.json"
         self.TIME_LOGS_PATH = self.DATA_DIR / "time_logs.json"
+        # Particiones mensuales (python -m Shared.partitions migrate): si existen reemplazan a los .json
+        self.SCHEDULES_PARTITIONS = self.DATA_DIR / PARTITION_DIRS["schedules"]
+        self.TIME_LOGS_PARTITIONS = self.DATA_DIR / PARTITION_DIRS["time_logs"]
+        # Journal append-only donde el servicio de punches hace group commit (o la carpeta de meses)
+        self.TIME_LOGS_JOURNAL_PATH = (self.TIME_LOGS_PARTITIONS if self.TIME_LOGS_PARTITIONS.is_dir()
+                                       else self.DATA_DIR / JOURNAL_NAME)
+        self.PAYROLL_ROLLUP_PATH = self.DATA_DIR / ROLLUP_NAME
+        self.STATS_PATH = self.DATA_DIR / STATS_NAME
+        self.PERF_DUMP_PATH = self.DATA_DIR / "perf_metrics.json"
+        # Panel de rendimiento solo para administradores (AMDAOPS_ADMIN=1)
+        self.ADMIN = os.environ.get("AMDAOPS_ADMIN", "") == "1"
+        # Servicio de datos compartido entre workers (p. ej. unix:/ruta/dataservice.sock)
+        self.DATA_SERVICE = os.environ.get("AMDAOPS_DATA_SERVICE", "")
+        # Cada cuantos segundos se actualiza el tablero de operaciones
+        self.OPS_BOARD_REFRESH_S = 15
 
         self._initialize_json_files()
 
@@ -174,29 +224,143 @@ class Config:
         return missing_files
 
 
+# Bootstrap: una sola vez por proceso del servidor
+@st.cache_resource(show_spinner=False)
+def bootstrap() -> Dict[str, Any]:
+    """Filesystem initialization, path validation and shared module loading.
+
+    Cached per server process, so a rerun reuses the result without touching
+    the filesystem. `timings` records what each step cost (ms).
+    """
+    timings = {}
+    t0 = time.perf_counter()
+    config = Config()
+    t1 = time.perf_counter()
+    missing_files = config.validate_core_paths()
+    t2 = time.perf_counter()
+    modules = load_shared_modules()
+    t3 = time.perf_counter()
+    service = connect_data_service(config) if not missing_files else None
+    # Datasets ya migrados a particiones: se resuelven una vez (migrar requiere reiniciar el servidor)
+    partitions = open_stores(config)
+    # Carga en paralelo de los cinco datasets; las sesiones esperan los futures
+    warmup = start_warmup(config, modules, partitions) if not missing_files and service is None else None
+    # Indice de turnos del proceso: se arma una vez y se reconstruye solo si cambia el archivo
+    schedule_index = None
+    if warmup is not None and "schedules" in warmup:
+        schedule_index = SharedScheduleIndex(lambda: files_signature([config.SCHEDULES_PATH]),
+                                             lambda: warmup.get("schedules"))
+    timings["config_init_ms"] = (t1 - t0) * 1000
+    timings["validate_paths_ms"] = (t2 - t1) * 1000
+    timings["load_modules_ms"] = (t3 - t2) * 1000
+    timings["total_ms"] = (t3 - t0) * 1000
+    # Cambios de datos con numero de secuencia, compartidos por las sesiones de este proceso
+    feed = ChangeFeed()
+    return {
+        "config": config,
+        "modules": modules,
+        "missing_files": missing_files,
+        "timings": timings,
+        "warmup": warmup,
+        "service": service,
+        "partitions": partitions,
+        "schedule_index": schedule_index,
+        "feed": feed,
+        # Se construye en el primer uso de la pagina Operations Board
+        "board": OpsBoard(config.SCHEDULES_PARTITIONS if config.SCHEDULES_PARTITIONS.is_dir()
+                          else config.SCHEDULES_PATH, config.TIME_LOGS_JOURNAL_PATH, config.TIME_LOGS_PATH,
+                          config.PAYROLL_ROLLUP_PATH, feed=feed),
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def connect_data_service(config: Config) -> Optional[DataServiceClient]:
+    """Client for the shared data service, or None to load the data in this process."""
+    if not config.DATA_SERVICE:
+        return None
+    client = DataServiceClient(config.DATA_SERVICE)
+    try:
+        client.ping()
+    except Exception as e:
+        log.warning("data service %s unavailable (%s); loading data in-process", config.DATA_SERVICE, e)
+        return None
+    return client
+
+
+def open_stores(config: Config) -> Dict[str, MonthlyPartitions]:
+    """Partition store of every dataset already migrated to monthly partitions (or shards)."""
+    stores = {}
+    for data_type in PARTITION_DIRS:
+        store = open_partitions(config.DATA_DIR, data_type)
+        if store is not None:
+            stores[data_type] = store
+    return stores
+
+
+def start_warmup(config: Config, modules: Dict,
+                 partitions: Optional[Dict[str, MonthlyPartitions]] = None) -> DataWarmup:
+    """Load phrases, registry, officers, schedules and time logs concurrently."""
+    loader = DataManager(config, modules, partitions=partitions)
+    warmup = DataWarmup(max_workers=5)
+    warmup.register("phrases", [config.PHRASES_PATH], lambda: loader._load_data('phrases'))
+    warmup.register("registry", [config.REGISTRY_PATH], lambda: loader._load_data('registry'), copy_records=True)
+    warmup.register("officers", [config.OFFICERS_PATH], lambda: loader._load_data('officers'), copy_records=True)
+    # Los datasets particionados no se precargan: las paginas leen solo los meses y el sitio que muestran
+    if 'schedules' not in loader.partitions:
+        warmup.register("schedules", [config.SCHEDULES_PATH], lambda: loader._load_data('schedules'),
+                        copy_records=True)
+    if 'time_logs' not in loader.partitions:
+        warmup.register("time_logs", [config.TIME_LOGS_PATH, config.TIME_LOGS_JOURNAL_PATH],
+                        lambda: loader._load_data('time_logs'))
+
+    def _report(w: DataWarmup):
+        parts = ", ".join(f"{k}={v:.1f}ms" for k, v in w.timings().items() if v is not None)
+        log.info("warmup: datasets loaded: %s", parts)
+
+    return warmup.start(on_ready=_report)
+
+
 # ðŸ“Š Data Manager
 class DataManager:
     """Manage data loading and caching"""
 
-    def __init__(self, config: Config, modules: Dict):
+    # Llave de cada registro para el merge cuando otra sesion guardo antes
+    RECORD_KEYS = {"officers": "id", "schedules": "id", "registry": "prefix", "time_logs": "id"}
+
+    def __init__(self, config: Config, modules: Dict, warmup: Optional[DataWarmup] = None,
+                 service: Optional[DataServiceClient] = None, feed: Optional[ChangeFeed] = None,
+                 schedule_index: Optional[SharedScheduleIndex] = None,
+                 partitions: Optional[Dict[str, MonthlyPartitions]] = None):
         self.config = config
         self.modules = modules or {}
+        self.warmup = warmup
+        self.service = service
+        self.feed = feed
+        self._shared_index = schedule_index
         self._phrases = None
         self._registry = None
         self._officers = None
         self._schedules = None
+        self._schedule_index = None
         self._time_logs = None
+        # Datasets ya migrados a particiones mensuales (de bootstrap; si no, se resuelven aqui)
+        self.partitions: Dict[str, MonthlyPartitions] = open_stores(config) if partitions is None else partitions
+        self._payroll = None
+        self._quick_stats = None
+        # Stamp y copia de lo leido por dataset: base del compare-and-swap al guardar
+        self._stamps: Dict[str, Any] = {}
+        self._bases: Dict[str, Optional[List]] = {}
 
     @property
     def phrases(self) -> List[Dict]:
         if self._phrases is None:
-            self._phrases = self._load_data('phrases')
+            self._phrases = self._fetch('phrases')
         return self._phrases
 
     @property
     def registry(self) -> List[Dict]:
         if self._registry is None:
-            self._registry = self._load_data('registry')
+            self._registry = self._fetch('registry')
             self._registry = self._validate_and_fix_registry(self._registry)
         return self._registry
 
@@ -215,8 +379,9 @@ class DataManager:
                 "country": "USA"
             }]
             try:
-                with open(self.config.REGISTRY_PATH, 'w', encoding='utf-8') as f:
-                    json.dump(cleaned, f, indent=2, ensure_ascii=False)
+                cleaned = self._write_records('registry', cleaned, merge=False).records
+            except WriteConflict:
+                pass  # Otra sesion lo guardo primero; se normaliza en la proxima lectura
             except Exception as e:
                 st.error(f"Error saving corrected registry: {e}")
             return cleaned
@@ -270,32 +435,301 @@ class DataManager:
                 "country": "USA"
             }]
 
-        try:
-            with open(self.config.REGISTRY_PATH, 'w', encoding='utf-8') as f:
-                json.dump(cleaned, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            st.error(f"Error saving normalized registry: {e}")
+        # Solo se reescribe si la normalizacion cambio algo
+        if cleaned != registry_data:
+            try:
+                cleaned = self._write_records('registry', cleaned, merge=False).records
+            except WriteConflict:
+                pass
+            except Exception as e:
+                st.error(f"Error saving normalized registry: {e}")
 
         return cleaned
 
     @property
     def officers(self) -> List[Dict]:
         if self._officers is None:
-            self._officers = self._load_data('officers')
+            self._officers = self._fetch('officers')
         return self._officers
 
     @property
     def schedules(self) -> List[Dict]:
         if self._schedules is None:
-            self._schedules = self._load_data('schedules')
+            self._schedules = self._fetch('schedules')
         return self._schedules
 
+    @property
+    def schedule_index(self) -> ScheduleIndex:
+        if self._schedule_index is None:
+            # Con servicio de datos el indice vive alli; sin el, el de bootstrap (uno por proceso)
+            if self.service is not None:
+                self._schedule_index = RemoteScheduleIndex(self.service)
+            elif self._shared_index is not None:
+                self._schedule_index = self._shared_index
+            else:
+                self._schedule_index = ScheduleIndex(self.schedules)
+        return self._schedule_index
+
     @property
     def time_logs(self) -> List[Dict]:
         if self._time_logs is None:
-            self._time_logs = self._load_data('time_logs')
+            self._time_logs = self._fetch('time_logs')
         return self._time_logs
 
+    @property
+    def payroll(self) -> PayrollRollup:
+        """Daily hour rollups, caught up with punches appended since the last snapshot."""
+        if self._payroll is None:
+            rollup = PayrollRollup.load(self.config.PAYROLL_ROLLUP_PATH)
+            try:
+                if rollup.catch_up(self.config.TIME_LOGS_JOURNAL_PATH, self.config.TIME_LOGS_PATH):
+                    rollup.save(self.config.PAYROLL_ROLLUP_PATH)
+            except Exception as e:
+                st.error(f"Error updating payroll rollups: {e}")
+            self._payroll = rollup
+        return self._payroll
+
+    @property
+    def quick_stats(self) -> Dict:
+        """Sidebar counters, maintained on save so reading them loads no dataset."""
+        if self._quick_stats is None:
+            stats = load_stats(self.config.STATS_PATH)
+            builders = {
+                "officers": lambda: officer_stats(self.officers or []),
+                "schedules": lambda: schedule_stats(self.schedules or []),
+                "sites": lambda: site_stats(self.registry or []),
+            }
+            # Solo se recalcula si falta la seccion o el archivo cambio fuera de la app
+            for section, builder in builders.items():
+                if is_stale(stats.get(section, {}), self._stats_source(section)):
+                    stats = self._update_stats(section, builder()) or stats
+            self._quick_stats = stats
+        return self._quick_stats
+
+    def _stats_source(self, section: str) -> Union[Path, List[Path]]:
+        if section == "schedules" and "schedules" in self.partitions:
+            # Particionado (por mes o por sitio): la firma de la carpeta raiz no ve los cambios en los meses
+            return self.partitions["schedules"].sources()
+        return {"officers": self.config.OFFICERS_PATH,
+                "schedules": self.config.SCHEDULES_PATH,
+                "sites": self.config.REGISTRY_PATH}[section]
+
+    def _update_stats(self, section: str, values: Dict) -> Optional[Dict]:
+        try:
+            self._quick_stats = update_stats(self.config.STATS_PATH, section, values,
+                                             self._stats_source(section))
+            return self._quick_stats
+        except Exception as e:
+            st.error(f"Error updating quick stats: {e}")
+            return None
+
+    def prefetch(self, *data_types: str):
+        """Fetch several datasets from the data service in one round trip."""
+        if self.service is None:
+            return
+        missing = [t for t in data_types if getattr(self, f"_{t}") is None]
+        if not missing:
+            return
+        try:
+            fetched = self.service.get_many(missing)
+        except Exception as e:
+            st.error(f"Error reading from data service: {e}")
+            return
+        for data_type, (data, stamp) in fetched.items():
+            self._remember(data_type, data, stamp)
+            if data_type == 'registry':
+                data = self._validate_and_fix_registry(data)
+            setattr(self, f"_{data_type}", data)
+
+    def reload(self, data_type: str) -> Optional[List[Dict]]:
+        """Drop the session copy of a dataset and read it again."""
+        setattr(self, f"_{data_type}", None)
+        return getattr(self, data_type)
+
+    def _remember(self, data_type: str, data: Optional[List[Dict]], stamp):
+        if data_type in self.RECORD_KEYS:
+            self._stamps[data_type] = stamp
+            # time_logs no se edita en memoria (RecordTable): sirve de base sin copiarlo
+            self._bases[data_type] = data if data_type == 'time_logs' else snapshot(data)
+
+    def _fetch(self, data_type: str) -> Optional[List[Dict]]:
+        """Take the dataset from the data service or the shared warm-up when available, else load it here."""
+        if self.service is not None:
+            try:
+                data, stamp = self.service.get(data_type)
+                self._remember(data_type, data, stamp)
+                return data
+            except Exception as e:
+                st.error(f"Error reading {data_type} from data service: {e}")
+        if data_type in self.RECORD_KEYS:
+            # El stamp se lee antes que los datos: en el peor caso provoca un merge de mas
+            self._stamps[data_type] = read_stamp(self._data_path(data_type))
+        data = None
+        if self.warmup is not None and data_type in self.warmup:
+            try:
+                data = self.warmup.get(data_type)
+            except Exception as e:
+                st.error(f"Error waiting for {data_type} warm-up: {e}")
+        if data is None:
+            data = self._load_data(data_type)
+        self._remember(data_type, data, self._stamps.get(data_type))
+        return data
+
+    def _data_path(self, data_type: str) -> Path:
+        if data_type in self.partitions:
+            return self.partitions[data_type].root
+        return {"phrases": self.config.PHRASES_PATH,
+                "registry": self.config.REGISTRY_PATH,
+                "officers": self.config.OFFICERS_PATH,
+                "schedules": self.config.SCHEDULES_PATH,
+                "time_logs": self.config.TIME_LOGS_PATH}[data_type]
+
+    def _write_records(self, data_type: str, records: List[Dict], merge: bool = True):
+        """Locked compare-and-swap save; merges record by record if the file changed since it was read."""
+        # Lo que habia antes, para publicar en el feed solo los registros que cambiaron
+        before = self._time_logs if data_type == 'time_logs' else self._bases.get(data_type)
+        if data_type == 'time_logs' and self._bases.get(data_type) is None:
+            # Sin base el diff subiria todos los punches, los del journal incluidos
+            self._fetch(data_type)
+        if self.service is not None:
+            result = self._write_remote(data_type, records, merge)
+        elif data_type in self.partitions:
+            result = self._write_partitions(data_type, before, records)
+        elif data_type == 'time_logs':
+            result = self._write_time_logs(records, merge)
+        else:
+            # Con sangria o compacto segun el dataset (Shared.codec)
+            result = save_json_records(self._data_path(data_type), records, self._stamps.get(data_type),
+                                       self._bases.get(data_type), self.RECORD_KEYS[data_type], merge=merge,
+                                       indent=codec.indent_for(data_type))
+        self._stamps[data_type] = result.stamp
+        if data_type == 'time_logs':
+            result = result._replace(records=compact('time_logs', result.records))
+            self._bases[data_type] = result.records
+        else:
+            self._bases[data_type] = snapshot(result.records)
+        if self.feed is not None:
+            self.feed.record_diff(data_type, before, result.records, self.RECORD_KEYS[data_type])
+        return result
+
+    def changes_since(self, seq: int, data_types: Optional[List[str]] = None) -> Optional[FeedBatch]:
+        """Changes saved by any session of this process after `seq` (None without a feed)."""
+        if self.feed is None:
+            return None
+        return self.feed.since(seq, data_types)
+
+    def _write_remote(self, data_type: str, records: List[Dict], merge: bool) -> SaveResult:
+        # Solo viajan los registros cambiados; el servicio hace el merge y guarda
+        changes = diff_records(self._bases.get(data_type), records, self.RECORD_KEYS[data_type])
+        try:
+            reply = self.service.save(data_type, changes, self._stamps.get(data_type), merge=merge)
+        except ServiceError as e:
+            raise RuntimeError(f"data service: {e}") from e
+        return SaveResult(reply.get("records", records), reply["stamp"], reply["merged"])
+
+    def _write_time_logs(self, records: List[Dict], merge: bool) -> SaveResult:
+        # El journal es solo de altas: a time_logs.json van solo los punches que no estaban leidos
+        changes = diff_records(self._bases.get('time_logs'), records, self.RECORD_KEYS['time_logs'])
+        result = save_json_changes(self.config.TIME_LOGS_PATH, changes, self._stamps.get('time_logs'),
+                                   self.RECORD_KEYS['time_logs'], merge=merge, indent=codec.indent_for('time_logs'))
+        return result._replace(records=chain(result.records, iter_jsonl(self.config.TIME_LOGS_JOURNAL_PATH)))
+
+    def _write_partitions(self, data_type: str, before: Optional[List[Dict]], records: List[Dict]) -> SaveResult:
+        # Solo se reescriben los meses tocados (merge por mes); los punches solo se agregan
+        store = self.partitions[data_type]
+        key = self.RECORD_KEYS[data_type]
+        store.save_changes(diff_records(before, records, key), key, append_only=data_type == 'time_logs')
+        current = store.read_all()
+        if data_type != 'time_logs':
+            current = snapshot(current)
+        return SaveResult(current, read_stamp(store.root), True)
+
+    def shifts_between(self, lo: int, hi: int, site_prefix: str = "", overlapping: bool = False) -> List[Dict]:
+        """Shifts starting in [lo, hi) (or overlapping it), for one site or all; opens only those months."""
+        store = self.partitions.get('schedules')
+        if store is None or self.service is not None:
+            index = self.schedule_index
+            sites = [site_prefix] if site_prefix else index.sites()
+            return [s for site in sites for s in index.site_range(site, lo, hi, overlapping=overlapping)]
+        # Con shards por sitio solo se abre el del sitio elegido
+        source = store.for_site(site_prefix) if site_prefix else store
+        # Desde un dia antes: un turno nocturno del mes anterior puede terminar dentro del rango
+        return self._filter_shifts(source.read_range(lo - 86400, hi), lo, hi, site_prefix, overlapping)
+
+    @staticmethod
+    def _filter_shifts(shifts: List[Dict], lo: int, hi: int, site_prefix: str = "",
+                       overlapping: bool = False) -> List[Dict]:
+        out = []
+        for shift in shifts:
+            bounds = shift_bounds(shift)
+            if bounds is None or (site_prefix and shift.get("site_prefix") != site_prefix):
+                continue
+            if (bounds[0] < hi and bounds[1] > lo) if overlapping else (lo <= bounds[0] < hi):
+                out.append(dict(shift))
+        return sorted(out, key=lambda s: shift_bounds(s)[0])
+
+    def next_shift(self, site_prefix: str, now: int) -> Optional[Dict]:
+        """First shift of a site starting at or after `now`."""
+        store = self.partitions.get('schedules')
+        if store is None or self.service is not None:
+            return self.schedule_index.next_for_site(site_prefix, now)
+        # Los meses se leen en orden: el primero con un turno futuro tiene el mas proximo
+        for month in store.for_site(site_prefix).read_from(now):
+            upcoming = [(shift_bounds(s)[0], s) for s in month
+                        if s.get("site_prefix") == site_prefix and shift_bounds(s) and shift_bounds(s)[0] >= now]
+            if upcoming:
+                return dict(min(upcoming, key=lambda t: t[0])[1])
+        return None
+
+    def punches_between(self, lo: int, hi: int, site_prefix: str = "") -> List[Dict]:
+        """Punches with ts in [lo, hi), for one site or all."""
+        store = self.partitions.get('time_logs')
+        if store is not None and self.service is None:
+            source = (store.for_site(site_prefix) if site_prefix else store).read_range(lo, hi)
+        elif isinstance(self.time_logs, RecordTable):
+            # Filtro sobre las columnas: solo se decodifican los punches del rango
+            return self.time_logs.select(lo, hi, **({"site_prefix": site_prefix} if site_prefix else {}))
+        else:
+            source = self.time_logs or []
+        return [p for p in source if lo <= (parse_epoch(p.get("ts")) or -1) < hi
+                and (not site_prefix or p.get("site_prefix") == site_prefix)]
+
+    def reconcile_between(self, lo: int, hi: int, site_prefix: str = "") -> List[Dict]:
+        """Schedule vs actual for shifts starting in [lo, hi); with shards, one site per worker thread."""
+        schedules, time_logs = self.partitions.get('schedules'), self.partitions.get('time_logs')
+        sharded = isinstance(schedules, ShardedPartitions) and isinstance(time_logs, ShardedPartitions)
+        if site_prefix or not sharded or self.service is not None:
+            return reconcile(self.shifts_between(lo, hi, site_prefix), self.punches_between(lo, hi, site_prefix))
+
+        def _shard(shard_schedules) -> List[Dict]:
+            shifts = self._filter_shifts(shard_schedules.read_range(lo - 86400, hi), lo, hi)
+            punches = [p for p in time_logs.shard(shard_schedules.root.name).read_range(lo, hi)
+                       if lo <= (parse_epoch(p.get("ts")) or -1) < hi]
+            return reconcile(shifts, punches)
+
+        names = sorted(set(schedules.shard_names()) | set(time_logs.shard_names()))
+        return [row for rows in schedules.fan_out(_shard, names) for row in rows]
+
+    def live_schedules(self, now: int) -> List[Dict]:
+        """Shifts that can still be in progress or upcoming at `now` (the whole dataset when not partitioned)."""
+        store = self.partitions.get('schedules')
+        if store is None or self.service is not None:
+            return self.reload('schedules') or []
+        return [dict(s) for month in store.read_from(now - 86400) for s in month]
+
+    def _write_conflict(self, data_type: str, error: WriteConflict):
+        st.error(f"{data_type.capitalize()} were changed by another session "
+                 f"({len(error.keys)} record(s) in conflict). Reload and try again.")
+        # Se descarta la copia local: la proxima lectura trae lo que hay en disco
+        setattr(self, f"_{data_type}", None)
+        self._stamps.pop(data_type, None)
+        self._bases.pop(data_type, None)
+
+    def _publish(self, data_type: str, data: List[Dict]):
+        if self.warmup is not None and data_type in self.warmup:
+            self.warmup.put(data_type, data)
+
+    @timed("DataManager._load_data")
     def _load_data(self, data_type: str) -> Optional[List[Dict]]:
         try:
             if data_type == 'phrases':
@@ -305,55 +739,109 @@ class DataManager:
                 fn = self.modules.get('load_registry')
                 return fn(self.config.REGISTRY_PATH) if callable(fn) else []
             elif data_type == 'officers':
-                with open(self.config.OFFICERS_PATH, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return codec.load(self.config.OFFICERS_PATH)
+            elif data_type in self.partitions:
+                # Todos los meses; las vistas por rango usan shifts_between / punches_between
+                store = self.partitions[data_type]
+                if data_type == 'schedules':
+                    return snapshot(store.read_all())
+                # Mes a mes: nunca estan todos los punches como dicts a la vez
+                return compact('time_logs', (p for month in store.months() for p in store.read(month)))
             elif data_type == 'schedules':
-                with open(self.config.SCHEDULES_PATH, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return codec.load(self.config.SCHEDULES_PATH)
             elif data_type == 'time_logs':
-                with open(self.config.TIME_LOGS_PATH, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                # Solo de altas y sin edicion en la UI: se guarda por columnas (Shared.compact),
+                # leyendo el archivo registro a registro
+                return compact('time_logs', chain(iter_json_records(self.config.TIME_LOGS_PATH),
+                                                  iter_jsonl(self.config.TIME_LOGS_JOURNAL_PATH)))
         except Exception as e:
             st.error(f"âŒ **Error loading {data_type}**: {e}")
             return []
         return []
 
+    @timed()
     def save_officers(self, officers_data: List[Dict]):
         try:
-            with open(self.config.OFFICERS_PATH, "w", encoding="utf-8") as f:
-                json.dump(officers_data, f, indent=2, ensure_ascii=False)
+            officers_data = self._write_records('officers', officers_data).records
             self._officers = officers_data
+            self._publish('officers', officers_data)
+            self._update_stats("officers", officer_stats(officers_data))
             return True
+        except WriteConflict as e:
+            self._write_conflict('officers', e)
+            return False
         except Exception as e:
             st.error(f"Error saving officers: {e}")
             return False
 
+    @timed()
     def save_schedules(self, schedules_data: List[Dict]):
         try:
-            with open(self.config.SCHEDULES_PATH, "w", encoding="utf-8") as f:
-                json.dump(schedules_data, f, indent=2, ensure_ascii=False)
+            schedules_data = self._write_records('schedules', schedules_data).records
             self._schedules = schedules_data
+            self._publish('schedules', schedules_data)
+            index = self._schedule_index if self._schedule_index is not None else self._shared_index
+            if index is not None:
+                index.sync(schedules_data)
+            self._update_stats("schedules", schedule_stats(schedules_data))
             return True
+        except WriteConflict as e:
+            self._write_conflict('schedules', e)
+            return False
         except Exception as e:
             st.error(f"Error saving schedules: {e}")
             return False
 
+    @timed()
+    def add_schedule(self, shift: Dict):
+        """Append one shift and insert it into the index without a full rebuild."""
+        schedules = list(self.schedules or [])
+        schedules.append(shift)
+        try:
+            result = self._write_records('schedules', schedules)
+        except WriteConflict as e:
+            self._write_conflict('schedules', e)
+            return False
+        except Exception as e:
+            st.error(f"Error saving schedules: {e}")
+            return False
+        schedules = result.records
+        self._schedules = schedules
+        self._publish('schedules', schedules)
+        index = self._schedule_index if self._schedule_index is not None else self._shared_index
+        if index is not None:
+            if result.merged:
+                index.sync(schedules)
+            else:
+                index.add(shift, len(schedules) - 1)
+        self._update_stats("schedules", schedule_stats(schedules))
+        return True
+
+    @timed()
     def save_time_logs(self, time_logs_data: List[Dict]):
         try:
-            with open(self.config.TIME_LOGS_PATH, "w", encoding="utf-8") as f:
-                json.dump(time_logs_data, f, indent=2, ensure_ascii=False)
+            time_logs_data = self._write_records('time_logs', list(time_logs_data)).records
             self._time_logs = time_logs_data
+            self._publish('time_logs', time_logs_data)
             return True
+        except WriteConflict as e:
+            self._write_conflict('time_logs', e)
+            return False
         except Exception as e:
             st.error(f"Error saving time logs: {e}")
             return False
 
+    @timed()
     def save_registry(self, registry_data: List[Dict]):
         try:
-            with open(self.config.REGISTRY_PATH, "w", encoding="utf-8") as f:
-                json.dump(registry_data, f, indent=2, ensure_ascii=False)
+            registry_data = self._write_records('registry', registry_data).records
             self._registry = registry_data
+            self._publish('registry', registry_data)
+            self._update_stats("sites", site_stats(registry_data))
             return True
+        except WriteConflict as e:
+            self._write_conflict('registry', e)
+            return False
         except Exception as e:
             st.error(f"Error saving registry: {e}")
             return False
@@ -403,6 +891,20 @@ class UIComponents:
         except Exception:
             return ""
 
+    @staticmethod
+    @timed("UIComponents._officer_avatar")
+    def _officer_avatar(off: Dict, size: int = 48) -> str:
+        """Photo of the officer when available, otherwise colored initials."""
+        avatar_html = ""
+        photo_path = off.get("photo_path") or ""
+        if photo_path and Path(photo_path).exists():
+            avatar_html = UIComponents._img_tag_from_path(photo_path, size=size)
+        if not avatar_html:
+            initials = UIComponents._initials_from_name(off.get("name", ""))
+            bg = UIComponents._color_from_name(off.get("name", ""))
+            avatar_html = UIComponents._avatar_html(initials, size=size, bg=bg)
+        return avatar_html
+
     @staticmethod
     def _ensure_photos_dir(config) -> Path:
         try:
@@ -762,15 +1264,7 @@ class UIComponents:
 
                 # Avatar
                 with c1:
-                    avatar_html = ""
-                    photo_path = off.get("photo_path") or ""
-                    if photo_path and Path(photo_path).exists():
-                        avatar_html = UIComponents._img_tag_from_path(photo_path, size=48)
-                    if not avatar_html:
-                        initials = UIComponents._initials_from_name(off.get("name", ""))
-                        bg = UIComponents._color_from_name(off.get("name", ""))
-                        avatar_html = UIComponents._avatar_html(initials, size=48, bg=bg)
-                    st.markdown(avatar_html, unsafe_allow_html=True)
+                    st.markdown(UIComponents._officer_avatar(off, size=48), unsafe_allow_html=True)
 
                 with c2:
                     st.write(f"**Name:** {off.get('name','')}")
@@ -854,6 +1348,7 @@ class UIComponents:
 
 
 # ðŸ  Home: Site Management + Officers
+@timed()
 def render_home_page(data_manager: 'DataManager', ui: UIComponents, selected_prefix: str):
     st.title("ðŸ›¡ï¸ AmdaOps - Security Management System")
 
@@ -867,6 +1362,7 @@ def render_home_page(data_manager: 'DataManager', ui: UIComponents, selected_pre
 
 
 # ðŸ” Search Page
+@timed()
 def render_search_page(data_manager: DataManager, selected_prefix: str):
     st.header("ðŸ” Filter Phrases")
     try:
@@ -894,6 +1390,7 @@ def render_search_page(data_manager: DataManager, selected_prefix: str):
             _display_search_results(results)
 
 
+@timed()
 def _search_phrases(phrases: List[Dict], category: str, hotword: str, limit: int) -> List[Dict]:
     results = []
     for phrase in phrases:
@@ -928,6 +1425,7 @@ def _display_search_results(results: List[Dict]):
 
 
 # ðŸ“‹ View All Page
+@timed()
 def render_view_all_page(data_manager: DataManager, selected_prefix: str):
     st.header("ðŸ“‹ All Phrases")
     try:
@@ -969,40 +1467,346 @@ def render_view_all_page(data_manager: DataManager, selected_prefix: str):
 
 
 # ðŸ—“ï¸ Work Scheduling page (placeholder)
+@timed()
 def render_work_scheduling_page(data_manager: DataManager, selected_prefix: str):
     st.header("ðŸ—“ï¸ Work Scheduling")
     st.info("This page will host work shifts, assignments and calendars.")
     st.write(f"Selected Site Prefix: `{selected_prefix or 'â€”'}`")
 
+    if not selected_prefix:
+        return
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    week_start = today - timedelta(days=today.weekday())
+    lo = to_epoch(week_start)
+    hi = to_epoch(week_start + timedelta(days=7))
+    week_shifts = data_manager.shifts_between(lo, hi, selected_prefix, overlapping=True)
+    st.subheader(f"Shifts this week ({week_start:%Y-%m-%d})")
+    if week_shifts:
+        st.dataframe(week_shifts, use_container_width=True, hide_index=True)
+    else:
+        st.caption("No shifts scheduled this week for this site.")
+
+    upcoming = data_manager.next_shift(selected_prefix, to_epoch(datetime.now()))
+    if upcoming:
+        st.write(f"**Next shift:** {upcoming.get('date')} {upcoming.get('start_time')}-{upcoming.get('end_time')} "
+                 f"(officer `{upcoming.get('officer_id', '')}`)")
+
 
 # â±ï¸ Time Tracking page (placeholder)
+@timed()
 def render_time_tracking_page(data_manager: DataManager, selected_prefix: str):
     st.header("â±ï¸ Time Tracking Dashboard")
     st.info("This page will host time logs, metrics, and compliance KPIs.")
     st.write(f"Selected Site Prefix: `{selected_prefix or 'â€”'}`")
 
+    st.subheader("Pay period hours")
+    today = datetime.now().date()
+    col1, col2, col3 = st.columns([1, 1, 1])
+    with col1:
+        period_start = st.date_input("Period start", value=today - timedelta(days=13), key="payroll_start")
+    with col2:
+        period_end = st.date_input("Period end", value=today, key="payroll_end")
+    with col3:
+        only_site = st.checkbox("Only selected site", value=bool(selected_prefix), key="payroll_only_site")
+
+    rollup = data_manager.payroll
+    rows = rollup.period_rows(period_start.isoformat(), period_end.isoformat(),
+                              selected_prefix if only_site else "")
+    names = {o.get("id"): o.get("name", "") for o in (data_manager.officers or [])}
+    for row in rows:
+        row["name"] = names.get(row["officer_id"], "")
+    if rows:
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+        st.write(f"**Total hours:** {sum(r['hours'] for r in rows):.2f}")
+    else:
+        st.caption("No completed punches in this period.")
+    if rollup.open_shifts:
+        st.caption(f"Officers currently clocked in: {len(rollup.open_shifts)}")
+
+    if st.button("Close pay period", key="payroll_close"):
+        rollup.close_period(period_start.isoformat(), period_end.isoformat())
+        rollup.save(data_manager.config.PAYROLL_ROLLUP_PATH)
+        st.success(f"Pay period {period_start} - {period_end} closed.")
+
+    if rollup.closed_periods:
+        with st.expander("Closed pay periods", expanded=False):
+            for period in reversed(rollup.closed_periods):
+                hours = sum(r.get("hours", 0) for r in period.get("rows", []))
+                st.write(f"**{period['start']} - {period['end']}** (closed {period.get('closed_at', '')}): {hours:.2f} h")
+
+    st.subheader("Schedule vs actual")
+    if st.button("Run reconciliation", key="run_reconciliation"):
+        lo = to_epoch(datetime.combine(period_start, datetime.min.time()))
+        hi = to_epoch(datetime.combine(period_end + timedelta(days=1), datetime.min.time()))
+        results = data_manager.reconcile_between(lo, hi, selected_prefix if only_site else "")
+        st.session_state["reconciliation_results"] = results
+
+    results = st.session_state.get("reconciliation_results")
+    if results is not None:
+        counts = summarize(results)
+        cols = st.columns(len(counts))
+        for col, (status, count) in zip(cols, counts.items()):
+            col.metric(status, count)
+        issues = [r for r in results if r["status"] != "on-time"]
+        if issues:
+            st.dataframe(issues, use_container_width=True, hide_index=True)
+
+    st.subheader("Site KPIs")
+    if st.button("Compute site KPIs", key="run_site_kpis"):
+        lo = to_epoch(datetime.combine(period_start, datetime.min.time()))
+        hi = to_epoch(datetime.combine(period_end + timedelta(days=1), datetime.min.time()))
+        try:
+            # Meses cerrados desde el archivo columnar (python -m Shared.archive build), el resto desde JSONL
+            kpis = site_kpis(data_manager.config.DATA_DIR, lo, hi, selected_prefix if only_site else "")
+            st.session_state["site_kpis"] = kpis.to_dict("records")
+        except Exception as e:
+            st.error(f"Error computing site KPIs: {e}")
+    kpi_rows = st.session_state.get("site_kpis")
+    if kpi_rows is not None:
+        if kpi_rows:
+            st.dataframe(kpi_rows, use_container_width=True, hide_index=True)
+        else:
+            st.caption("No shifts or punches in this period.")
+
+    st.subheader("Export")
+    col1, col2, col3 = st.columns([1, 1, 1])
+    with col1:
+        dataset = st.selectbox("Data", ["time_logs", "schedules"], key="export_dataset",
+                               format_func=lambda d: {"time_logs": "Time logs", "schedules": "Schedules"}[d])
+    with col2:
+        fmt = st.selectbox("Format", EXPORT_FORMATS, key="export_format", format_func=str.upper)
+    with col3:
+        st.write("")
+        prepare = st.button("Prepare export", key="export_prepare")
+    if prepare:
+        lo = to_epoch(datetime.combine(period_start, datetime.min.time()))
+        hi = to_epoch(datetime.combine(period_end + timedelta(days=1), datetime.min.time()))
+        site = selected_prefix if only_site else ""
+        data_dir = data_manager.config.DATA_DIR
+        out = data_dir / EXPORT_DIR / export_name(dataset, period_start.isoformat(), period_end.isoformat(), site, fmt)
+        try:
+            # Las filas van del disco al archivo de a una: la memoria no crece con el rango
+            with st.spinner("Writing export..."):
+                count = export(data_dir, dataset, lo, hi, out, site, fmt)
+            st.session_state["export_file"] = (str(out), count)
+            # La carpeta no crece sin limite: se quitan los extractos viejos (el recien escrito es el mas nuevo)
+            prune_exports(out.parent)
+        except Exception as e:
+            st.error(f"Error exporting {dataset}: {e}")
+    prepared = st.session_state.get("export_file")
+    if prepared is not None and Path(prepared[0]).exists():
+        path = Path(prepared[0])
+        mime = "text/csv" if path.suffix == ".csv" else \
+            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        st.caption(f"{prepared[1]:,} row(s), {path.stat().st_size / 1e6:.1f} MB. The whole file is loaded into "
+                   f"memory when you click Download; it is also saved on the server as {path}.")
+        # Callable: el archivo se lee recien al hacer clic, no en cada rerun de la pagina
+        st.download_button(f"Download {path.name}", path.read_bytes, file_name=path.name, mime=mime,
+                           key="export_download")
+
+    st.subheader("Anomalies")
+    flags = read_flags(data_manager.config.DATA_DIR, limit=200,
+                       site_prefix=selected_prefix if only_site else "")
+    if flags:
+        st.dataframe([{k: f.get(k, "") for k in ("ts", "type", "officer_id", "site_prefix", "detail")} for f in flags],
+                     use_container_width=True, hide_index=True)
+    else:
+        st.caption("No anomalies flagged.")
+
+
+# Operations Board (todos los sitios, auto-refresh)
+def _board_rows(data_manager: DataManager, board: OpsBoard, now: int):
+    names = {o.get("id"): o.get("name", "") for o in (data_manager.officers or [])}
+    sites = {r.get("prefix"): r.get("name", "") for r in (data_manager.registry or [])
+             if isinstance(r, dict) and r.get("status", "Active") == "Active"}
+    duty, upcoming = [], []
+    for status in board.board(sites, now):
+        prefix = status["site_prefix"]
+        for row in status["rows"]:
+            duty.append(dict(row, site=sites[prefix], name=names.get(row["officer_id"], "")))
+        nxt = status["next"]
+        if nxt:
+            upcoming.append({"site_prefix": prefix, "site": sites[prefix],
+                             "name": names.get(nxt.get("officer_id"), ""), "officer_id": nxt.get("officer_id", ""),
+                             "date": nxt.get("date", ""), "start_time": nxt.get("start_time", ""),
+                             "end_time": nxt.get("end_time", "")})
+    # Primero los atrasados, luego por sitio
+    duty.sort(key=lambda r: (r["status"] != LATE, -r["late_minutes"], r["site_prefix"]))
+    upcoming.sort(key=lambda r: (r["date"], r["start_time"], r["site_prefix"]))
+    return duty, upcoming
+
+
+@timed()
+def render_operations_board_page(data_manager: DataManager, board: OpsBoard):
+    st.header("Operations Board")
+    refresh_s = data_manager.config.OPS_BOARD_REFRESH_S
+    only_late = st.checkbox("Only late officers", key="board_only_late")
+
+    def _board():
+        now = to_epoch(datetime.now())
+        try:
+            # Solo aplica lo nuevo (feed, journal); relee schedules si se edito fuera de la app
+            board.refresh(now, lambda: data_manager.live_schedules(now))
+        except Exception as e:
+            st.error(f"Error refreshing operations board: {e}")
+            return
+        duty, upcoming = _board_rows(data_manager, board, now)
+        counts = {}
+        for row in duty:
+            counts[row["status"]] = counts.get(row["status"], 0) + 1
+        cols = st.columns(4)
+        for col, status in zip(cols, ("on-duty", "late", "due", "unscheduled")):
+            col.metric(status, counts.get(status, 0))
+        if only_late:
+            duty = [r for r in duty if r["status"] == LATE]
+        st.subheader("On duty now")
+        if duty:
+            st.dataframe([{k: r[k] for k in ("status", "site_prefix", "site", "name", "start", "end",
+                                              "clocked_in", "late_minutes")} for r in duty],
+                         use_container_width=True, hide_index=True)
+        else:
+            st.caption("Nobody on shift right now.")
+        st.subheader("Next shift per site")
+        if upcoming:
+            st.dataframe(upcoming, use_container_width=True, hide_index=True)
+        else:
+            st.caption("No upcoming shifts.")
+        st.caption(f"Updated {datetime.now():%H:%M:%S} - refreshes every {refresh_s} s")
+
+    # st.fragment (Streamlit >= 1.37) vuelve a ejecutar solo el tablero
+    fragment = getattr(st, "fragment", None)
+    if fragment is not None:
+        fragment(run_every=refresh_s)(_board)()
+    else:
+        _board()
+        st.button("Refresh", key="board_refresh")
+
+
+@timed()
+def render_bulk_import_page(data_manager: DataManager):
+    st.header("Bulk Import")
+    st.caption("Officers, sites or shifts from a CSV or XLSX file (first sheet, header in row 1). "
+               "Rows are validated in batches and saved in one write; a row with an existing site prefix "
+               "or officer email/phone is treated as a duplicate.")
+    col1, col2 = st.columns(2)
+    with col1:
+        kind = st.selectbox("Import", list(IMPORT_KINDS), format_func=str.capitalize, key="import_kind")
+    with col2:
+        on_duplicate = st.selectbox("Duplicates", ON_DUPLICATE, key="import_on_duplicate",
+                                    format_func={"update": "Update existing record", "skip": "Skip row",
+                                                 "error": "Report as error"}.get)
+    upload = st.file_uploader("File", type=["csv", "xlsx"], key="import_file")
+    dry_run = st.checkbox("Validate only (do not save)", key="import_dry_run")
+    if upload is None or not st.button("Import", type="primary", key="import_run"):
+        return
+
+    current = {"officers": lambda: data_manager.officers, "sites": lambda: data_manager.registry,
+               "shifts": lambda: data_manager.schedules}
+    status = st.empty()
+    try:
+        # Los turnos se validan contra oficiales y sitios; los duplicados de turnos, contra los existentes
+        indexes = Indexes(data_manager.officers or [], data_manager.registry or [],
+                          current["shifts"]() or [] if kind == "shifts" else ())
+        result = import_rows(upload, kind, indexes, on_duplicate,
+                             progress=lambda n: status.caption(f"{n:,} rows read..."))
+    except Exception as e:
+        st.error(f"Error reading {upload.name}: {e}")
+        return
+    status.empty()
+
+    cols = st.columns(len(result.counts))
+    for col, (name, n) in zip(cols, result.counts.items()):
+        col.metric(name, n)
+    if dry_run:
+        st.info(f"Validation only: {len(result.changes)} record(s) would be saved.")
+    elif result.changes:
+        _, _, key = IMPORT_KINDS[kind]
+        try:
+            records = apply_diff(list(current[kind]() or []), result.changes, key)
+        except WriteConflict as e:
+            st.error(f"Error applying import: {e}")
+            return
+        save = {"officers": data_manager.save_officers, "sites": data_manager.save_registry,
+                "shifts": data_manager.save_schedules}[kind]
+        if save(records):
+            st.success(f"{len(result.changes)} record(s) saved.")
+    else:
+        st.info("Nothing to save.")
+
+    problems = [r for r in result.rows if r["status"] in ("skip", "error")]
+    if problems:
+        st.subheader("Rows not imported")
+        st.dataframe(problems[:1000], use_container_width=True, hide_index=True)
+    st.download_button("Download row report (CSV)", report_csv(result.rows), file_name=f"import_{kind}_report.csv",
+                       mime="text/csv", key="import_report")
+
 
 # ðŸŽ¯ Main Application
+def render_perf_panel(config: Config, boot: Dict[str, Any]):
+    """Admin-only sidebar panel with hot-path latencies (p50/p95/p99, ms)."""
+    st.sidebar.divider()
+    with st.sidebar.expander("Performance", expanded=False):
+        rows = PERF.rows()
+        if rows:
+            st.dataframe(
+                [{k: (round(v, 2) if isinstance(v, float) else v) for k, v in r.items()} for r in rows],
+                use_container_width=True, hide_index=True,
+            )
+        else:
+            st.caption("No samples yet.")
+        st.caption(f"Server started {boot.get('started_at', '')}")
+        st.write("**Bootstrap (ms)**", {k: round(v, 2) for k, v in boot.get("timings", {}).items()})
+        warmup = boot.get("warmup")
+        if warmup is not None:
+            st.write("**Warm-up (ms)**", {k: (round(v, 2) if v is not None else None)
+                                         for k, v in warmup.timings().items()})
+        feed = boot.get("feed")
+        if feed is not None:
+            st.caption(f"Change feed seq: {feed.seq}")
+        for data_type, store in data_manager.partitions.items():
+            if isinstance(store, ShardedPartitions):
+                st.caption(f"{data_type} shards resident: {len(store.resident())}/{store.max_resident}")
+
+        data = PERF.dump_json()
+        st.download_button("Download JSON", data, file_name="perf_metrics.json",
+                           mime="application/json", key="perf_download")
+        c1, c2 = st.columns(2)
+        if c1.button("Save dump", key="perf_save"):
+            try:
+                PERF.dump_json(config.PERF_DUMP_PATH)
+                st.success(f"Saved {config.PERF_DUMP_PATH.name}")
+            except Exception as e:
+                st.error(f"Error saving metrics: {e}")
+        if c2.button("Reset", key="perf_reset"):
+            PERF.reset()
+
+
 def main():
-    # Initialize configuration
-    config = Config()
+    # Initialize configuration, validation and shared modules (once per process)
+    boot = bootstrap()
+    config = boot["config"]
+    modules = boot["modules"]
 
     # Validate core file paths
-    missing_files = config.validate_core_paths()
+    missing_files = boot["missing_files"]
     if missing_files:
+        # No se cachea un arranque fallido: el siguiente rerun vuelve a verificar
+        bootstrap.clear()
         st.error("âŒ **Missing required files:**")
         for file_info in missing_files:
             st.write(f"- {file_info}")
         st.info("ðŸ’¡ **Solution**: Please ensure the data folder exists with the required JSON files.")
         st.stop()
 
-    # Load shared modules
-    modules = load_shared_modules()
     if not modules:
         st.info("âš ï¸ **Note**: Some features may be limited due to missing shared modules.")
 
     # Initialize data manager & UI
-    data_manager = DataManager(config, modules)
+    data_manager = DataManager(config, modules, warmup=boot.get("warmup"), service=boot.get("service"),
+                               feed=boot.get("feed"), schedule_index=boot.get("schedule_index"),
+                               partitions=boot.get("partitions"))
+    # Registry (sidebar) y officers (Home) en una sola ida y vuelta al servicio
+    data_manager.prefetch("registry", "officers")
     ui = UIComponents()
 
     # Sidebar
@@ -1085,16 +1889,17 @@ def main():
     st.sidebar.subheader("ðŸ“‚ Application Pages")
     menu = st.sidebar.radio(
         "Go to",
-        ["Home", "Work Scheduling", "Time Tracking", "Search phrases", "View all"],
+        ["Home", "Work Scheduling", "Time Tracking", "Operations Board", "Bulk Import", "Search phrases", "View all"],
         key="nav_menu"
     )
 
-    # Quick stats
-    if data_manager.officers:
+    # Quick stats (contadores precalculados: no cargan officers/schedules)
+    stats = data_manager.quick_stats
+    if stats.get("officers", {}).get("total"):
         st.sidebar.divider()
         st.sidebar.subheader("ðŸ“Š Quick Stats")
-        active_officers = len([o for o in data_manager.officers if o.get('status') == 'Active'])
-        total_schedules = len(data_manager.schedules)
+        active_officers = stats["officers"].get("active", 0)
+        total_schedules = stats.get("schedules", {}).get("total", 0)
         st.sidebar.write(f"**Active Officers:** {active_officers}")
         st.sidebar.write(f"**Total Schedules:** {total_schedules}")
 
@@ -1105,11 +1910,18 @@ def main():
         render_work_scheduling_page(data_manager, selected_prefix)
     elif menu == "Time Tracking":
         render_time_tracking_page(data_manager, selected_prefix)
+    elif menu == "Operations Board":
+        render_operations_board_page(data_manager, boot["board"])
+    elif menu == "Bulk Import":
+        render_bulk_import_page(data_manager)
     elif menu == "Search phrases":
         render_search_page(data_manager, selected_prefix)
     elif menu == "View all":
         render_view_all_page(data_manager, selected_prefix)
 
+    if config.ADMIN:
+        render_perf_panel(config, boot)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,27 @@
+"""Behavior tests for Shared (python -m pytest tests)."""
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# "Hoy" de los tests que escriben en meses abiertos (2026-10 cierra el 2026-11-08)
+TODAY = date(2026, 10, 19)
+
+
+@pytest.fixture
+def pinned_today(monkeypatch):
+    """Freeze the date MonthlyPartitions uses to close months."""
+    from Shared import partitions
+
+    class _Date(date):
+        @classmethod
+        def today(cls):
+            return TODAY
+
+    monkeypatch.setattr(partitions, "date", _Date)
+    return TODAY
@@ -0,0 +1,101 @@
+import gzip
+import json
+import threading
+import time
+
+from Shared.anomaly import (DOUBLE_PUNCH, FLAGS_NAME, LONG_SHIFT, MISSED_CLOCK_OUT, ORPHAN_CLOCK_OUT,
+                            UNSCHEDULED_SITE, AnomalyDetector, attach_to_ingestor, read_flags)
+from Shared.partitions import MONTH_OF, MonthlyPartitions
+from Shared.punch_ingest import append_jsonl
+from Shared.schedule_index import ScheduleIndex
+from Shared.timeutil import parse_epoch
+
+
+def _punch(punch_id, event, ts, officer="o1", site="WD 100"):
+    return {"id": punch_id, "officer_id": officer, "site_prefix": site, "event": event, "ts": ts}
+
+
+def _types(flags):
+    return [f["type"] for f in flags]
+
+
+def test_double_punch_is_not_also_a_missed_clock_out():
+    detector = AnomalyDetector()
+    assert detector.feed(_punch("a", "in", "2026-01-05T07:00:00")) == []
+    assert _types(detector.feed(_punch("b", "in", "2026-01-05T07:02:00"))) == [DOUBLE_PUNCH]
+    assert _types(detector.feed(_punch("c", "in", "2026-01-05T09:00:00"))) == [MISSED_CLOCK_OUT]
+
+
+def test_orphan_out_and_long_shift():
+    detector = AnomalyDetector(max_shift_hours=12)
+    assert _types(detector.feed(_punch("a", "out", "2026-01-05T07:00:00"))) == [ORPHAN_CLOCK_OUT]
+    detector.feed(_punch("b", "in", "2026-01-05T08:00:00"))
+    assert _types(detector.feed(_punch("c", "out", "2026-01-05T21:00:00"))) == [LONG_SHIFT]
+
+
+def test_unscheduled_site():
+    index = ScheduleIndex([{"id": "s", "officer_id": "o1", "site_prefix": "WD 100", "date": "2026-01-05",
+                            "start_time": "07:00", "end_time": "15:00"}])
+    detector = AnomalyDetector(index)
+    assert detector.feed(_punch("a", "in", "2026-01-05T07:10:00")) == []
+    flags = detector.feed(_punch("b", "in", "2026-01-05T07:30:00", officer="o1", site="PX 100"))
+    assert UNSCHEDULED_SITE in _types(flags)
+
+
+def test_sweep_flags_each_open_clock_in_once():
+    detector = AnomalyDetector(max_shift_hours=12)
+    detector.feed(_punch("a", "in", "2026-01-05T07:00:00"))
+    now = parse_epoch("2026-01-05T20:00:00")
+    assert _types(detector.sweep(now)) == [MISSED_CLOCK_OUT]
+    assert detector.sweep(now + 3600) == []
+    # Ya marcado: el clock-out tardio no es ademas un turno largo
+    assert detector.feed(_punch("b", "out", "2026-01-05T22:00:00")) == []
+
+
+def test_rewritten_month_is_not_replayed(tmp_path):
+    store = MonthlyPartitions(tmp_path / "time_logs", MONTH_OF["time_logs"])
+    store.append([_punch("a", "in", "2026-01-05T07:00:00"), _punch("b", "in", "2026-01-05T07:01:00")], force=True)
+    detector = AnomalyDetector()
+    assert _types(detector.catch_up(store.root)) == [DOUBLE_PUNCH]
+    # El mes se reescribe mas corto (una edicion): no se repite la historia ni se marca de nuevo
+    store.write_month("2026-01", [_punch("a", "in", "2026-01-05T07:00:00")])
+    assert detector.catch_up(store.root) == []
+    store.append([_punch("c", "out", "2026-01-05T15:00:00")], force=True)
+    assert detector.catch_up(store.root) == []
+    assert detector.partition_offsets == {"2026-01.jsonl": store.path("2026-01").stat().st_size}
+
+
+class _Ingestor:
+    def __init__(self, journal_path):
+        self.journal_path = journal_path
+        self.on_commit = []
+
+
+def test_service_sweeps_without_new_punches(tmp_path):
+    journal = tmp_path / "time_logs.jsonl"
+    append_jsonl(journal, [_punch("a", "in", "2020-01-05T07:00:00")])
+    ingestor = _Ingestor(journal)
+    detector, stop = attach_to_ingestor(ingestor, tmp_path, sweep_s=0.05)
+    try:
+        # El primer catch-up ya barre; el clock-in queda marcado una sola vez
+        assert _types(read_flags(tmp_path)) == [MISSED_CLOCK_OUT]
+        detector.feed(_punch("b", "in", "2020-01-06T07:00:00", officer="o2"))
+        deadline = time.monotonic() + 5
+        while len(read_flags(tmp_path)) < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        stop()
+    assert sorted(f["officer_id"] for f in read_flags(tmp_path)) == ["o1", "o2"]
+    assert (tmp_path / FLAGS_NAME).exists()
+    assert not any(t.name == "anomaly-sweep" for t in threading.enumerate())
+
+
+def test_compressed_schedules_are_indexed(tmp_path):
+    shift = {"id": "s", "officer_id": "o1", "site_prefix": "WD 100", "date": "2026-01-05",
+             "start_time": "07:00", "end_time": "15:00"}
+    with gzip.open(tmp_path / "work_schedules.json.gz", "wt", encoding="utf-8") as f:
+        json.dump([shift], f)
+    ingestor = _Ingestor(tmp_path / "time_logs.jsonl")
+    detector, stop = attach_to_ingestor(ingestor, tmp_path)
+    stop()
+    assert detector.schedule_index.officer_range("o1", 0, 2 ** 40) == [shift]
@@ -0,0 +1,76 @@
+import json
+from datetime import date
+
+import pytest
+
+from Shared.archive import Archive, read_columns, worked_hours, write_columns
+from Shared.partitions import MONTH_OF, MonthlyPartitions
+from Shared.timeutil import parse_epoch
+
+pd = pytest.importorskip("pandas")
+
+TODAY = date(2026, 10, 19)
+
+
+def _punch(punch_id, event, ts, officer="o1", site="WD 100"):
+    return {"id": punch_id, "officer_id": officer, "site_prefix": site, "event": event, "ts": ts}
+
+
+PUNCHES = [
+    _punch("a", "in", "2026-09-05T07:00:00"), _punch("b", "out", "2026-09-05T15:00:00"),
+    _punch("c", "in", "2026-09-06T07:00:00", officer="o2", site="PX 106"),
+    _punch("d", "out", "2026-09-06T11:30:00", officer="o2", site="PX 106"),
+    # Mes abierto: se arma desde los registros
+    _punch("e", "in", "2026-10-05T07:00:00"), _punch("f", "out", "2026-10-05T09:00:00"),
+]
+
+
+def _partitioned(tmp_path):
+    MonthlyPartitions(tmp_path / "time_logs", MONTH_OF["time_logs"]).append(PUNCHES, force=True)
+    return Archive(tmp_path, "time_logs")
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "npz"])
+def test_columns_round_trip(tmp_path, fmt):
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+    path = write_columns(tmp_path / "2026-09", "time_logs", PUNCHES, fmt)
+    assert path.suffix == "." + fmt
+    df = read_columns(path, "time_logs", ["id", "site_prefix", "ts"])
+    assert list(df.columns) == ["id", "site_prefix", "ts"]
+    assert list(df["id"]) == [p["id"] for p in PUNCHES]
+    assert list(df["ts"]) == [parse_epoch(p["ts"]) for p in PUNCHES]
+    assert list(df["site_prefix"].astype(str)) == [p["site_prefix"] for p in PUNCHES]
+
+
+def test_build_archives_only_closed_months_once(tmp_path):
+    archive = _partitioned(tmp_path)
+    assert archive.build(today=TODAY) == ["2026-09"]
+    assert archive.manifest["2026-09"]["rows"] == 4
+    assert archive.build(today=TODAY) == []
+    # Mes cerrado reescrito a la fuerza: se vuelve a archivar
+    archive.store.append([_punch("g", "in", "2026-09-07T07:00:00")], force=True)
+    assert archive.build(today=TODAY) == ["2026-09"]
+    assert archive.manifest["2026-09"]["rows"] == 5
+
+
+def test_scan_matches_records_across_archived_and_open_months(tmp_path):
+    archive = _partitioned(tmp_path)
+    archive.build(today=TODAY)
+    df = archive.scan(parse_epoch("2026-09-05T12:00:00"), parse_epoch("2026-11-01"), ["id", "ts"])
+    assert sorted(df["id"]) == ["b", "c", "d", "e", "f"]
+    df = archive.scan(parse_epoch("2026-09-01"), parse_epoch("2026-11-01"), ["id"], site_prefix="PX 106")
+    assert sorted(df["id"]) == ["c", "d"]
+
+
+def test_scan_without_partitions_reads_the_json(tmp_path):
+    (tmp_path / "time_logs.json").write_text(json.dumps(PUNCHES[:2]), encoding="utf-8")
+    df = Archive(tmp_path, "time_logs").scan(parse_epoch("2026-09-01"), parse_epoch("2026-10-01"), ["id"])
+    assert list(df["id"]) == ["a", "b"]
+
+
+def test_worked_hours_pairs_in_and_out(tmp_path):
+    _partitioned(tmp_path).build(today=TODAY)
+    df = worked_hours(tmp_path, parse_epoch("2026-09-01"), parse_epoch("2026-11-01"))
+    hours = {(r.officer_id, r.site_prefix): r.hours for r in df.itertuples()}
+    assert hours == {("o1", "WD 100"): 10.0, ("o2", "PX 106"): 4.5}
@@ -0,0 +1,121 @@
+import json
+
+import pytest
+
+from Shared.bulk_import import ERROR, SKIP, UPDATE, Importer, Indexes, import_rows, iter_batches, main
+
+pd = pytest.importorskip("pandas")
+
+OFFICERS = [{"id": "o1", "name": "Ana Perez", "email": "ana@example.com", "phone": "+1 305 555 0101",
+             "status": "Active"}]
+SITES = [{"prefix": "WD 100", "name": "Westland Dock", "status": "Active"}]
+
+
+def _csv(tmp_path, text, name="rows.csv"):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def _statuses(result):
+    return [(r["row"], r["status"]) for r in result.rows]
+
+
+def test_csv_headers_aliases_and_blank_rows_in_batches(tmp_path):
+    path = _csv(tmp_path, "Full Name,E-Mail,Phone Number\nBea,bea@example.com,00123\n,,\nCarl,,3055550199\n")
+    batches = list(iter_batches(path, "officers", chunk_size=2))
+    rows = [row for batch in batches for row in batch]
+    # Numeros de fila de la planilla; "00123" queda como texto
+    assert rows == [(2, {"name": "Bea", "email": "bea@example.com", "phone": "00123"}),
+                    (4, {"name": "Carl", "email": "", "phone": "3055550199"})]
+    with pytest.raises(ValueError):
+        list(iter_batches(tmp_path / "rows.pdf", "officers"))
+
+
+def test_xlsx_rows(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    book = openpyxl.Workbook()
+    book.active.append(["Site Prefix", "Name", "Required Officers"])
+    book.active.append(["px 106", "Plaza", 2.0])
+    path = tmp_path / "sites.xlsx"
+    book.save(path)
+    assert list(iter_batches(path, "sites")) == [[(2, {"prefix": "px 106", "name": "Plaza",
+                                                       "required_officers": "2"})]]
+
+
+def test_officer_validation_errors():
+    importer = Importer("officers", Indexes(OFFICERS, SITES))
+    importer.add_row(2, {"name": "No Contact"})
+    importer.add_row(3, {"name": "Bad", "email": "not-an-email"})
+    importer.add_row(4, {"name": "Short", "phone": "123"})
+    importer.add_row(5, {"name": "Ok", "email": "ok@example.com"})
+    result = importer.result()
+    assert _statuses(result) == [(2, ERROR), (3, ERROR), (4, ERROR), (5, "added")]
+    assert [c["new"]["name"] for c in result.changes] == ["Ok"]
+    assert result.counts["added"] == 1 and result.counts[ERROR] == 3
+
+
+def test_duplicates_match_by_email_or_phone_and_follow_on_duplicate():
+    rows = [{"name": "Ana P.", "email": "ANA@example.com"}, {"name": "Ana Perez", "phone": "305-555-0101"}]
+    results = {}
+    for mode in (UPDATE, SKIP, ERROR):
+        importer = Importer("officers", Indexes(OFFICERS, SITES), mode)
+        importer.add_batch(list(enumerate(rows, start=2)))
+        results[mode] = importer.result()
+    # La segunda fila parte de la version de la primera; un solo cambio, con el original como base
+    assert _statuses(results[UPDATE]) == [(2, "updated"), (3, "updated")]
+    [change] = results[UPDATE].changes
+    assert change["base"] == OFFICERS[0]
+    assert change["new"]["name"] == "Ana Perez" and change["new"]["email"] == "ANA@example.com"
+    assert _statuses(results[SKIP]) == [(2, SKIP), (3, SKIP)]
+    assert _statuses(results[ERROR]) == [(2, ERROR), (3, ERROR)]
+    assert results[SKIP].changes == [] and results[ERROR].changes == []
+
+
+def test_conflicting_contacts_and_unchanged_rows():
+    officers = OFFICERS + [{"id": "o2", "name": "Ben", "email": "ben@example.com", "phone": "3055550202"}]
+    importer = Importer("officers", Indexes(officers, SITES))
+    importer.add_row(2, {"email": "ana@example.com", "phone": "3055550202"})
+    importer.add_row(3, {"name": "Ana Perez", "email": "ana@example.com"})
+    result = importer.result()
+    assert _statuses(result) == [(2, ERROR), (3, "unchanged")]
+    assert "different officers" in result.rows[0]["message"]
+    assert result.changes == []
+
+
+def test_shift_rows_resolve_officer_and_site_and_dedupe_by_slot():
+    importer = Importer("shifts", Indexes(OFFICERS, SITES))
+    row = {"officer_email": "ana@example.com", "site_prefix": "wd  100", "date": "2026-10-05",
+           "start_time": "7:00", "end_time": "15:00"}
+    importer.add_row(2, dict(row))
+    importer.add_row(3, dict(row, shift_type="night"))
+    importer.add_row(4, dict(row, site_prefix="ZZ 1"))
+    importer.add_row(5, dict(row, start_time="25:00", date="2026-10-06"))
+    result = importer.result()
+    assert _statuses(result) == [(2, "added"), (3, "updated"), (4, ERROR), (5, ERROR)]
+    [change] = result.changes
+    assert change["base"] is None
+    assert {k: change["new"][k] for k in ("officer_id", "site_prefix", "start_time", "shift_type")} == \
+        {"officer_id": "o1", "site_prefix": "WD 100", "start_time": "07:00", "shift_type": "Night"}
+
+
+def test_cli_writes_sites_once_and_dry_run_writes_nothing(tmp_path, capsys):
+    (tmp_path / "security_officers.json").write_text(json.dumps(OFFICERS), encoding="utf-8")
+    (tmp_path / "site_registry.json").write_text(json.dumps(SITES), encoding="utf-8")
+    path = _csv(tmp_path, "prefix,name,address,city,state,zip\nPX 106,Plaza,1 Main St,Miami,FL,33101\n"
+                          "wd 100,Westland Dock Renamed,,,,\n")
+    main(["sites", str(path), "--data-dir", str(tmp_path), "--dry-run"])
+    assert "added: 1, updated: 1" in capsys.readouterr().out
+    assert json.loads((tmp_path / "site_registry.json").read_text()) == SITES
+
+    main(["sites", str(path), "--data-dir", str(tmp_path)])
+    saved = {s["prefix"]: s for s in json.loads((tmp_path / "site_registry.json").read_text())}
+    assert sorted(saved) == ["PX 106", "WD 100"]
+    assert saved["WD 100"]["name"] == "Westland Dock Renamed" and saved["PX 106"]["status"] == "Active"
+
+
+def test_import_rows_reports_progress(tmp_path):
+    path = _csv(tmp_path, "name,email\n" + "".join(f"N{i},n{i}@example.com\n" for i in range(5)))
+    seen = []
+    result = import_rows(path, "officers", Indexes(), chunk_size=2, progress=seen.append)
+    assert seen == [2, 4, 5] and result.counts["added"] == 5
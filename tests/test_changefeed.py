@@ -0,0 +1,46 @@
+import threading
+
+from Shared.changefeed import ChangeFeed
+
+
+def test_since_returns_only_new_entries():
+    feed = ChangeFeed()
+    feed.record_diff("officers", [{"id": "a"}, {"id": "b"}], [{"id": "a", "name": "A"}, {"id": "c"}])
+    batch = feed.since(0)
+    assert not batch.reset and batch.seq == 3
+    assert sorted((e["op"], e["key"]) for e in batch.entries) == [("delete", "b"), ("upsert", "a"), ("upsert", "c")]
+    feed.append("schedules", "upsert", "s1", {"id": "s1"})
+    assert [e["key"] for e in feed.since(3).entries] == ["s1"]
+    assert feed.since(3, ["officers"]).entries == []
+    assert feed.since(4).entries == []
+
+
+def test_unchanged_save_appends_nothing_and_unknown_base_resets():
+    feed = ChangeFeed()
+    assert feed.record_diff("officers", [{"id": "a"}], [{"id": "a"}]) == 0
+    feed.record_diff("officers", None, [{"id": "a"}])
+    assert feed.since(0).entries[0]["op"] == "reset"
+
+
+def test_cursor_older_than_the_buffer_gets_reset():
+    feed = ChangeFeed(capacity=3)
+    for i in range(5):
+        feed.append("officers", "upsert", str(i), {"id": str(i)})
+    assert feed.since(0).reset
+    assert [e["key"] for e in feed.since(2).entries] == ["2", "3", "4"]
+    # Cursor de otro proceso (mas nuevo que el feed): tambien reset
+    assert feed.since(99).reset
+
+
+def test_records_are_copied():
+    feed = ChangeFeed()
+    record = {"id": "a", "name": "A"}
+    feed.append("officers", "upsert", "a", record)
+    record["name"] = "changed"
+    assert feed.since(0).entries[0]["record"]["name"] == "A"
+
+
+def test_wait_wakes_on_append():
+    feed = ChangeFeed()
+    threading.Timer(0.05, feed.append, ("officers", "reset")).start()
+    assert feed.wait(0, timeout=5) == 1
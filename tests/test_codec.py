@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from Shared import codec
+
+RECORD = {"id": "a1", "name": "Jose Nunez Ñ", "ts": 1791000000, "tags": ["x", None], "ok": True}
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    # Las dos ramas: orjson si esta instalado, y la de la libreria estandar
+    if request.param == "orjson":
+        if codec.orjson is None:
+            pytest.skip("orjson not installed")
+    else:
+        monkeypatch.setattr(codec, "orjson", None)
+    return request.param
+
+
+def test_dumps_matches_json_compact_and_pretty(backend):
+    assert codec.backend() == backend
+    assert codec.dumps(RECORD) == json.dumps(RECORD, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    assert codec.dumps(RECORD, indent=2) == json.dumps(RECORD, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def test_loads_round_trip_and_fallbacks(backend):
+    assert codec.loads(codec.dumps(RECORD)) == RECORD
+    assert codec.loads(codec.dumps(RECORD).decode("utf-8")) == RECORD
+    # BOM y enteros de mas de 64 bits: los resuelve json
+    assert codec.loads("\ufeff[1]".encode("utf-8")) == [1]
+    assert codec.loads(codec.dumps({"n": 2 ** 70})) == {"n": 2 ** 70}
+    with pytest.raises(ValueError):
+        codec.loads(b'{"id": ')
+
+
+def test_default_and_non_string_keys(backend):
+    data = {1: {"when": object()}}
+    assert codec.loads(codec.dumps(data, default=lambda o: "obj")) == {"1": {"when": "obj"}}
+
+
+def test_dataset_styles_and_env_override(monkeypatch):
+    assert codec.indent_for("officers") == 2
+    assert codec.indent_for("time_logs") is None
+    assert codec.indent_for("unknown") == 2
+    monkeypatch.setenv("AMDAOPS_JSON_STYLES", "time_logs=pretty, officers=compact, phrases=bogus")
+    assert codec.indent_for("time_logs") == 2
+    assert codec.indent_for("officers") is None
+    assert codec.indent_for("phrases") == 2
+
+
+@pytest.mark.parametrize("suffix", [".gz", ".xz"])
+def test_compress_round_trip_is_transparent(tmp_path, suffix):
+    from Shared.filestore import iter_json_records
+    from Shared.punch_ingest import iter_jsonl
+
+    path = tmp_path / "time_logs.json"
+    codec.dump(path, [RECORD, RECORD])
+    raw = path.read_bytes()
+    packed = codec.compress_file(path, suffix)
+    assert not path.exists() and packed.name == "time_logs.json" + suffix
+    assert codec.resolve(path) == packed
+    assert codec.data_size(packed) == len(raw)
+    assert codec.load(packed) == [RECORD, RECORD]
+    assert list(iter_json_records(codec.resolve(path))) == [RECORD, RECORD]
+    assert codec.decompress_file(packed) == path and path.read_bytes() == raw
+
+    journal = tmp_path / "time_logs.jsonl"
+    journal.write_bytes(codec.dumps(RECORD) + b"\n" + codec.dumps(RECORD) + b"\n")
+    assert list(iter_jsonl(codec.compress_file(journal, suffix))) == [RECORD, RECORD]
+
+
+def test_pack_is_deterministic_and_plain_wins(tmp_path):
+    data = b'{"id":"a"}\n' * 100
+    assert codec.pack(tmp_path / "a.jsonl.gz", data) == codec.pack(tmp_path / "b.jsonl.gz", data)
+    assert codec.pack(tmp_path / "a.jsonl", data) == data
+    plain = tmp_path / "2026-01.jsonl"
+    plain.write_bytes(data)
+    (tmp_path / "2026-01.jsonl.gz").write_bytes(codec.pack(tmp_path / "x.gz", b""))
+    assert codec.resolve(plain) == plain
+    with codec.open_file(tmp_path / "2026-01.jsonl.gz", "rb") as f:
+        assert f.read() == b""
@@ -0,0 +1,43 @@
+import pytest
+
+from Shared.compact import compact
+from Shared.timeutil import parse_epoch
+
+
+def _punch(punch_id, ts, site="WD 100", **extra):
+    return dict({"id": punch_id, "officer_id": "o1", "site_prefix": site, "event": "in", "ts": ts,
+                 "device": "kiosk-1", "received_at": ts}, **extra)
+
+
+RECORDS = [
+    _punch("a", "2026-10-05T07:00:00"),
+    _punch("b", "2026-10-05T08:00:00", site="PX 106", note="extra field"),
+    # Valores que no entran en su columna: se guardan tal cual
+    {"id": "c", "officer_id": ["o1", "o2"], "ts": "2026-10-05 09:00", "event": "out"},
+    {"id": "d"},
+]
+
+
+def test_rows_come_back_equal_to_the_records():
+    table = compact("time_logs", RECORDS)
+    assert len(table) == 4
+    assert list(table) == RECORDS and table == RECORDS
+    assert table[-1] == {"id": "d"} and table[1:3] == RECORDS[1:3]
+    with pytest.raises(IndexError):
+        table[4]
+
+
+def test_yielded_dicts_are_copies():
+    table = compact("time_logs", RECORDS[:1])
+    row = table[0]
+    row["site_prefix"] = "changed"
+    assert table[0] == RECORDS[0]
+
+
+def test_select_by_range_and_category():
+    table = compact("time_logs", RECORDS)
+    lo, hi = parse_epoch("2026-10-05T07:30:00"), parse_epoch("2026-10-06")
+    # "c" tiene un ts no canonico: se compara ya decodificado
+    assert [r["id"] for r in table.select(lo, hi)] == ["b", "c"]
+    assert [r["id"] for r in table.select(0, hi, site_prefix="PX 106")] == ["b"]
+    assert table.select(0, hi, site_prefix="nowhere") == []
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from Shared.schedule_index import SharedScheduleIndex
+from Shared.warmup import DataWarmup, files_signature
+
+SHIFT = {"id": "s1", "officer_id": "o1", "site_prefix": "WD 100", "date": "2026-10-05",
+         "start_time": "07:00", "end_time": "15:00"}
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv("AMDAOPS_DATA_DIR", str(tmp_path))
+    (tmp_path / "work_schedules.json").write_text(json.dumps([SHIFT]), encoding="utf-8")
+    from shoppingCenter import app
+
+    return app
+
+
+def _shared(app):
+    # Lo mismo que bootstrap(): warm-up y un indice por proceso
+    config = app.Config()
+    loader = app.DataManager(config, {})
+    warmup = DataWarmup(max_workers=1)
+    warmup.register("schedules", [config.SCHEDULES_PATH], lambda: loader._load_data("schedules"),
+                    copy_records=True)
+    index = SharedScheduleIndex(lambda: files_signature([config.SCHEDULES_PATH]), lambda: warmup.get("schedules"))
+    return config, warmup.start(), index
+
+
+def test_reruns_share_one_schedule_index_synced_on_save(app):
+    config, warmup, index = _shared(app)
+    # Cada rerun de Streamlit crea un DataManager nuevo
+    first = app.DataManager(config, {}, warmup=warmup, schedule_index=index)
+    assert first.next_shift("WD 100", 0)["id"] == "s1"
+    second = app.DataManager(config, {}, warmup=warmup, schedule_index=index)
+    assert second.add_schedule(dict(SHIFT, id="s2", date="2026-10-06"))
+    third = app.DataManager(config, {}, warmup=warmup, schedule_index=index)
+    assert [s["id"] for s in third.shifts_between(0, 2 ** 40, "WD 100")] == ["s1", "s2"]
+    assert index.builds == 1
+    warmup.shutdown()
+
+
+def test_reruns_reuse_the_partition_stores_from_bootstrap(app, monkeypatch):
+    config = app.Config()
+    stores = app.open_stores(config)
+    assert stores == {}
+
+    def _open(*args):
+        raise AssertionError("open_partitions called on rerun")
+
+    # Con las stores de bootstrap, un rerun no vuelve a resolverlas
+    monkeypatch.setattr(app, "open_partitions", _open)
+    assert app.DataManager(config, {}, partitions=stores).partitions is stores
+
+
+def test_bootstrap_runs_once_per_process(app, monkeypatch):
+    calls = []
+    load_shared_modules = app.load_shared_modules
+    monkeypatch.setattr(app, "load_shared_modules", lambda: calls.append(1) or load_shared_modules())
+    app.bootstrap.clear()
+    boot = app.bootstrap()
+    try:
+        # Un rerun (o otra sesion) recibe el mismo resultado sin volver a inicializar
+        assert app.bootstrap() is boot and len(calls) == 1
+        assert set(boot["timings"]) == {"config_init_ms", "validate_paths_ms", "load_modules_ms", "total_ms"}
+    finally:
+        if boot["warmup"] is not None:
+            boot["warmup"].shutdown()
+        app.bootstrap.clear()
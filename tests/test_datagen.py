@@ -0,0 +1,40 @@
+import json
+
+from Shared.datagen import FILES, generate, main
+from Shared.punch_ingest import iter_jsonl
+
+
+def _read(out, dataset):
+    return json.loads((out / FILES[dataset]).read_text(encoding="utf-8"))
+
+
+def test_same_seed_gives_the_same_files(tmp_path):
+    for name in ("a", "b"):
+        generate(tmp_path / name, sites=3, officers=5, days=2, phrases=4)
+    for fname in FILES.values():
+        assert (tmp_path / "a" / fname).read_bytes() == (tmp_path / "b" / fname).read_bytes()
+
+
+def test_records_reference_generated_sites_and_officers(tmp_path):
+    counts = generate(tmp_path, sites=3, officers=5, punches=20, phrases=4)
+    sites = {s["prefix"] for s in _read(tmp_path, "registry")}
+    officers = {o["id"] for o in _read(tmp_path, "officers")}
+    shifts, punches = _read(tmp_path, "schedules"), _read(tmp_path, "time_logs")
+    assert (counts["sites"], counts["officers"], counts["phrases"]) == (3, 5, 4)
+    assert len(shifts) == counts["schedules"] and len(punches) == counts["punches"]
+    # Se corta al llegar a --punches (el ultimo turno puede agregar uno mas)
+    assert 20 <= len(punches) <= 21
+    assert {s["site_prefix"] for s in shifts} <= sites and {s["officer_id"] for s in shifts} <= officers
+    assert {p["site_prefix"] for p in punches} <= sites
+    assert len({p["id"] for p in punches}) == len(punches)
+
+
+def test_cli_writes_the_journal_and_leaves_future_shifts_scheduled(tmp_path, capsys):
+    main(["--out", str(tmp_path), "--sites", "2", "--officers", "4", "--days", "3", "--start", "2026-10-01",
+          "--now", "2026-10-02T12:00:00", "--jsonl"])
+    counts = json.loads(capsys.readouterr().out)
+    punches = list(iter_jsonl(tmp_path / "time_logs.jsonl"))
+    assert len(punches) == counts["punches"] and not (tmp_path / FILES["time_logs"]).exists()
+    assert all(p["ts"] <= "2026-10-02T12:00:00" for p in punches)
+    future = [s for s in _read(tmp_path, "schedules") if s["date"] == "2026-10-03"]
+    assert future and all(s["status"] == "Scheduled" for s in future)
@@ -0,0 +1,72 @@
+import json
+import socket
+import threading
+
+import pytest
+
+from Shared.dataservice import DataService, DataServiceClient, make_server
+from Shared.timeutil import parse_epoch
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs unix sockets")
+
+OFFICERS = [{"id": "o1", "name": "Ana"}]
+SHIFT = {"id": "s1", "officer_id": "o1", "site_prefix": "WD 100", "date": "2026-10-05",
+         "start_time": "07:00", "end_time": "15:00"}
+LO, HI = parse_epoch("2026-10-01"), parse_epoch("2026-11-01")
+
+
+@pytest.fixture
+def service(tmp_path):
+    (tmp_path / "security_officers.json").write_text(json.dumps(OFFICERS), encoding="utf-8")
+    (tmp_path / "work_schedules.json").write_text(json.dumps([SHIFT]), encoding="utf-8")
+    address = f"unix:{tmp_path / 'ds.sock'}"
+    data_service = DataService(tmp_path).start()
+    server = make_server(data_service, address)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    clients = []
+
+    def _client():
+        clients.append(DataServiceClient(address, pool_size=2, timeout=5))
+        return clients[-1]
+
+    yield _client
+    for client in clients:
+        client.close()
+    server.shutdown()
+    server.server_close()
+    thread.join()
+    data_service.store.shutdown()
+
+
+def test_get_round_trip(service):
+    client = service()
+    assert client.ping()
+    records, stamp = client.get("officers")
+    assert records == OFFICERS and stamp is not None
+    # Respuesta en cache: mismo contenido, mismo stamp
+    assert client.get("officers") == (records, stamp)
+
+
+def test_save_with_stale_stamp_merges(service):
+    first, second = service(), service()
+    _, stale = first.get("schedules")
+    shift2 = dict(SHIFT, id="s2", date="2026-10-06")
+    assert second.save("schedules", [{"key": "s2", "base": None, "new": shift2}], stale)["merged"] is False
+    # El primero escribe con el stamp viejo: recibe la lista final con el cambio del otro
+    shift3 = dict(SHIFT, id="s3", date="2026-10-07")
+    result = first.save("schedules", [{"key": "s3", "base": None, "new": shift3}], stale)
+    assert result["merged"] is True and result["stamp"] != stale
+    assert sorted(s["id"] for s in result["records"]) == ["s1", "s2", "s3"]
+    assert second.get("schedules") == (result["records"], result["stamp"])
+
+
+def test_index_query_sees_saved_shift(service):
+    client = service()
+    assert [s["id"] for s in client.index("site_range", "WD 100", LO, HI)] == ["s1"]
+    _, stamp = client.get("schedules")
+    shift2 = dict(SHIFT, id="s2", site_prefix="PX 106")
+    client.save("schedules", [{"key": "s2", "base": None, "new": shift2}], stamp)
+    assert [s["id"] for s in client.index("site_range", "PX 106", LO, HI)] == ["s2"]
+    assert sorted(client.index("sites")) == ["PX 106", "WD 100"]
+    assert client.index("next_for_officer", "o1", LO)["id"] == "s1"
@@ -0,0 +1,102 @@
+import csv
+import io
+import json
+import os
+
+import pytest
+
+from Shared import export as export_module
+from Shared.export import COLUMNS, export, iter_records, prune_exports
+from Shared.partitions import MONTH_OF, MonthlyPartitions
+from Shared.punch_ingest import JOURNAL_NAME, append_jsonl
+from Shared.shards import SHARD_MAP_NAME, ShardedPartitions, ShardMap
+from Shared.timeutil import parse_epoch
+
+
+def _punch(punch_id, ts, site="WD 100", officer="o1"):
+    return {"id": punch_id, "officer_id": officer, "site_prefix": site, "event": "in", "ts": ts, "device": "k1"}
+
+
+PUNCHES = [
+    _punch("a", "2026-09-30T23:59:00"),
+    _punch("b", "2026-10-01T00:00:00"),
+    _punch("c", "2026-10-15T12:00:00", site="PX 106", officer="o2"),
+    _punch("d", "2026-11-01T00:00:00"),
+    {"id": "e", "site_prefix": "WD 100", "ts": "no date"},
+]
+SHIFT = {"id": "s1", "officer_id": "o1", "site_prefix": "WD 100", "date": "2026-10-05", "start_time": "22:00",
+         "end_time": "06:00", "shift_type": "Night"}
+LO, HI = parse_epoch("2026-10-01"), parse_epoch("2026-11-01")
+
+
+def _legacy(tmp_path):
+    (tmp_path / "time_logs.json").write_text(json.dumps(PUNCHES[:2]), encoding="utf-8")
+    # El resto llego por el journal del servicio de punches
+    append_jsonl(tmp_path / JOURNAL_NAME, PUNCHES[2:])
+    (tmp_path / "work_schedules.json").write_text(json.dumps([SHIFT]), encoding="utf-8")
+
+
+def _monthly(tmp_path):
+    MonthlyPartitions(tmp_path / "time_logs", MONTH_OF["time_logs"]).append(PUNCHES, force=True)
+    MonthlyPartitions(tmp_path / "work_schedules", MONTH_OF["schedules"]).append([SHIFT], force=True)
+
+
+def _sharded(tmp_path):
+    shard_map = ShardMap(tmp_path / SHARD_MAP_NAME)
+    ShardedPartitions(tmp_path / "time_logs", MONTH_OF["time_logs"], shard_map).append(PUNCHES, force=True)
+    ShardedPartitions(tmp_path / "work_schedules", MONTH_OF["schedules"], shard_map).append([SHIFT], force=True)
+
+
+@pytest.mark.parametrize("layout", [_legacy, _monthly, _sharded])
+def test_records_are_filtered_by_range_and_site(tmp_path, layout):
+    layout(tmp_path)
+    assert sorted(r["id"] for r in iter_records(tmp_path, "time_logs", LO, HI)) == ["b", "c"]
+    assert [r["id"] for r in iter_records(tmp_path, "time_logs", LO, HI, "PX 106")] == ["c"]
+    assert [r["id"] for r in iter_records(tmp_path, "time_logs", LO, HI, "ZZ 1")] == []
+    assert [r["id"] for r in iter_records(tmp_path, "schedules", LO, HI)] == ["s1"]
+
+
+def test_csv_export_has_bom_header_names_and_hours(tmp_path):
+    _monthly(tmp_path)
+    (tmp_path / "security_officers.json").write_text(json.dumps([{"id": "o1", "name": "Ana"}]), encoding="utf-8")
+    (tmp_path / "site_registry.json").write_text(json.dumps([{"prefix": "WD 100", "name": "Dock"}]),
+                                                 encoding="utf-8")
+    out = tmp_path / "exports" / "schedules.csv"
+    assert export(tmp_path, "schedules", LO, HI, out) == 1
+    raw = out.read_bytes()
+    assert raw.startswith(b"\xef\xbb\xbf")
+    rows = list(csv.DictReader(io.StringIO(raw.decode("utf-8-sig"))))
+    assert list(rows[0]) == COLUMNS["schedules"]
+    assert (rows[0]["officer_name"], rows[0]["site_name"], rows[0]["hours"]) == ("Ana", "Dock", "8.0")
+    assert [p.name for p in out.parent.iterdir()] == ["schedules.csv"]
+
+
+def test_xlsx_export_splits_sheets(tmp_path, monkeypatch):
+    openpyxl = pytest.importorskip("openpyxl")
+    monkeypatch.setattr(export_module, "XLSX_SHEET_ROWS", 1)
+    _legacy(tmp_path)
+    out = tmp_path / "time_logs.xlsx"
+    assert export(tmp_path, "time_logs", LO, HI, out, fmt="xlsx") == 2
+    book = openpyxl.load_workbook(out, read_only=True)
+    try:
+        sheets = [list(sheet.iter_rows(values_only=True)) for sheet in book.worksheets]
+    finally:
+        book.close()
+    assert len(sheets) == 2
+    assert all(rows[0] == tuple(COLUMNS["time_logs"]) and len(rows) == 2 for rows in sheets)
+
+
+def test_old_exports_are_pruned(tmp_path):
+    now = 1_000_000.0
+    for i, name in enumerate(["a.csv", "b.csv", "c.xlsx", "d.csv", "e.csv.1.tmp"]):
+        path = tmp_path / name
+        path.write_text(name, encoding="utf-8")
+        os.utime(path, (now - i * 60, now - i * 60))
+    old = tmp_path / "old.csv"
+    old.write_text("old", encoding="utf-8")
+    os.utime(old, (now - 2 * 86400, now - 2 * 86400))
+    # Se quedan los dos mas nuevos; el .tmp solo se borra por edad
+    deleted = prune_exports(tmp_path, max_age_s=86400, keep=2, now=now)
+    assert sorted(p.name for p in deleted) == ["c.xlsx", "d.csv", "old.csv"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.csv", "b.csv", "e.csv.1.tmp"]
+    assert prune_exports(tmp_path / "missing") == []
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from Shared.filestore import (WriteConflict, apply_diff, diff_records, iter_json_records, merge_records,
+                              read_json_records, read_stamp, save_json_changes, save_json_records)
+
+
+def _rec(rec_id, **fields):
+    return {"id": rec_id, **fields}
+
+
+def test_diff_records_added_changed_deleted():
+    base = [_rec("a", name="A"), _rec("b", name="B"), _rec("c")]
+    mine = [_rec("a", name="A"), _rec("b", name="B2"), _rec("d")]
+    changes = {c["key"]: c for c in diff_records(base, mine)}
+    assert set(changes) == {"b", "c", "d"}
+    assert changes["b"]["new"]["name"] == "B2" and changes["c"]["new"] is None and changes["d"]["base"] is None
+
+
+def test_diff_without_base_is_a_blind_upsert():
+    changes = diff_records(None, [_rec("a")])
+    assert changes == [{"key": "a", "new": _rec("a"), "blind": True}]
+    assert apply_diff([_rec("a", x=1), _rec("b")], changes) == [_rec("a"), _rec("b")]
+
+
+def test_different_fields_of_the_same_record_are_combined():
+    base = [_rec("a", name="A", phone="1")]
+    mine = [_rec("a", name="Ann", phone="1")]
+    theirs = [_rec("a", name="A", phone="2")]
+    assert merge_records(base, mine, theirs) == [_rec("a", name="Ann", phone="2")]
+
+
+def test_same_field_changed_on_both_sides_conflicts():
+    base = [_rec("a", name="A")]
+    with pytest.raises(WriteConflict) as e:
+        merge_records(base, [_rec("a", name="Ann")], [_rec("a", name="Anna")])
+    assert e.value.keys == ["a"]
+    # El mismo cambio en ambos lados no es conflicto
+    assert merge_records(base, [_rec("a", name="Ann")], [_rec("a", name="Ann")]) == [_rec("a", name="Ann")]
+
+
+def test_delete_versus_edit():
+    base = [_rec("a", name="A"), _rec("b")]
+    # Borro lo que el otro no toco: se borra
+    assert merge_records(base, [_rec("b")], base + [_rec("c")]) == [_rec("b"), _rec("c")]
+    # Borro lo que el otro edito, o edito lo que el otro borro: conflicto
+    with pytest.raises(WriteConflict):
+        merge_records(base, [_rec("b")], [_rec("a", name="A2"), _rec("b")])
+    with pytest.raises(WriteConflict):
+        merge_records(base, [_rec("a", name="A2"), _rec("b")], [_rec("b")])
+
+
+def test_compare_and_swap_save(tmp_path):
+    path = tmp_path / "security_officers.json"
+    first = save_json_records(path, [_rec("a")], read_stamp(path), [])
+    assert not first.merged
+    # Otra sesion guardo entre la lectura y este guardado: se hace merge
+    save_json_records(path, [_rec("a"), _rec("b")], first.stamp, [_rec("a")])
+    result = save_json_records(path, [_rec("a"), _rec("c")], first.stamp, [_rec("a")])
+    assert result.merged and [r["id"] for r in result.records] == ["a", "b", "c"]
+    with pytest.raises(WriteConflict):
+        save_json_records(path, [_rec("d")], first.stamp, [_rec("a")], merge=False)
+    assert read_stamp(path)[0] == 3
+
+
+def test_save_json_changes_applies_only_the_diff(tmp_path):
+    path = tmp_path / "work_schedules.json"
+    path.write_text(json.dumps([_rec("a"), _rec("b")]), encoding="utf-8")
+    changes = diff_records([_rec("a")], [_rec("a", status="Done")])
+    save_json_changes(path, changes, None)
+    assert read_json_records(path) == [_rec("a", status="Done"), _rec("b")]
+
+
+def test_iter_json_records_across_chunks(tmp_path):
+    records = [_rec(str(i), note="x" * (i % 7)) for i in range(200)]
+    path = tmp_path / "time_logs.json"
+    path.write_text(json.dumps(records, indent=2), encoding="utf-8")
+    assert list(iter_json_records(path, chunk_size=64)) == records
+    path.write_text('[{"id": "1"}, {"id": ', encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(iter_json_records(path, chunk_size=8))
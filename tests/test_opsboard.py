@@ -0,0 +1,77 @@
+import json
+
+from Shared.changefeed import ChangeFeed
+from Shared.opsboard import DUE, LATE, ON_DUTY, UNSCHEDULED, OpsBoard
+from Shared.punch_ingest import append_jsonl
+from Shared.timeutil import parse_epoch
+
+NOW = parse_epoch("2026-01-05T08:00:00")
+
+
+def _shift(shift_id, officer, start="07:00", end="15:00", site="WD 100"):
+    return {"id": shift_id, "officer_id": officer, "site_prefix": site, "date": "2026-01-05",
+            "start_time": start, "end_time": end}
+
+
+def _punch(officer, event, ts, site="WD 100"):
+    return {"id": f"{officer}-{event}-{ts}", "officer_id": officer, "site_prefix": site, "event": event, "ts": ts}
+
+
+SHIFTS = [_shift("s1", "o1"), _shift("s2", "o2"), _shift("s3", "o3", start="07:58"), _shift("s4", "o4", start="09:00")]
+
+
+def _board(tmp_path, feed=None, legacy=()):
+    (tmp_path / "work_schedules.json").write_text(json.dumps(SHIFTS), encoding="utf-8")
+    (tmp_path / "time_logs.json").write_text(json.dumps(list(legacy)), encoding="utf-8")
+    return OpsBoard(tmp_path / "work_schedules.json", tmp_path / "time_logs.jsonl", tmp_path / "time_logs.json",
+                    tmp_path / "payroll_rollups.json", feed=feed)
+
+
+def _statuses(board, site="WD 100", now=NOW):
+    return {r["officer_id"]: r["status"] for r in board.site_status(site, now)["rows"]}
+
+
+def test_statuses_and_next_shift(tmp_path):
+    board = _board(tmp_path, legacy=[_punch("o1", "in", "2026-01-05T06:55:00")])
+    append_jsonl(tmp_path / "time_logs.jsonl", [_punch("o9", "in", "2026-01-05T07:30:00")])
+    board.refresh(NOW, lambda: SHIFTS)
+    assert _statuses(board) == {"o1": ON_DUTY, "o2": LATE, "o3": DUE, "o9": UNSCHEDULED}
+    assert board.site_status("WD 100", NOW)["next"]["id"] == "s4"
+
+
+def test_journal_is_followed_from_its_offset(tmp_path):
+    board = _board(tmp_path)
+    board.refresh(NOW, lambda: SHIFTS)
+    append_jsonl(tmp_path / "time_logs.jsonl", [_punch("o2", "in", "2026-01-05T07:40:00")])
+    board.refresh(NOW, lambda: SHIFTS)
+    assert _statuses(board)["o2"] == ON_DUTY
+    append_jsonl(tmp_path / "time_logs.jsonl", [_punch("o2", "out", "2026-01-05T07:50:00")])
+    board.refresh(NOW, lambda: SHIFTS)
+    assert _statuses(board)["o2"] == LATE
+
+
+def test_feed_updates_schedules_and_reset_does_not_rescan_time_logs(tmp_path):
+    feed = ChangeFeed(capacity=2)
+    board = _board(tmp_path, feed=feed)
+    loads = []
+
+    def load():
+        loads.append(1)
+        return SHIFTS
+
+    board.refresh(NOW, load)
+    feed.append("schedules", "upsert", "s5", _shift("s5", "o5", start="07:00"))
+    board.refresh(NOW, load)
+    assert _statuses(board)["o5"] == LATE and len(loads) == 1
+
+    # Un punch en time_logs.json que no paso por el journal ni por el feed
+    (tmp_path / "time_logs.json").write_text(json.dumps([_punch("o5", "in", "2026-01-05T07:00:00")]),
+                                             encoding="utf-8")
+    for i in range(5):
+        feed.append("officers", "upsert", str(i), {"id": str(i)})
+    feed.append("time_logs", "reset")
+    append_jsonl(tmp_path / "time_logs.jsonl", [_punch("o2", "in", "2026-01-05T07:40:00")])
+    board.refresh(NOW, load)
+    statuses = _statuses(board)
+    assert statuses["o2"] == ON_DUTY and statuses.get("o5") is None
+    assert len(loads) == 2
@@ -0,0 +1,122 @@
+import json
+from datetime import date
+
+import pytest
+
+from Shared import partitions
+from Shared.partitions import (MONTH_OF, UNDATED, MonthlyPartitions, PartitionClosed, iter_appended, migrate,
+                               months_between)
+from Shared.punch_ingest import JOURNAL_NAME, append_jsonl, iter_jsonl
+from Shared.timeutil import parse_epoch
+
+# Los tests escriben en 2026-10 como mes abierto
+pytestmark = pytest.mark.usefixtures("pinned_today")
+
+
+def _punch(punch_id, ts, officer="o1", event="in"):
+    return {"id": punch_id, "officer_id": officer, "site_prefix": "WD 100", "event": event, "ts": ts}
+
+
+def _store(tmp_path):
+    return MonthlyPartitions(tmp_path / "time_logs", MONTH_OF["time_logs"])
+
+
+def test_records_are_routed_by_month(tmp_path):
+    store = _store(tmp_path)
+    store.append([_punch("a", "2026-01-31T23:00:00"), _punch("b", "2026-02-01T00:30:00"),
+                  _punch("c", "not a date")], force=True)
+    assert store.months() == ["2026-01", "2026-02", UNDATED]
+    assert [r["id"] for r in store.read("2026-02")] == ["b"]
+    # Sin fecha: siempre se lee
+    ids = [r["id"] for r in store.read_range(parse_epoch("2026-02-01"), parse_epoch("2026-03-01"))]
+    assert sorted(ids) == ["b", "c"]
+
+
+def test_months_between_covers_partial_months():
+    assert months_between(parse_epoch("2026-01-20"), parse_epoch("2026-03-01")) == ["2026-01", "2026-02"]
+
+
+def test_closed_month_rejects_writes_unless_forced(tmp_path):
+    store = _store(tmp_path)
+    assert store.is_closed("2026-01", today=date(2026, 2, 8))
+    assert not store.is_closed("2026-01", today=date(2026, 2, 7))
+    with pytest.raises(PartitionClosed):
+        store.append([_punch("a", "2026-01-05T07:00:00")])
+    store.append([_punch("a", "2026-01-05T07:00:00")], force=True)
+    assert [r["id"] for r in store.read("2026-01")] == ["a"]
+
+
+def test_append_only_changes_reject_edits(tmp_path):
+    store = _store(tmp_path)
+    punch = _punch("a", "2026-10-05T07:00:00")
+    store.save_changes([{"key": "a", "base": None, "new": punch}], append_only=True)
+    # Repetir el mismo punch no duplica
+    store.save_changes([{"key": "a", "base": None, "new": punch}], append_only=True)
+    assert len(store.read("2026-10")) == 1
+    with pytest.raises(ValueError):
+        store.save_changes([{"key": "a", "base": punch, "new": dict(punch, event="out")}], append_only=True)
+
+
+def test_save_changes_moves_a_record_between_months(tmp_path):
+    store = MonthlyPartitions(tmp_path / "work_schedules", MONTH_OF["schedules"])
+    shift = {"id": "s1", "officer_id": "o1", "site_prefix": "WD 100", "date": "2026-10-30",
+             "start_time": "07:00", "end_time": "15:00"}
+    store.save_changes([{"key": "s1", "base": None, "new": shift}])
+    moved = dict(shift, date="2026-11-02")
+    assert store.save_changes([{"key": "s1", "base": shift, "new": moved}]) == ["2026-10", "2026-11"]
+    assert store.read("2026-10") == [] and store.read("2026-11") == [moved]
+
+
+def test_compressed_month_reads_the_same(tmp_path):
+    store = _store(tmp_path)
+    store.append([_punch("a", "2026-01-05T07:00:00"), _punch("b", "2026-01-06T07:00:00")], force=True)
+    before = store.read("2026-01")
+    assert store.compress(today=date(2026, 3, 1)) == ["2026-01"]
+    assert store.path("2026-01").name == "2026-01.jsonl.gz"
+    assert MonthlyPartitions(store.root, MONTH_OF["time_logs"]).read("2026-01") == before
+
+
+def test_iter_appended_follows_offsets(tmp_path):
+    store = _store(tmp_path)
+    store.append([_punch("a", "2026-10-05T07:00:00")])
+    offsets = {}
+    assert [r["id"] for r in iter_appended(store.root, offsets)] == ["a"]
+    store.append([_punch("b", "2026-10-05T15:00:00")])
+    assert [r["id"] for r in iter_appended(store.root, offsets)] == ["b"]
+    # Archivo reescrito mas corto: error, o se sigue desde el nuevo final
+    store.write_month("2026-10", [])
+    with pytest.raises(ValueError):
+        list(iter_appended(store.root, dict(offsets)))
+    assert list(iter_appended(store.root, offsets, skip_rewritten=True)) == []
+    assert offsets["2026-10.jsonl"] == 0
+
+
+def test_migrate_streams_in_batches_and_drops_journal_repeats(tmp_path, monkeypatch):
+    monkeypatch.setattr(partitions, "MIGRATE_BATCH", 2)
+    legacy = [_punch("a", "2026-01-05T07:00:00"), _punch("b", "2026-02-05T07:00:00"),
+              _punch("c", "2026-01-06T07:00:00")]
+    (tmp_path / "time_logs.json").write_text(json.dumps(legacy), encoding="utf-8")
+    # El journal repite un punch ya copiado al legado
+    append_jsonl(tmp_path / JOURNAL_NAME, [legacy[1], _punch("d", "2026-02-06T07:00:00")])
+    (tmp_path / "work_schedules.json").write_text(json.dumps([
+        {"id": "s1", "officer_id": "o1", "site_prefix": "WD 100", "date": "2026-01-05",
+         "start_time": "07:00", "end_time": "15:00"}]), encoding="utf-8")
+
+    report = migrate(tmp_path)
+    assert report == {"time_logs": {"2026-01": 2, "2026-02": 2}, "schedules": {"2026-01": 1}}
+    assert [r["id"] for r in iter_jsonl(tmp_path / "time_logs" / "2026-02.jsonl")] == ["b", "d"]
+    assert not (tmp_path / "time_logs.migrating").exists()
+    with pytest.raises(ValueError):
+        migrate(tmp_path)
+
+
+def test_migrate_checks_every_dataset_before_writing(tmp_path, capsys):
+    (tmp_path / "time_logs.json").write_text(json.dumps([_punch("a", "2026-01-05T07:00:00")]), encoding="utf-8")
+    # Solo los turnos ya estaban particionados: no se toca time_logs
+    MonthlyPartitions(tmp_path / "work_schedules", MONTH_OF["schedules"]).write_month("2026-01", [])
+    with pytest.raises(ValueError):
+        migrate(tmp_path)
+    assert not (tmp_path / "time_logs").exists() and not (tmp_path / "time_logs.migrating").exists()
+    with pytest.raises(SystemExit) as exc:
+        partitions.main(["migrate", "--data-dir", str(tmp_path)])
+    assert exc.value.code == 1 and "already has partitions" in capsys.readouterr().err
@@ -0,0 +1,105 @@
+import json
+import os
+
+from Shared.payroll import PayrollRollup
+from Shared.punch_ingest import append_jsonl
+
+
+def _punch(event, ts, officer="o1", site="WD 100"):
+    return {"officer_id": officer, "site_prefix": site, "event": event, "ts": ts}
+
+
+def test_overnight_shift_is_split_at_midnight():
+    rollup = PayrollRollup()
+    rollup.apply_many([_punch("in", "2026-01-05T22:00:00"), _punch("out", "2026-01-06T06:30:00")])
+    assert rollup.daily == {"2026-01-05": {"o1|WD 100": 2 * 3600}, "2026-01-06": {"o1|WD 100": 6.5 * 3600}}
+    assert rollup.period_rows("2026-01-06", "2026-01-06") == [
+        {"officer_id": "o1", "site_prefix": "WD 100", "hours": 6.5}]
+    assert rollup.period_rows("2026-01-01", "2026-01-31")[0]["hours"] == 8.5
+
+
+def test_orphan_out_and_open_shift():
+    rollup = PayrollRollup()
+    rollup.apply_many([_punch("out", "2026-01-05T07:00:00"), _punch("in", "2026-01-05T08:00:00", officer="o2")])
+    assert rollup.orphan_outs == 1
+    assert rollup.open_shifts == {"o2": ["WD 100", rollup.open_shifts["o2"][1]]}
+    assert rollup.daily == {}
+
+
+def test_catch_up_applies_only_new_journal_lines(tmp_path):
+    journal = tmp_path / "time_logs.jsonl"
+    append_jsonl(journal, [_punch("in", "2026-01-05T07:00:00"), _punch("out", "2026-01-05T15:00:00")])
+    rollup = PayrollRollup()
+    assert rollup.catch_up(journal) == 2
+    assert rollup.catch_up(journal) == 0
+    append_jsonl(journal, [_punch("in", "2026-01-06T07:00:00"), _punch("out", "2026-01-06T08:00:00")])
+    assert rollup.catch_up(journal) == 2
+    assert rollup.period_rows("2026-01-05", "2026-01-06")[0]["hours"] == 9
+
+
+def test_close_period_replaces_same_range():
+    rollup = PayrollRollup()
+    rollup.apply_many([_punch("in", "2026-01-05T07:00:00"), _punch("out", "2026-01-05T15:00:00")])
+    rollup.close_period("2026-01-01", "2026-01-14")
+    rollup.apply_many([_punch("in", "2026-01-06T07:00:00"), _punch("out", "2026-01-06T09:00:00")])
+    closed = rollup.close_period("2026-01-01", "2026-01-14")
+    assert len(rollup.closed_periods) == 1
+    assert closed["rows"][0]["hours"] == 10
+
+
+def test_save_keeps_periods_closed_by_another_writer(tmp_path):
+    path = tmp_path / "payroll_rollups.json"
+    journal = tmp_path / "time_logs.jsonl"
+    append_jsonl(journal, [_punch("in", "2026-01-05T07:00:00"), _punch("out", "2026-01-05T15:00:00")])
+    service = PayrollRollup.load(path)
+    service.catch_up(journal)
+    service.save(path)
+
+    # Una sesion de la app cierra un periodo; el servicio guarda despues con su copia en memoria
+    session = PayrollRollup.load(path)
+    session.close_period("2026-01-01", "2026-01-14")
+    session.save(path)
+    append_jsonl(journal, [_punch("in", "2026-01-06T07:00:00")])
+    service.catch_up(journal)
+    service.save(path)
+
+    saved = PayrollRollup.load(path)
+    assert [(p["start"], p["end"]) for p in saved.closed_periods] == [("2026-01-01", "2026-01-14")]
+    assert saved.journal_offset == journal.stat().st_size
+    assert "o1" in saved.open_shifts
+
+
+def test_save_does_not_roll_back_progress(tmp_path):
+    path = tmp_path / "payroll_rollups.json"
+    journal = tmp_path / "time_logs.jsonl"
+    append_jsonl(journal, [_punch("in", "2026-01-05T07:00:00"), _punch("out", "2026-01-05T15:00:00")])
+    stale = PayrollRollup.load(path)
+    ahead = PayrollRollup.load(path)
+    ahead.catch_up(journal)
+    ahead.save(path)
+    stale.close_period("2026-01-01", "2026-01-14")
+    stale.save(path)
+
+    saved = PayrollRollup.load(path)
+    assert saved.journal_offset == journal.stat().st_size
+    assert saved.period_rows("2026-01-05", "2026-01-05")[0]["hours"] == 8
+    assert len(saved.closed_periods) == 1
+
+
+def test_edited_legacy_file_rebuilds_the_rollup(tmp_path):
+    legacy, journal = tmp_path / "time_logs.json", tmp_path / "time_logs.jsonl"
+    legacy.write_text(json.dumps([_punch("in", "2026-01-05T07:00:00"), _punch("out", "2026-01-05T15:00:00")]),
+                      encoding="utf-8")
+    append_jsonl(journal, [_punch("in", "2026-01-06T07:00:00"), _punch("out", "2026-01-06T08:00:00")])
+    rollup = PayrollRollup()
+    rollup.catch_up(journal, legacy)
+    rollup.close_period("2026-01-01", "2026-01-14")
+    assert rollup.catch_up(journal, legacy) == 0
+    # Edicion desde la app: el turno del 5 termina a las 12; se rehace sin contar dos veces el journal
+    legacy.write_text(json.dumps([_punch("in", "2026-01-05T07:00:00"), _punch("out", "2026-01-05T12:00:00")]),
+                      encoding="utf-8")
+    os.utime(legacy, ns=(legacy.stat().st_atime_ns, legacy.stat().st_mtime_ns + 1_000_000))
+    assert rollup.catch_up(journal, legacy) == 4
+    assert rollup.period_rows("2026-01-05", "2026-01-06")[0]["hours"] == 6
+    assert len(rollup.closed_periods) == 1
+    assert PayrollRollup.from_dict(rollup.to_dict()).catch_up(journal, legacy) == 0
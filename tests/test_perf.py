@@ -0,0 +1,35 @@
+import json
+
+from Shared.perf import Metric, PerfRegistry, timed, timer
+
+
+def test_metric_ring_keeps_recent_samples_and_lifetime_totals():
+    metric = Metric(size=4)
+    for ms in range(1, 11):
+        metric.add(float(ms))
+    # Percentiles sobre las ultimas 4 muestras; count y media de toda la vida
+    assert list(metric.samples) == [7.0, 8.0, 9.0, 10.0]
+    summary = metric.summary()
+    assert summary["count"] == 10 and summary["mean_ms"] == 5.5
+    assert (summary["p50_ms"], summary["p99_ms"], summary["max_ms"]) == (9.0, 10.0, 10.0)
+    assert Metric().summary() == {"count": 0}
+
+
+def test_registry_timers_and_disable(tmp_path):
+    registry = PerfRegistry()
+    with timer("load", registry):
+        pass
+
+    @timed("save", registry)
+    def save():
+        return "ok"
+
+    assert save() == "ok"
+    registry.incr("reruns", 2)
+    assert [row["name"] for row in registry.rows()] == ["load", "save"]
+    registry.dump_json(tmp_path / "perf.json")
+    assert json.loads((tmp_path / "perf.json").read_text())["counters"] == {"reruns": 2}
+    registry.enabled = False
+    save()
+    registry.incr("reruns")
+    assert registry.metric("save").count == 1 and registry.counters["reruns"] == 2
@@ -0,0 +1,110 @@
+import json
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from Shared import punch_ingest
+from Shared.partitions import MONTH_OF, MonthlyPartitions, PartitionClosed
+from Shared.punch_ingest import (JOURNAL_NAME, RETRY_MAX_S, PunchError, PunchIngestor, append_jsonl, iter_jsonl,
+                                 normalize_punch)
+from Shared.timeutil import parse_epoch
+
+# Los tests escriben en 2026-10 como mes abierto
+pytestmark = pytest.mark.usefixtures("pinned_today")
+
+
+def _punch(punch_id, ts="2026-01-05T07:00:00"):
+    return {"id": punch_id, "officer_id": "o1", "site_prefix": "WD 100", "event": "in", "ts": ts}
+
+
+def test_normalize_punch_validates_and_derives_key():
+    rec = normalize_punch({"officer_id": "o1", "site_prefix": "WD 100", "event": "IN", "ts": "2026-01-05T07:00"})
+    assert rec["event"] == "in" and rec["ts"] == "2026-01-05T07:00:00"
+    # Mismo oficial/sitio/evento/instante: misma llave
+    assert normalize_punch(dict(rec, id=""))["id"] == rec["id"]
+    with pytest.raises(PunchError):
+        normalize_punch({"officer_id": "o1", "site_prefix": "WD 100", "event": "break"})
+    with pytest.raises(PunchError):
+        normalize_punch({"officer_id": "", "site_prefix": "WD 100", "event": "in"})
+
+
+def test_retries_are_committed_once(tmp_path):
+    ingestor = PunchIngestor(tmp_path / JOURNAL_NAME, flush_ms=10)
+    try:
+        assert ingestor.submit([_punch("a"), _punch("b")])[:2] == (2, 0)
+        assert ingestor.submit([_punch("a")])[:2] == (0, 1)
+    finally:
+        ingestor.close()
+    assert [r["id"] for r in iter_jsonl(tmp_path / JOURNAL_NAME)] == ["a", "b"]
+
+
+def test_dedupe_window_keeps_only_recent_ids(tmp_path):
+    ingestor = PunchIngestor(tmp_path / JOURNAL_NAME, known_ids=["a", "b", "c"], dedupe_window=2)
+    try:
+        assert len(ingestor._seen) == 2
+        # "a" salio de la ventana; "c" sigue
+        assert ingestor.submit([_punch("a"), _punch("c")])[:2] == (1, 1)
+    finally:
+        ingestor.close()
+
+
+def test_for_data_dir_seeds_from_legacy_file_and_journal(tmp_path):
+    (tmp_path / "time_logs.json").write_text(json.dumps([_punch("old")]), encoding="utf-8")
+    append_jsonl(tmp_path / JOURNAL_NAME, [_punch("j1")])
+    ingestor = PunchIngestor.for_data_dir(tmp_path)
+    try:
+        assert ingestor.submit([_punch("old"), _punch("j1"), _punch("new")])[:2] == (1, 2)
+    finally:
+        ingestor.close()
+
+
+def test_offset_timestamps_are_converted_not_truncated():
+    # Mismo instante con distinto offset: mismo epoch; el offset no se descarta
+    assert parse_epoch("2026-10-05T07:00:00+02:00") == parse_epoch("2026-10-05T05:00:00+00:00")
+    assert parse_epoch("2026-10-05T07:00:00+00:00") - parse_epoch("2026-10-05T07:00:00+02:00") == 7200
+    assert parse_epoch(datetime(2026, 10, 5, 7, tzinfo=timezone.utc)) == parse_epoch("2026-10-05T07:00:00Z")
+    assert parse_epoch("2026-10-05T07:00:00") == parse_epoch(datetime(2026, 10, 5, 7))
+
+
+def test_transient_commit_errors_back_off(tmp_path, monkeypatch):
+    calls = []
+
+    def _fail(path, records):
+        calls.append(len(records))
+        raise OSError("disk full")
+
+    monkeypatch.setattr(punch_ingest, "append_jsonl", _fail)
+    ingestor = PunchIngestor(tmp_path / JOURNAL_NAME, batch_size=1, flush_ms=50)
+    try:
+        _, _, ticket = ingestor.submit([_punch("a")])
+        assert not ingestor.wait_committed(ticket, timeout=0.3)
+        time.sleep(0.3)
+        # Buffer lleno (batch_size=1) pero con backoff: pocos intentos, no un bucle
+        assert 1 <= len(calls) <= 5
+        monkeypatch.setattr(punch_ingest, "append_jsonl", append_jsonl)
+        # wait_committed no espera mientras haya error: se consulta hasta el siguiente reintento
+        deadline = time.monotonic() + RETRY_MAX_S + 1
+        while not ingestor.wait_committed(ticket) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert ingestor.wait_committed(ticket)
+    finally:
+        ingestor.close()
+    assert [r["id"] for r in iter_jsonl(tmp_path / JOURNAL_NAME)] == ["a"]
+
+
+def test_closed_month_fails_the_ticket_instead_of_retrying(tmp_path):
+    store = MonthlyPartitions(tmp_path / "time_logs", MONTH_OF["time_logs"])
+    ingestor = PunchIngestor(store.root, flush_ms=10, partitions=store)
+    try:
+        _, _, closed = ingestor.submit([_punch("a", "2026-01-05T07:00:00")])
+        assert not ingestor.wait_committed(closed)
+        assert isinstance(ingestor.ticket_error(closed), PartitionClosed)
+        # El siguiente batch no queda detras del fallido
+        _, _, ok = ingestor.submit([_punch("b", "2026-10-05T07:00:00")])
+        assert ingestor.wait_committed(ok) and ingestor.ticket_error(ok) is None
+        # El id fallido se puede volver a enviar
+        assert ingestor.submit([_punch("a", "2026-01-05T07:00:00")])[:2] == (1, 0)
+    finally:
+        ingestor.close()
+    assert [r["id"] for r in store.read("2026-10")] == ["b"]
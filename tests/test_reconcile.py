@@ -0,0 +1,133 @@
+import json
+
+import pytest
+
+from Shared.datagen import DatasetGenerator
+from Shared.reconcile import (EARLY_OUT, LATE, NO_SHOW, ON_TIME, UNSCHEDULED, pair_punches, reconcile,
+                              reconcile_frame, summarize)
+from Shared.timeutil import epoch_to_iso
+
+
+def _shift(shift_id, officer, date="2026-01-05", start="07:00", end="15:00"):
+    return {"id": shift_id, "officer_id": officer, "site_prefix": "WD 100", "date": date,
+            "start_time": start, "end_time": end}
+
+
+def _punch(officer, event, ts):
+    return {"officer_id": officer, "site_prefix": "WD 100", "event": event, "ts": ts}
+
+
+SHIFTS = [
+    _shift("on", "o1"),
+    _shift("late", "o2"),
+    _shift("early", "o3"),
+    _shift("absent", "o4"),
+    _shift("night", "o5", start="22:00", end="06:00"),
+]
+PUNCHES = [
+    _punch("o1", "in", "2026-01-05T07:03:00"), _punch("o1", "out", "2026-01-05T15:00:00"),
+    _punch("o2", "in", "2026-01-05T07:20:00"), _punch("o2", "out", "2026-01-05T15:00:00"),
+    _punch("o3", "in", "2026-01-05T07:00:00"), _punch("o3", "out", "2026-01-05T13:00:00"),
+    _punch("o5", "in", "2026-01-05T21:58:00"), _punch("o5", "out", "2026-01-06T06:01:00"),
+    # Sin turno
+    _punch("o6", "in", "2026-01-05T09:00:00"), _punch("o6", "out", "2026-01-05T10:00:00"),
+]
+
+
+def _by_shift(results):
+    return {r["shift_id"] or r["officer_id"]: r for r in results}
+
+
+def test_classifications():
+    rows = _by_shift(reconcile(SHIFTS, PUNCHES))
+    assert rows["on"]["status"] == ON_TIME
+    assert (rows["late"]["status"], rows["late"]["late_minutes"]) == (LATE, 20)
+    assert (rows["early"]["status"], rows["early"]["early_minutes"]) == (EARLY_OUT, 120)
+    assert rows["absent"]["status"] == NO_SHOW and rows["absent"]["actual_start"] == ""
+    assert rows["night"]["status"] == ON_TIME
+    assert rows["o6"]["status"] == UNSCHEDULED
+    assert summarize(rows.values()) == {ON_TIME: 2, LATE: 1, EARLY_OUT: 1, NO_SHOW: 1, UNSCHEDULED: 1}
+
+
+def test_breaks_inside_a_shift_are_merged():
+    punches = [_punch("o1", "in", "2026-01-05T07:00:00"), _punch("o1", "out", "2026-01-05T11:00:00"),
+               _punch("o1", "in", "2026-01-05T11:30:00"), _punch("o1", "out", "2026-01-05T15:00:00")]
+    rows = reconcile([_shift("on", "o1")], punches)
+    assert len(rows) == 1 and rows[0]["status"] == ON_TIME
+    assert rows[0]["actual_end"] == "2026-01-05T15:00:00"
+
+
+def test_punch_far_from_the_shift_is_unscheduled():
+    punches = [_punch("o1", "in", "2026-01-05T18:00:00"), _punch("o1", "out", "2026-01-05T20:00:00")]
+    statuses = sorted(r["status"] for r in reconcile([_shift("on", "o1")], punches, window_minutes=60))
+    assert statuses == sorted([NO_SHOW, UNSCHEDULED])
+
+
+def test_pair_punches_leaves_unmatched_in_open():
+    intervals = pair_punches([_punch("o1", "in", "2026-01-05T07:00:00"), _punch("o1", "in", "2026-01-05T08:00:00"),
+                              _punch("o1", "out", "2026-01-05T15:00:00")])
+    assert [iv["end"] is None for iv in intervals] == [True, False]
+
+
+def test_frame_matches_row_statuses():
+    pytest.importorskip("pandas")
+    frame = reconcile_frame(SHIFTS, PUNCHES)
+    statuses = dict(zip(frame["shift_id"].fillna(frame["officer_id"]), frame["status"]))
+    assert statuses == {r["shift_id"] or r["officer_id"]: r["status"] for r in reconcile(SHIFTS, PUNCHES)}
+
+
+def _frame_rows(frame):
+    rows = frame.astype(object).where(frame.notna(), None).to_dict("records")
+    return sorted((r["status"], r["officer_id"], r["shift_id"] or "", epoch_to_iso(r["actual_start"])
+                   if r["actual_start"] is not None else "", r["late_minutes"], r["early_minutes"]) for r in rows)
+
+
+def _python_rows(results):
+    return sorted((r["status"], r["officer_id"], r["shift_id"], r["actual_start"], r["late_minutes"],
+                   r["early_minutes"]) for r in results)
+
+
+def test_frame_and_rows_agree_on_late_arrivals_breaks_and_strays():
+    pytest.importorskip("pandas")
+    shifts = SHIFTS + [_shift("very-late", "o7"), _shift("break", "o8"), _shift("d1", "o9"),
+                       _shift("d2", "o9", date="2026-01-06")]
+    punches = PUNCHES + [
+        # Llega 3 h tarde: fuera de window, pero dentro del turno
+        _punch("o7", "in", "2026-01-05T10:00:00"), _punch("o7", "out", "2026-01-05T15:00:00"),
+        _punch("o8", "in", "2026-01-05T07:00:00"), _punch("o8", "out", "2026-01-05T11:00:00"),
+        _punch("o8", "in", "2026-01-05T11:30:00"), _punch("o8", "out", "2026-01-05T14:00:00"),
+        # Un punch suelto en la noche y el turno del dia siguiente sin punches
+        _punch("o9", "in", "2026-01-05T06:55:00"), _punch("o9", "out", "2026-01-05T15:00:00"),
+        _punch("o9", "in", "2026-01-05T19:00:00"), _punch("o9", "out", "2026-01-05T20:00:00"),
+    ]
+    for window in (60, 120):
+        rows = reconcile(shifts, punches, window_minutes=window)
+        assert _frame_rows(reconcile_frame(shifts, punches, window_minutes=window)) == _python_rows(rows)
+    rows = _by_shift(reconcile(shifts, punches))
+    assert (rows["very-late"]["status"], rows["very-late"]["late_minutes"]) == (LATE, 180)
+    assert (rows["break"]["status"], rows["break"]["actual_end"]) == (EARLY_OUT, "2026-01-05T14:00:00")
+    assert rows["d2"]["status"] == NO_SHOW
+
+
+def test_frame_and_rows_agree_on_generated_data():
+    pytest.importorskip("pandas")
+    gen = DatasetGenerator(sites=3, officers=20, seed=3)
+    shifts, punches = [], []
+    for shift, day_punches in gen.iter_days(10):
+        shifts.append(shift)
+        punches.extend(day_punches)
+    assert _frame_rows(reconcile_frame(shifts, punches)) == _python_rows(reconcile(shifts, punches))
+    assert len(reconcile_frame([], [])) == 0
+
+
+def test_cli_reads_monthly_partitions(tmp_path, capsys):
+    from Shared.partitions import MONTH_OF, MonthlyPartitions
+    from Shared.reconcile import main
+
+    # Ya migrado: los JSON legados quedan vacios y no se leen
+    (tmp_path / "work_schedules.json").write_text("[]", encoding="utf-8")
+    MonthlyPartitions(tmp_path / "work_schedules", MONTH_OF["schedules"]).append(SHIFTS, force=True)
+    MonthlyPartitions(tmp_path / "time_logs", MONTH_OF["time_logs"]).append(PUNCHES, force=True)
+    main(["--data-dir", str(tmp_path), "--start", "2026-01-05", "--end", "2026-01-06"])
+    counts = json.loads(capsys.readouterr().out)
+    assert counts == {ON_TIME: 2, LATE: 1, EARLY_OUT: 1, NO_SHOW: 1, UNSCHEDULED: 1}
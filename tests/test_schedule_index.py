@@ -0,0 +1,92 @@
+from datetime import datetime
+
+from Shared.schedule_index import ScheduleIndex, SharedScheduleIndex
+from Shared.timeutil import to_epoch
+
+
+def _at(day, hour=0):
+    return to_epoch(datetime.fromisoformat(f"{day}T{hour:02d}:00"))
+
+
+def _shift(shift_id, date, start, end, site="WD 100", officer="o1"):
+    return {"id": shift_id, "date": date, "start_time": start, "end_time": end,
+            "site_prefix": site, "officer_id": officer}
+
+
+SHIFTS = [
+    _shift("a", "2026-01-05", "07:00", "15:00"),
+    _shift("b", "2026-01-05", "23:00", "07:00"),
+    _shift("c", "2026-01-06", "07:00", "15:00", site="PX 100"),
+    _shift("d", "2026-01-07", "15:00", "23:00", officer="o2"),
+]
+
+
+def _ids(shifts):
+    return [s["id"] for s in shifts]
+
+
+def test_site_range_by_start():
+    index = ScheduleIndex(SHIFTS)
+    assert _ids(index.site_range("WD 100", _at("2026-01-05"), _at("2026-01-06"))) == ["a", "b"]
+    assert _ids(index.site_range("WD 100", _at("2026-01-06"), _at("2026-01-08"))) == ["d"]
+    assert index.site_range("XX 1", 0, 2 ** 40) == []
+
+
+def test_overlapping_includes_overnight_shift():
+    index = ScheduleIndex(SHIFTS)
+    lo, hi = _at("2026-01-06"), _at("2026-01-07")
+    assert index.site_range("WD 100", lo, hi) == []
+    # "b" empezo el dia anterior y termina a las 07:00
+    assert _ids(index.site_range("WD 100", lo, hi, overlapping=True)) == ["b"]
+    assert index.bounds("b") == (_at("2026-01-05", 23), _at("2026-01-06", 7))
+
+
+def test_officer_range_and_next_shift():
+    index = ScheduleIndex(SHIFTS)
+    assert _ids(index.officer_range("o1", _at("2026-01-05"), _at("2026-01-08"))) == ["a", "b", "c"]
+    assert index.next_for_officer("o1", _at("2026-01-05", 8))["id"] == "b"
+    assert index.next_for_officer("o1", _at("2026-01-07")) is None
+    assert index.next_for_site("PX 100", 0)["id"] == "c"
+
+
+def test_sync_applies_edits_and_deletes():
+    index = ScheduleIndex(SHIFTS)
+    moved = dict(SHIFTS[0], site_prefix="PX 100")
+    index.sync([moved] + SHIFTS[2:])
+    assert len(index) == 3 and "b" not in index
+    assert _ids(index.site_range("PX 100", 0, 2 ** 40)) == ["a", "c"]
+    assert "WD 100" in index.sites()
+
+
+def test_shifts_without_valid_times_are_skipped():
+    index = ScheduleIndex([{"id": "x", "date": "not a date"}, _shift("a", "2026-01-05", "07:00", "15:00")])
+    assert len(index) == 1 and "x" not in index
+
+
+def test_shared_index_is_built_once_and_rebuilt_on_file_change():
+    state = {"signature": 1, "loads": 0}
+
+    def _load():
+        state["loads"] += 1
+        return SHIFTS
+
+    shared = SharedScheduleIndex(lambda: state["signature"], _load)
+    assert _ids(shared.site_range("WD 100", 0, 2 ** 40)) == ["a", "b", "d"]
+    assert shared.next_for_site("PX 100", 0)["id"] == "c"
+    assert shared.builds == 1 and state["loads"] == 1
+    # Otro proceso edito el archivo: un solo rebuild
+    state["signature"] = 2
+    assert sorted(shared.sites()) == ["PX 100", "WD 100"]
+    assert shared.builds == 2
+
+
+def test_shared_index_sync_adopts_the_saved_file():
+    state = {"signature": 1}
+    shared = SharedScheduleIndex(lambda: state["signature"], lambda: SHIFTS)
+    shared.sites()
+    # El guardado cambia el archivo y aplica el cambio al indice: no hay rebuild
+    state["signature"] = 2
+    shared.sync(SHIFTS[:1])
+    assert shared.add(_shift("d", "2026-01-08", "07:00", "15:00", site="PX 100"), 1)
+    assert _ids(shared.site_range("PX 100", 0, 2 ** 40)) == ["d"]
+    assert shared.builds == 1
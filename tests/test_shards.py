@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from Shared import shards
+from Shared.partitions import MONTH_OF, MonthlyPartitions, PartitionClosed, open_partitions
+from Shared.shards import SHARD_MAP_NAME, UNASSIGNED, ShardedPartitions, ShardMap, migrate, shard_slug
+from Shared.timeutil import parse_epoch
+
+# Los tests escriben en 2026-10 como mes abierto
+pytestmark = pytest.mark.usefixtures("pinned_today")
+
+
+def _punch(punch_id, site, ts="2026-10-05T07:00:00"):
+    return {"id": punch_id, "officer_id": "o1", "site_prefix": site, "event": "in", "ts": ts}
+
+
+def _store(tmp_path, **kwargs):
+    shard_map = ShardMap(tmp_path / SHARD_MAP_NAME)
+    return ShardedPartitions(tmp_path / "time_logs", MONTH_OF["time_logs"], shard_map, **kwargs)
+
+
+def test_shard_names_are_slugs_without_collisions(tmp_path):
+    shard_map = ShardMap(tmp_path / SHARD_MAP_NAME)
+    assert shard_slug("PX 106") == "px-106"
+    assert shard_map.assign("PX 106") == "px-106"
+    assert shard_map.assign("px-106") == "px-106-2"
+    assert shard_map.assign("") == UNASSIGNED
+    # El mapa queda en disco para otros procesos
+    assert ShardMap(tmp_path / SHARD_MAP_NAME).get("px-106") == "px-106-2"
+
+
+def test_records_are_routed_by_site(tmp_path):
+    store = _store(tmp_path)
+    store.append([_punch("a", "PX 106"), _punch("b", "WD 100"), _punch("c", "")])
+    assert store.shard_names() == [UNASSIGNED, "px-106", "wd-100"]
+    assert [r["id"] for r in store.for_site("WD 100").read("2026-10")] == ["b"]
+    assert sorted(r["id"] for r in store.read_range(parse_epoch("2026-10-01"), parse_epoch("2026-11-01"))) == \
+        ["a", "b", "c"]
+
+
+def test_moving_a_record_to_another_site_changes_shard(tmp_path):
+    store = ShardedPartitions(tmp_path / "work_schedules", MONTH_OF["schedules"], ShardMap(tmp_path / SHARD_MAP_NAME))
+    shift = {"id": "s1", "officer_id": "o1", "site_prefix": "PX 106", "date": "2026-10-05",
+             "start_time": "07:00", "end_time": "15:00"}
+    store.save_changes([{"key": "s1", "base": None, "new": shift}])
+    moved = dict(shift, site_prefix="WD 100")
+    assert store.save_changes([{"key": "s1", "base": shift, "new": moved}]) == ["px-106/2026-10", "wd-100/2026-10"]
+    assert store.for_site("PX 106").read("2026-10") == [] and store.for_site("WD 100").read("2026-10") == [moved]
+
+
+def test_closed_month_is_checked_before_any_shard_is_written(tmp_path):
+    store = _store(tmp_path)
+    with pytest.raises(PartitionClosed):
+        store.append([_punch("a", "PX 106"), _punch("b", "WD 100", ts="2026-01-05T07:00:00")])
+    assert store.read_all() == []
+
+
+def test_only_max_resident_shards_stay_in_memory(tmp_path):
+    store = _store(tmp_path, max_resident=2)
+    store.append([_punch(str(i), f"WD {i}") for i in range(4)])
+    store.read_all()
+    assert len(store.resident()) == 2
+
+
+def test_migrate_splits_monthly_partitions_by_site(tmp_path):
+    flat = MonthlyPartitions(tmp_path / "time_logs", MONTH_OF["time_logs"])
+    flat.append([_punch("a", "PX 106"), _punch("b", "WD 100"), _punch("c", "PX 106", ts="2026-01-05T07:00:00")],
+                force=True)
+    (tmp_path / "work_schedules").mkdir()
+
+    report = migrate(tmp_path)
+    assert report["time_logs"] == {"px-106": 2, "wd-100": 1}
+    assert json.loads((tmp_path / SHARD_MAP_NAME).read_text())["shards"] == {"PX 106": "px-106", "WD 100": "wd-100"}
+    assert (tmp_path / "pre_shard" / "time_logs" / "2026-10.jsonl").exists()
+    store = open_partitions(tmp_path, "time_logs")
+    assert isinstance(store, ShardedPartitions)
+    assert sorted(r["id"] for r in store.for_site("PX 106").read_all()) == ["a", "c"]
+
+
+def test_migrate_refuses_sharded_data(tmp_path, capsys):
+    _store(tmp_path).append([_punch("a", "PX 106")])
+    with pytest.raises(ValueError):
+        migrate(tmp_path)
+    with pytest.raises(SystemExit) as exc:
+        shards.main(["migrate", "--data-dir", str(tmp_path)])
+    assert exc.value.code == 1 and "already sharded" in capsys.readouterr().err
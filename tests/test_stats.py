@@ -0,0 +1,47 @@
+import threading
+
+import pytest
+
+from Shared.partitions import MONTH_OF, MonthlyPartitions
+from Shared.stats import file_signature, is_stale, load_stats, officer_stats, update_stats
+
+# Los tests escriben en 2026-10 como mes abierto
+pytestmark = pytest.mark.usefixtures("pinned_today")
+
+
+def test_sections_and_staleness(tmp_path):
+    path = tmp_path / "quick_stats.json"
+    source = tmp_path / "security_officers.json"
+    source.write_text("[]", encoding="utf-8")
+    update_stats(path, "officers", officer_stats([{"status": "Active"}, {"status": "Inactive"}, {}]), source)
+    update_stats(path, "sites", {"total": 0})
+    stats = load_stats(path)
+    assert stats["officers"]["active"] == 2 and stats["officers"]["total"] == 3
+    assert not is_stale(stats["officers"], source)
+    source.write_text('[{"id": "1"}]', encoding="utf-8")
+    assert is_stale(stats["officers"], source)
+
+
+def test_concurrent_updates_keep_every_section(tmp_path):
+    path = tmp_path / "quick_stats.json"
+    threads = [threading.Thread(target=update_stats, args=(path, f"section{i}", {"total": i})) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(load_stats(path)) == sorted(f"section{i}" for i in range(16))
+
+
+def test_partitioned_source_sees_month_writes(tmp_path):
+    store = MonthlyPartitions(tmp_path / "work_schedules", MONTH_OF["schedules"])
+    shift = {"id": "s1", "officer_id": "o1", "site_prefix": "WD 100", "date": "2026-10-05",
+             "start_time": "07:00", "end_time": "15:00"}
+    store.append([shift])
+    path = tmp_path / "quick_stats.json"
+    update_stats(path, "schedules", {"total": 1}, store.sources())
+    section = load_stats(path)["schedules"]
+    assert not is_stale(section, store.sources())
+    # Agregar a un mes existente no cambia la carpeta raiz, si el archivo del mes
+    store.append([dict(shift, id="s2")])
+    assert not is_stale({"source": file_signature(store.root)}, store.root)
+    assert is_stale(section, store.sources())
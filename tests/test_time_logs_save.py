@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from Shared.punch_ingest import JOURNAL_NAME, append_jsonl, iter_jsonl
+
+
+@pytest.fixture
+def data_manager(tmp_path, monkeypatch):
+    monkeypatch.setenv("AMDAOPS_DATA_DIR", str(tmp_path))
+    from shoppingCenter.app import Config, DataManager
+
+    return DataManager(Config(), {})
+
+
+def _punch(punch_id):
+    return {"id": punch_id, "officer_id": "o1", "site_prefix": "WD 100", "event": "in",
+            "ts": "2026-01-05T07:00:00"}
+
+
+def test_save_keeps_journal_punches_out_of_time_logs_json(data_manager, tmp_path):
+    (tmp_path / "time_logs.json").write_text(json.dumps([_punch("a")]), encoding="utf-8")
+    append_jsonl(tmp_path / JOURNAL_NAME, [_punch("j1")])
+
+    logs = list(data_manager.time_logs)
+    assert [p["id"] for p in logs] == ["a", "j1"]
+    assert data_manager.save_time_logs(logs + [_punch("new")])
+
+    assert [p["id"] for p in json.loads((tmp_path / "time_logs.json").read_text(encoding="utf-8"))] == ["a", "new"]
+    assert [p["id"] for p in iter_jsonl(tmp_path / JOURNAL_NAME)] == ["j1"]
+    assert sorted(p["id"] for p in data_manager.reload("time_logs")) == ["a", "j1", "new"]
+
+
+def test_save_without_reading_first_does_not_copy_the_journal(data_manager, tmp_path):
+    append_jsonl(tmp_path / JOURNAL_NAME, [_punch("j1")])
+    assert data_manager.save_time_logs([_punch("j1"), _punch("new")])
+    assert [p["id"] for p in json.loads((tmp_path / "time_logs.json").read_text(encoding="utf-8"))] == ["new"]
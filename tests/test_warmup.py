@@ -0,0 +1,61 @@
+import json
+import os
+
+import pytest
+
+from Shared.warmup import DataWarmup, files_signature
+
+
+@pytest.fixture
+def warmup():
+    w = DataWarmup(max_workers=2)
+    yield w
+    w.shutdown()
+
+
+def _loader(path, loads):
+    def _load():
+        loads.append(path.name)
+        return json.loads(path.read_text(encoding="utf-8"))
+    return _load
+
+
+def _touch(path, records):
+    # mtime distinto aunque el tamano no cambie
+    stat = path.stat() if path.exists() else None
+    path.write_text(json.dumps(records), encoding="utf-8")
+    if stat is not None:
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_get_waits_on_the_warm_up_and_reloads_only_when_files_change(tmp_path, warmup):
+    path, loads = tmp_path / "officers.json", []
+    _touch(path, [{"id": "o1"}])
+    warmup.register("officers", [path], _loader(path, loads))
+    warmup.start()
+    assert warmup.get("officers", timeout=5) == [{"id": "o1"}]
+    assert warmup.get("officers", timeout=5) == [{"id": "o1"}] and loads == ["officers.json"]
+    assert warmup.timings()["total"] is not None
+
+    _touch(path, [{"id": "o2"}])
+    assert warmup.get("officers", timeout=5) == [{"id": "o2"}] and len(loads) == 2
+    with pytest.raises(KeyError):
+        warmup.get("sites")
+
+
+def test_put_publishes_saved_data_without_reloading(tmp_path, warmup):
+    path, loads = tmp_path / "work_schedules.json", []
+    _touch(path, [{"id": "s1"}])
+    warmup.register("schedules", [path], _loader(path, loads), copy_records=True)
+    warmup.start()
+    first = warmup.get("schedules", timeout=5)
+    # copy_records: cada sesion recibe sus propios dicts
+    first[0]["id"] = "edited"
+    assert warmup.get("schedules", timeout=5) == [{"id": "s1"}]
+
+    saved = [{"id": "s1"}, {"id": "s2"}]
+    _touch(path, saved)
+    warmup.put("schedules", saved)
+    saved.append({"id": "later"})
+    assert warmup.get("schedules", timeout=5) == [{"id": "s1"}, {"id": "s2"}] and len(loads) == 1
+    assert files_signature([path, tmp_path / "missing.json"])[1] is None